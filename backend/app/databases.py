@@ -0,0 +1,80 @@
+import os
+
+# Perfis de banco escolhidos por DB_PROFILE (ver settings.DATABASES):
+#
+#   sqlite        WAL e pragmas de produção (padrão)
+#   sqlite-basic  configuração anterior (journal padrão), para comparação
+#   postgres      conexões persistentes ou pool do psycopg (POSTGRES_*)
+
+SQLITE_PRAGMAS = {
+    # Leitores não bloqueiam o escritor (e vice-versa); o modo fica gravado
+    # no arquivo do banco
+    'journal_mode': 'WAL',
+    # Em WAL, NORMAL só sincroniza no checkpoint: não corrompe o banco e
+    # pode perder apenas as últimas transações numa queda de energia
+    'synchronous': 'NORMAL',
+    # Espera o lock de escrita em vez de falhar com "database is locked"
+    'busy_timeout': 15000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Negativo = KiB (64 MiB de cache de páginas por conexão)
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite(name, tuned=True):
+    options = {
+        # BEGIN IMMEDIATE: a transação pega o lock de escrita ao começar, o
+        # que serializa as verificações de conflito de agenda.
+        'transaction_mode': 'IMMEDIATE',
+    }
+    if tuned:
+        options['init_command'] = ';'.join(
+            f'PRAGMA {pragma}={value}'
+            for pragma, value in SQLITE_PRAGMAS.items()
+        )
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'OPTIONS': options,
+    }
+
+
+def postgres(environ=os.environ):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('POSTGRES_DB', 'hackathon'),
+        'USER': environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': environ.get('POSTGRES_HOST', '127.0.0.1'),
+        'PORT': environ.get('POSTGRES_PORT', '5432'),
+        # Confere a conexão reaproveitada antes de usá-la numa requisição
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+
+    if environ.get('POSTGRES_POOL', '1') == '1':
+        # Pool do psycopg 3 (psycopg[pool]) compartilhado pelas threads do
+        # processo; o Django exige CONN_MAX_AGE = 0 nesse modo
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(environ.get('POSTGRES_POOL_MIN', 2)),
+            'max_size': int(environ.get('POSTGRES_POOL_MAX', 10)),
+            'timeout': int(environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+    else:
+        # Sem pool: uma conexão persistente por thread
+        database['CONN_MAX_AGE'] = int(
+            environ.get('POSTGRES_CONN_MAX_AGE', 600)
+        )
+    return database
+
+
+def profile(name, sqlite_name):
+    if name == 'sqlite':
+        return sqlite(sqlite_name)
+    if name == 'sqlite-basic':
+        return sqlite(sqlite_name, tuned=False)
+    if name == 'postgres':
+        return postgres()
+    raise ValueError(f'DB_PROFILE desconhecido: {name}')
@@ -0,0 +1,19 @@
+import json
+
+from django.http import QueryDict
+
+
+def request_data(request):
+    """
+    Lê o corpo da requisição (JSON ou formulário) nas views que não passam
+    pelos parsers do DRF. Retorna None se o corpo for inválido.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    if request.method == 'POST':
+        return request.POST.dict()
+    return QueryDict(request.body).dict()
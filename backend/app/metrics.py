@@ -0,0 +1,20 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+# nome -> função sem argumentos que devolve um dict serializável
+_providers = {}
+
+
+def register(name, provider):
+    _providers[name] = provider
+
+
+def collect():
+    return {name: provider() for name, provider in _providers.items()}
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    return Response(collect())
@@ -0,0 +1,49 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Abaixo disso o COUNT(*) exato é barato o suficiente
+ESTIMATE_THRESHOLD = 100_000
+
+
+def estimated_count(model, using='default'):
+    """
+    Número aproximado de linhas da tabela, sem varrê-la: estatística do
+    planner no PostgreSQL, maior rowid no SQLite. None se não houver.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table],
+            )
+            row = cursor.fetchone()
+            # -1 enquanto a tabela nunca passou por ANALYZE
+            return row[0] if row and row[0] >= 0 else None
+
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}'
+            )
+            return cursor.fetchone()[0] or 0
+
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador do admin que não faz COUNT(*) em tabelas grandes sem filtro.
+    Com filtro ou busca, a contagem é exata (e usa os índices do filtro).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
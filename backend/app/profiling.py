@@ -0,0 +1,198 @@
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Perfil da requisição atual; o contexto acompanha o sync_to_async, então
+# as queries das views async também caem aqui.
+_current = contextvars.ContextVar('query_profile', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.spans = Counter()
+
+    def record(self, sql, params, duration):
+        self.queries.append((sql, repr(params), duration))
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self):
+        """Queries repetidas com os mesmos parâmetros."""
+        exact = Counter((sql, params) for sql, params, _ in self.queries)
+        return sum(count - 1 for count in exact.values())
+
+    def repeated(self, limit=3):
+        """Mesma SQL com parâmetros diferentes (o formato típico do N+1)."""
+        shapes = Counter(sql for sql, _, _ in self.queries)
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in shapes.most_common(limit)
+            if count > 1
+        ]
+
+
+def _record(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, params, time.perf_counter() - started)
+
+
+def _install(connection):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    _install(connection)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Soma o tempo do bloco ao perfil atual (ex.: 'serialize')."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - started
+
+
+def _config():
+    return getattr(settings, 'QUERY_PROFILING', {})
+
+
+class QueryProfilingMiddleware:
+    """
+    Conta as queries, o tempo de SQL, as duplicatas e os spans de uma
+    amostra das requisições e devolve tudo em Server-Timing e no log
+    'app.profiling'. Com ASSERT_BUDGETS, estourar o orçamento de queries da
+    rota (BUDGETS, pelo nome da URL) levanta QueryBudgetExceeded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Conexões abertas antes do middleware carregar (migrate, checks)
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        config = _config()
+        if config.get('ASSERT_BUDGETS'):
+            return True
+        return random.random() < config.get('SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if not self._sampled():
+            return self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        config = _config()
+        total = time.perf_counter() - profile.started
+        match = request.resolver_match
+        route = match.view_name if match else None
+        duplicates = profile.duplicates()
+
+        if config.get('SERVER_TIMING', True):
+            metrics = [
+                f'db;dur={profile.sql_time * 1000:.2f};'
+                f'desc="{len(profile.queries)} queries, '
+                f'{duplicates} duplicadas"',
+                *(
+                    f'{name};dur={duration * 1000:.2f}'
+                    for name, duration in profile.spans.items()
+                ),
+                f'total;dur={total * 1000:.2f}',
+            ]
+            response['Server-Timing'] = ', '.join(metrics)
+
+        budget = config.get('BUDGETS', {}).get(route)
+        over_budget = budget is not None and len(profile.queries) > budget
+
+        if config.get('LOG', True):
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'queries': len(profile.queries),
+                'duplicates': duplicates,
+                'db_ms': round(profile.sql_time * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'spans_ms': {
+                    name: round(duration * 1000, 2)
+                    for name, duration in profile.spans.items()
+                },
+                'repeated': profile.repeated(),
+                'budget': budget,
+            }
+            logger.log(
+                logging.WARNING if over_budget else logging.INFO,
+                json.dumps(record, ensure_ascii=False),
+            )
+
+        if over_budget and config.get('ASSERT_BUDGETS'):
+            raise QueryBudgetExceeded(
+                f'{route} fez {len(profile.queries)} queries '
+                f'(orçamento: {budget}).'
+            )
+        return response
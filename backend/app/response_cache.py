@@ -0,0 +1,236 @@
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .profiling import span
+
+# Respostas GET já serializadas, por view, usuário, dia e query string. Cada
+# resposta depende de tags ('posts', 'user:1', ...) com uma versão no cache;
+# os signals trocam a versão da tag quando os dados mudam, e as chaves
+# antigas simplesmente deixam de ser lidas (e expiram).
+
+
+def posts_tag(user_id=None):
+    return f'posts:user:{user_id}' if user_id else 'posts'
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def sessions_tag(user_id):
+    return f'sessions:user:{user_id}'
+
+
+def _config():
+    return getattr(settings, 'RESPONSE_CACHE', {})
+
+
+def _cache():
+    return caches[_config().get('ALIAS', 'default')]
+
+
+def _tag_key(tag):
+    return f'response:tag:{tag}'
+
+
+def _tag_versions(tags):
+    cache = _cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(tags):
+    _cache().set_many({_tag_key(tag): time.time_ns() for tag in tags}, None)
+
+
+def invalidate(*tags):
+    """Descarta as respostas que dependem das tags, após o commit."""
+    tags = set(tags)
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def _response_key(name, request, versions):
+    user = request.user.id if request.user.is_authenticated else 'anon'
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    # O dia entra na chave porque várias views usam "hoje" como padrão
+    raw = '|'.join(
+        [request.path, query, timezone.localdate().isoformat()]
+        + [str(version) for version in versions]
+    )
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'response:{name}:{user}:{digest}'
+
+
+class _Stats:
+    def __init__(self):
+        self._views = defaultdict(
+            lambda: {
+                'hits': 0,
+                'misses': 0,
+                'not_modified': 0,
+                'saved_seconds': 0.0,
+            }
+        )
+        self._lock = threading.Lock()
+
+    def record(self, name, hit, not_modified, saved=0.0):
+        with self._lock:
+            view = self._views[name]
+            view['hits' if hit else 'misses'] += 1
+            view['not_modified'] += int(not_modified)
+            view['saved_seconds'] += max(saved, 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for name, view in self._views.items():
+                total = view['hits'] + view['misses']
+                result[name] = {
+                    **view,
+                    'saved_seconds': round(view['saved_seconds'], 6),
+                    'hit_rate': round(view['hits'] / total, 4)
+                    if total
+                    else 0.0,
+                }
+            return result
+
+
+_stats = _Stats()
+
+
+def stats():
+    return _stats.snapshot()
+
+
+def _lookup(name, tags, request):
+    key = _response_key(name, request, _tag_versions(tags(request)))
+    return key, _cache().get(key)
+
+
+def _store(key, response, cost):
+    if response.status_code != 200 or response.streaming:
+        return None
+
+    if isinstance(response, Response):
+        with span('serialize'):
+            content = JSONRenderer().render(response.data)
+        content_type = 'application/json'
+    else:
+        content = response.content
+        content_type = response['Content-Type']
+
+    entry = {
+        'content': content,
+        'content_type': content_type,
+        'etag': f'"{hashlib.md5(content).hexdigest()}"',
+        'cost': cost,
+    }
+    _cache().set(key, entry, _config().get('TIMEOUT', 300))
+    return entry
+
+
+def _respond(request, entry, hit):
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    not_modified = '*' in etags or entry['etag'] in etags
+
+    if not_modified:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            entry['content'], content_type=entry['content_type']
+        )
+    response['ETag'] = entry['etag']
+    # Privado (depende do usuário) e sempre revalidado via If-None-Match
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response, not_modified
+
+
+def cache_response(tags):
+    """
+    Cacheia as respostas 200 de uma view GET (sync/DRF ou async). `tags`
+    recebe a requisição e devolve as tags de que a resposta depende. Deve
+    ficar por dentro da autenticação, para `request.user` já estar pronto.
+    """
+
+    def decorator(view):
+        name = view.__name__
+
+        def finish(request, key, entry, response, started):
+            if entry is not None:
+                response, not_modified = _respond(request, entry, hit=True)
+                _stats.record(
+                    name,
+                    True,
+                    not_modified,
+                    entry['cost'] - (time.perf_counter() - started),
+                )
+                return response
+
+            entry = _store(key, response, time.perf_counter() - started)
+            if entry is None:
+                return response
+            response, not_modified = _respond(request, entry, hit=False)
+            _stats.record(name, False, not_modified)
+            return response
+
+        if asyncio.iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await view(request, *args, **kwargs)
+
+                started = time.perf_counter()
+                key, entry = await sync_to_async(
+                    _lookup, thread_sensitive=False
+                )(name, tags, request)
+                response = None
+                if entry is None:
+                    response = await view(request, *args, **kwargs)
+                return await sync_to_async(finish, thread_sensitive=False)(
+                    request, key, entry, response, started
+                )
+
+        else:
+
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method != 'GET':
+                    return view(request, *args, **kwargs)
+
+                started = time.perf_counter()
+                key, entry = _lookup(name, tags, request)
+                response = None
+                if entry is None:
+                    response = view(request, *args, **kwargs)
+                return finish(request, key, entry, response, started)
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from . import databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,12 +31,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'rest_framework.authtoken' 'user',
+    'rest_framework.authtoken',
+    'user',
     'post',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    'app.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,8 +50,8 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOWED_ORIGINS = [
-    "http://localhost:5173",  
-    "http://127.0.0.1:5173",
+    'http://localhost:5173',
+    'http://127.0.0.1:5173',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -58,6 +63,218 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.throttling.TokenBucketThrottle',
+    ],
+}
+
+# Cache em memória dos tokens do Firebase já verificados e dos usuários
+# carregados (TTL em segundos; tokens nunca passam do próprio `exp`).
+FIREBASE_AUTH_CACHE = {
+    'MAX_TOKENS': 1024,
+    'TOKEN_TTL': 300,
+    'MAX_USERS': 1024,
+    'USER_TTL': 60,
+}
+
+# Verificação local dos ID tokens do Firebase. As chaves públicas do Google
+# ficam em memória e em disco; em ambientes sem rede, use
+# 'user.keys.FileKeyProvider' com {'path': ...}.
+FIREBASE_PROJECT_ID = 'hackathon-8b0e1'
+
+FIREBASE_KEY_PROVIDER = {
+    'BACKEND': 'user.keys.RemoteKeyProvider',
+    'OPTIONS': {'cache_file': str(BASE_DIR / '.firebase_keys.json')},
+}
+
+# Pool que calcula os hashes de senha fora da thread da requisição.
+# EXECUTOR: 'thread' (o PBKDF2 do hashlib libera o GIL) ou 'process'.
+PASSWORD_HASHING_POOL = {
+    'WORKERS': 4,
+    'QUEUE_LIMIT': 64,
+    'EXECUTOR': 'thread',
+}
+
+# Máximo de posts aceitos por chamada em /api/posts/bulk/
+POST_BULK_MAX_ITEMS = 200
+
+# Distribuição dos posts novos para /api/posts/stream/ (SSE, só via ASGI).
+# O broker em memória atende um processo; troque o BACKEND por um que
+# implemente subscribe/unsubscribe/publish sobre um pub/sub compartilhado
+# ao rodar vários workers.
+POST_BROKER = {
+    'BACKEND': 'post.broker.InMemoryBroker',
+    'OPTIONS': {'queue_size': 100},
+}
+
+# Limites de requisições (app/throttling.py), em token bucket por nome da
+# URL: 'N/período' libera até N de uma vez e repõe um a cada período/N.
+# 'user' conta por usuário autenticado, 'ip' por cliente e 'endpoint' o
+# total da rota. Passando do limite, 429 com Retry-After. THROTTLE_STORE
+# escolhe onde ficam os buckets: 'memory' (padrão, por processo), 'sqlite'
+# (arquivo compartilhado entre os workers da máquina) ou 'redis'.
+THROTTLE_STORES = {
+    'memory': {
+        'BACKEND': 'app.throttling.MemoryStore',
+        'OPTIONS': {'max_keys': 100_000},
+    },
+    'sqlite': {
+        'BACKEND': 'app.throttling.SQLiteStore',
+        'OPTIONS': {
+            'path': os.environ.get(
+                'THROTTLE_DB', str(BASE_DIR / '.throttle.sqlite3')
+            ),
+        },
+    },
+    'redis': {
+        'BACKEND': 'app.throttling.RedisStore',
+        'OPTIONS': {
+            'url': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/2'),
+        },
+    },
+}
+
+THROTTLING = {
+    'STORE': THROTTLE_STORES[os.environ.get('THROTTLE_STORE', 'memory')],
+    # Proxies confiáveis na frente do Django (X-Forwarded-For)
+    'NUM_PROXIES': int(os.environ.get('THROTTLE_NUM_PROXIES', 0)),
+    'RATES': {
+        # Cada cadastro custa um hash de senha inteiro
+        'user-register': {'ip': '5/min', 'endpoint': '120/min'},
+        'user-update': {'ip': '20/min'},
+        # Protege o único escritor do SQLite
+        'create-post': {
+            'user': '30/min',
+            'ip': '120/min',
+            'endpoint': '3000/min',
+        },
+        'bulk-create-post': {'user': '10/min', 'ip': '40/min'},
+        'post-search': {'user': '60/min'},
+    },
+}
+
+# Timeline dos grupos de apoio (post/groups.py). Posts de grupos com até
+# FANOUT_MAX_MEMBERS membros são copiados para a timeline de cada membro
+# depois do commit, numa thread de fundo (WORKER), até BATCH_SIZE linhas por
+# transação; acima disso o grupo passa a ser lido direto de Post.
+# JOIN_BACKFILL: posts recentes copiados para quem acaba de entrar.
+GROUP_TIMELINE = {
+    'FANOUT_MAX_MEMBERS': 5000,
+    'BATCH_SIZE': 1000,
+    'JOIN_BACKFILL': 50,
+    'WORKER': True,
+}
+
+# Busca textual em /api/posts/search/ (post/search.py). Sem BACKEND, usa a
+# do banco configurado: FTS5 no SQLite, tsvector com GIN no PostgreSQL.
+# Posts gravados fora do ORM entram com `manage.py rebuild_post_search`.
+POST_SEARCH = {
+    'OPTIONS': {'max_terms': 8, 'candidates': 2000},
+}
+
+# Detecção de frases de risco nos posts novos (post/risk.py). PHRASES_FILE
+# tem uma frase por linha com o seu peso; MOOD_WEIGHTS soma pontos pelo
+# humor do post; com ao menos uma frase e THRESHOLD pontos, o post gera um
+# RiskAlert para os psicólogos do autor. Depois de mudar qualquer um deles,
+# rode `manage.py rescan_risk_alerts`.
+RISK_DETECTION = {
+    'PHRASES_FILE': BASE_DIR / 'post' / 'risk_phrases.txt',
+    'MOOD_WEIGHTS': {'deprimido': 2, 'assustado': 1, 'triste': 1},
+    'THRESHOLD': 5,
+}
+
+# Exclusão de contas (user/deletion.py): o usuário fica inativo na hora e
+# uma thread do processo apaga os posts em lotes de CHUNK_SIZE, com PAUSE
+# segundos entre eles para não segurar o banco. SESSION_POLICY decide o que
+# acontece com as sessões: 'detach', 'cancel_future' ou 'delete'. Com
+# WORKER False, as exclusões só rodam por `manage.py process_account_deletions`.
+ACCOUNT_DELETION = {
+    'CHUNK_SIZE': 200,
+    'PAUSE': 0.05,
+    'SESSION_POLICY': os.environ.get(
+        'ACCOUNT_DELETION_SESSION_POLICY', 'cancel_future'
+    ),
+    'WORKER': True,
+}
+
+# Cache das respostas de leitura (app/response_cache.py), invalidado pelos
+# signals de Post, CustomUser e Session. RESPONSE_CACHE_BACKEND escolhe o
+# armazenamento: 'locmem' (padrão, por processo), 'file' (compartilhado
+# entre workers na mesma máquina) ou 'redis' (REDIS_URL).
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'RESPONSE_CACHE_DIR', str(BASE_DIR / '.response_cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': RESPONSE_CACHE_BACKENDS[
+        os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')
+    ],
+}
+
+RESPONSE_CACHE = {
+    'ALIAS': 'responses',
+    'TIMEOUT': 300,
+}
+
+# Horários livres por psicólogo e dia (user/availability.py), invalidados
+# após o commit pelos signals de Session e WorkingHours. Fica no cache
+# 'responses' porque, com mais de um worker, precisa ser compartilhado
+# (RESPONSE_CACHE_BACKEND 'file' ou 'redis'); o TIMEOUT curto limita o que
+# sobra de uma leitura concorrente a uma reserva.
+AVAILABILITY_CACHE = {
+    'ALIAS': 'responses',
+    'TIMEOUT': 300,
+}
+
+# Perfil de queries por requisição (app/profiling.py): uma amostra das
+# requisições recebe Server-Timing e uma linha JSON no log 'app.profiling'.
+# ASSERT_BUDGETS (para testes) perfila todas e falha quando a rota passa do
+# orçamento de queries em BUDGETS, indexado pelo nome da URL.
+QUERY_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('QUERY_PROFILING_SAMPLE_RATE', 0.05)),
+    'SERVER_TIMING': True,
+    'LOG': True,
+    'ASSERT_BUDGETS': False,
+    # Pior caso: primeiro acesso do usuário (get_or_create na autenticação)
+    # e primeiro post do dia (cria as linhas de PostRollup), com alerta de
+    # risco.
+    'BUDGETS': {
+        'user-register': 4,
+        'user-update': 6,
+        'user-delete': 8,
+        'user-delete-status': 3,
+        'user-profile': 4,
+        'post-feed': 6,
+        'post-search': 5,
+        'groups': 4,
+        'group-membership': 10,
+        'group-timeline': 6,
+        'risk-alerts': 4,
+        'risk-alert-review': 5,
+        'create-post': 19,
+        'bulk-create-post': 19,
+        'post-analytics': 5,
+        'sessions': 8,
+        'availability': 8,
+    },
 }
 
 ROOT_URLCONF = 'app.urls'
@@ -83,11 +300,12 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DB_PROFILE: 'sqlite' (WAL + pragmas, padrão), 'sqlite-basic' ou
+# 'postgres' (variáveis POSTGRES_*); ver app/databases.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': databases.profile(
+        os.environ.get('DB_PROFILE', 'sqlite'), BASE_DIR / 'db.sqlite3'
+    ),
 }
 
 # Password validation
@@ -132,9 +350,3 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'user.CustomUser'
-
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
-}
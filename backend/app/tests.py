@@ -0,0 +1,221 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from user.tests import APITestCase
+
+from . import response_cache, throttling
+from .workers import BackgroundWorker
+
+
+class RecordingWorker(BackgroundWorker):
+    name = 'teste'
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def handle(self, value):
+        if value is None:
+            raise ValueError('trabalho inválido')
+        self.seen.append(value)
+
+
+class BackgroundWorkerTests(SimpleTestCase):
+    def test_runs_jobs_in_order_and_survives_failures(self):
+        worker = RecordingWorker()
+        with self.assertLogs('app.workers', 'ERROR'):
+            for value in (1, None, 2, 3):
+                worker.submit(value)
+            worker._queue.join()
+
+        self.assertEqual(worker.seen, [1, 2, 3])
+        self.assertEqual(
+            worker.stats(), {'queued': 0, 'completed': 3, 'failed': 1}
+        )
+
+
+class ThrottleStoreTests(SimpleTestCase):
+    def buckets(self, *rates):
+        return [
+            (f'rota:{index}', period / amount, period)
+            for index, (amount, period) in enumerate(rates)
+        ]
+
+    def assertAllOrNothing(self, store):
+        both = self.buckets((2, 60), (1, 60))
+        self.assertEqual(store.consume(both, 1000.0), 0)
+        # O segundo bucket está vazio: o primeiro não perde o token
+        self.assertAlmostEqual(store.consume(both, 1000.0), 60)
+        self.assertEqual(store.consume(both[:1], 1000.0), 0)
+        self.assertAlmostEqual(store.consume(both[:1], 1000.0), 30)
+        # Repõe um token a cada intervalo
+        self.assertEqual(store.consume(both, 1060.0), 0)
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('30/min'), (30, 60))
+        self.assertEqual(throttling.parse_rate('5/s'), (5, 1))
+
+    def test_memory_store_is_all_or_nothing(self):
+        self.assertAllOrNothing(throttling.MemoryStore())
+
+    def test_memory_store_evicts_least_recently_used(self):
+        store = throttling.MemoryStore(max_keys=1)
+        [bucket] = self.buckets((1, 60))
+        self.assertEqual(store.consume([bucket], 1000.0), 0)
+        store.consume([('outra', 60, 60)], 1000.0)
+        self.assertEqual(store.consume([bucket], 1000.0), 0)
+
+    def test_sqlite_store_is_all_or_nothing(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = throttling.SQLiteStore(
+            os.path.join(directory.name, 'throttle.sqlite3')
+        )
+        self.assertAllOrNothing(store)
+
+
+class ThrottleResponseTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        patcher = mock.patch.object(
+            throttling, '_store', throttling.MemoryStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def throttled(self, rates):
+        return override_settings(
+            THROTTLING={**settings.THROTTLING, 'RATES': rates}
+        )
+
+    def assertThrottled(self, response, period):
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, period + 1))
+
+    def test_async_view_returns_retry_after(self):
+        data = {
+            'mood': 'triste',
+            'feeling': 'medo',
+            'motive': 'sono',
+            'text': 'Não consigo dormir.',
+        }
+
+        def create():
+            return self.client.post(
+                reverse('create-post'),
+                data,
+                content_type='application/json',
+                **self.auth(self.ana),
+            )
+
+        with self.throttled({'create-post': {'user': '2/min'}}):
+            self.assertEqual(create().status_code, 201)
+            self.assertEqual(create().status_code, 201)
+            self.assertThrottled(create(), 30)
+
+    def search(self, user):
+        return self.client.get(
+            reverse('post-search'), {'q': 'dormir'}, **self.auth(user)
+        )
+
+    def test_drf_view_returns_retry_after(self):
+        with self.throttled({'post-search': {'user': '1/min'}}):
+            self.assertEqual(self.search(self.ana).status_code, 200)
+            self.assertThrottled(self.search(self.ana), 60)
+
+    def test_limits_are_per_user(self):
+        bia = self.create_user('bia')
+        with self.throttled({'post-search': {'user': '1/min'}}):
+            self.assertEqual(self.search(self.ana).status_code, 200)
+            self.assertEqual(self.search(bia).status_code, 200)
+
+    def test_rejected_request_keeps_other_buckets(self):
+        bia = self.create_user('bia')
+        rates = {'post-search': {'user': '1/min', 'endpoint': '2/min'}}
+        with self.throttled(rates):
+            self.assertEqual(self.search(self.ana).status_code, 200)
+            # O bucket da ana recusa: o da rota não gasta o segundo token
+            self.assertEqual(self.search(self.ana).status_code, 429)
+            self.assertEqual(self.search(bia).status_code, 200)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana', first_name='Ana')
+        self.bia = self.create_user('bia')
+
+    def profile(self, user=None, etag=None):
+        headers = self.auth(user or self.ana)
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(reverse('user-profile'), **headers)
+
+    def assertNotModified(self, response, etag):
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_round_trip(self):
+        first = self.profile()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+        second = self.profile()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertNotModified(self.profile(etag=first['ETag']), first['ETag'])
+        self.assertEqual(self.profile(etag='"outra"').status_code, 200)
+
+    def test_change_invalidates_after_commit(self):
+        etag = self.profile()['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ana.first_name = 'Ana Maria'
+            self.ana.save()
+            # Antes do commit a resposta antiga ainda vale
+            self.assertNotModified(self.profile(etag=etag), etag)
+        for callback in callbacks:
+            callback()
+
+        response = self.profile(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['name'], 'Ana Maria')
+
+    def test_tags_are_per_user(self):
+        etag = self.profile()['ETag']
+        self.profile(self.bia)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bia.first_name = 'Bia'
+            self.bia.save()
+        self.assertNotModified(self.profile(etag=etag), etag)
+        self.assertEqual(self.profile(self.bia)['X-Cache'], 'MISS')
+
+    def test_invalidate_bumps_only_the_given_tags(self):
+        self.profile()
+        feed = self.client.get(reverse('post-feed'), **self.auth(self.ana))
+        self.assertEqual(feed['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.invalidate(response_cache.posts_tag())
+        feed = self.client.get(reverse('post-feed'), **self.auth(self.ana))
+        self.assertEqual(feed['X-Cache'], 'MISS')
+        self.assertEqual(self.profile()['X-Cache'], 'HIT')
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            response = self.client.get(
+                reverse('post-feed'), {'limit': 0}, **self.auth(self.ana)
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertNotIn('X-Cache', response)
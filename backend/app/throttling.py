@@ -0,0 +1,301 @@
+import functools
+import math
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.throttling import BaseThrottle
+
+# Token bucket por rota (nome da URL) e por usuário, IP ou rota inteira,
+# configurado em settings.THROTTLING. Cada bucket guarda um único número, o
+# "theoretical arrival time" do GCRA: o instante em que o bucket voltaria a
+# ficar cheio. Uma requisição consome um token se, somando o intervalo de
+# reposição, esse instante não passar de `period` à frente de agora.
+
+PERIODS = {'s': 1, 'sec': 1, 'min': 60, 'h': 3600, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60): até 30 de uma vez, repondo 1 a cada 2s."""
+    amount, period = rate.split('/')
+    return int(amount), PERIODS[period]
+
+
+def gcra(tat, now, interval, period):
+    """Devolve (novo tat, 0) se passou, ou (None, segundos de espera)."""
+    new_tat = max(tat or now, now) + interval
+    if new_tat - now > period:
+        return None, new_tat - now - period
+    return new_tat, 0
+
+
+class MemoryStore:
+    """Buckets no processo, em LRU limitado a `max_keys` chaves."""
+
+    blocking = False
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, buckets, now):
+        """
+        Consome um token de cada (chave, intervalo, período) de `buckets`,
+        ou de nenhum: devolve a maior espera se algum estiver vazio.
+        """
+        with self._lock:
+            passed, waits = [], []
+            for key, interval, period in buckets:
+                new_tat, wait = gcra(
+                    self._buckets.get(key), now, interval, period
+                )
+                passed.append((key, new_tat))
+                waits.append(wait)
+            if any(waits):
+                return max(waits)
+
+            for key, new_tat in passed:
+                self._buckets[key] = new_tat
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                # O menos usado quase sempre já está cheio de novo
+                self._buckets.popitem(last=False)
+            return 0
+
+
+class SQLiteStore:
+    """
+    Buckets num arquivo SQLite à parte, compartilhado pelos workers da
+    mesma máquina. Cada consumo é uma transação IMMEDIATE: lê todos os
+    buckets da rota e grava só se todos tiverem token.
+    """
+
+    blocking = True
+
+    def __init__(self, path, cleanup_every=1000):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID'
+            )
+            self._local.connection = connection
+        return connection
+
+    def consume(self, buckets, now):
+        connection = self._connection()
+        keys = [key for key, _, _ in buckets]
+        # IMMEDIATE: ler e gravar os buckets sem outro worker no meio
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            tats = dict(
+                connection.execute(
+                    'SELECT key, tat FROM buckets WHERE key IN '
+                    f'({", ".join("?" * len(keys))})',
+                    keys,
+                )
+            )
+            passed, waits = [], []
+            for key, interval, period in buckets:
+                new_tat, wait = gcra(tats.get(key), now, interval, period)
+                passed.append((key, new_tat))
+                waits.append(wait)
+
+            if not any(waits):
+                connection.executemany(
+                    'INSERT INTO buckets (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET tat = excluded.tat',
+                    passed,
+                )
+            if random.randrange(self.cleanup_every) == 0:
+                # tat no passado = bucket cheio, igual a não ter a linha
+                connection.execute('DELETE FROM buckets WHERE tat < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return max(waits)
+
+
+class RedisStore:
+    """Buckets no Redis, compartilhados entre máquinas (pacote redis)."""
+
+    blocking = True
+
+    # ARGV: agora, depois intervalo e período de cada chave. Confere todas
+    # antes de gravar qualquer uma.
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local tats = {}
+    local wait = 0
+    for i, key in ipairs(KEYS) do
+        local interval = tonumber(ARGV[2 * i])
+        local period = tonumber(ARGV[2 * i + 1])
+        local tat = math.max(tonumber(redis.call('GET', key) or now), now)
+        tats[i] = tat + interval
+        if tats[i] - now > period then
+            wait = math.max(wait, tats[i] - now - period)
+        end
+    end
+    if wait > 0 then
+        return tostring(wait)
+    end
+    for i, key in ipairs(KEYS) do
+        redis.call('SET', key, tats[i], 'PX', math.ceil((tats[i] - now) * 1000))
+    end
+    return '0'
+    """
+
+    def __init__(self, url, prefix='throttle:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImproperlyConfigured(
+                'RedisStore precisa do pacote redis instalado.'
+            ) from e
+        self.prefix = prefix
+        self._script = redis.Redis.from_url(url).register_script(self.SCRIPT)
+
+    def consume(self, buckets, now):
+        args = [now]
+        for _, interval, period in buckets:
+            args += [interval, period]
+        return float(
+            self._script(
+                keys=[self.prefix + key for key, _, _ in buckets], args=args
+            )
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+_throttled = defaultdict(int)
+
+
+def _config():
+    return getattr(settings, 'THROTTLING', {})
+
+
+def get_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = _config().get('STORE', {})
+                backend = import_string(
+                    config.get('BACKEND', 'app.throttling.MemoryStore')
+                )
+                _store = backend(**config.get('OPTIONS', {}))
+    return _store
+
+
+def client_ip(request):
+    # Atrás de N proxies confiáveis, o IP real é o N-ésimo a partir do fim
+    proxies = _config().get('NUM_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identities(request, limits):
+    user = getattr(request, 'user', None)
+    for kind, rate in limits.items():
+        if kind == 'user':
+            if user is None or not user.is_authenticated:
+                continue
+            ident = user.id
+        elif kind == 'ip':
+            ident = client_ip(request)
+        elif kind == 'endpoint':
+            ident = '*'
+        else:
+            raise ImproperlyConfigured(f'Limite desconhecido: {kind}')
+        yield kind, ident, parse_rate(rate)
+
+
+def check(request, scope=None):
+    """
+    Consome um token de cada bucket da rota, se todos tiverem, e devolve
+    quantos segundos o cliente deve esperar (0 se a requisição pode seguir).
+    """
+    scope = scope or getattr(request.resolver_match, 'url_name', None)
+    limits = _config().get('RATES', {}).get(scope)
+    if not limits:
+        return 0
+
+    buckets = [
+        (f'{scope}:{kind}:{ident}', period / amount, period)
+        for kind, ident, (amount, period) in _identities(request, limits)
+    ]
+    if not buckets:
+        return 0
+    # Tudo ou nada: um bucket vazio não deixa os outros perderem o token
+    wait = get_store().consume(buckets, time.time())
+    if wait:
+        _throttled[scope] += 1
+    return wait
+
+
+def stats():
+    return {'store': type(get_store()).__name__, 'throttled': dict(_throttled)}
+
+
+def _too_many(wait):
+    response = JsonResponse(
+        {'detail': 'Muitas requisições. Tente novamente mais tarde.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def throttle(view):
+    """
+    Limite das views assíncronas (fora do DRF). Vai abaixo do
+    @async_login_required, para os limites por usuário verem o request.user.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if get_store().blocking:
+            wait = await sync_to_async(check)(request)
+        else:
+            wait = check(request)
+        if wait:
+            return _too_many(wait)
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Os mesmos limites nas views do DRF; o DRF responde 429 e Retry-After."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = check(request)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from app.metrics import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('user.urls')),
-    path('api/posts/', include('posts.urls')),
+    path('api/posts/', include('post.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,61 @@
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Thread única, iniciada no primeiro submit, que executa os trabalhos na
+    ordem em que chegam. As subclasses implementam handle(); uma falha é
+    registrada no log e não para a fila.
+    """
+
+    name = 'background'
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.current = None
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, *job):
+        self._queue.put(job)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name=self.name, daemon=True
+                )
+                self._thread.start()
+
+    def handle(self, *job):
+        raise NotImplementedError
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            # Conexões próprias da thread, fechadas entre um trabalho e outro
+            close_old_connections()
+            self.current = job
+            try:
+                self.handle(*job)
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception('Falha em %s: %r', self.name, job[:2])
+            finally:
+                self.current = None
+                close_old_connections()
+                self._queue.task_done()
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'completed': self.completed,
+            'failed': self.failed,
+        }
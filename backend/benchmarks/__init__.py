@@ -0,0 +1,12 @@
+"""
+Benchmarks do backend. Rodam contra um banco SQLite temporário, nunca
+contra o db.sqlite3 do projeto:
+
+    python -m benchmarks.export_memory
+
+A suíte completa (dados sintéticos, micro-benchmarks e carga HTTP) grava
+um JSON comparável entre commits:
+
+    python -m benchmarks.run --scale 100000 --output depois.json
+    python -m benchmarks.compare antes.json depois.json
+"""
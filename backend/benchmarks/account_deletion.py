@@ -0,0 +1,126 @@
+"""
+Exclusão de uma conta com muitos posts (user/deletion.py) enquanto outro
+usuário continua postando: mede o tempo total, a latência das escritas
+concorrentes (comparadas às de antes da exclusão) e quanto o pico de
+memória do processo cresce. Com --inline, mede o
+user.delete() direto, como era antes, para comparar.
+
+    python -m benchmarks.account_deletion [--posts 100000] [--inline]
+        [--db caminho.sqlite3]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from . import utils
+from .asgi_vs_wsgi import percentile
+
+
+def seed(posts):
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from post.models import Feeling, Mood, Motive
+    from user.models import CustomUser
+
+    user = CustomUser.objects.create(username='leaving', email='l@x.y')
+    writer = CustomUser.objects.create(username='staying', email='s@x.y')
+    now = timezone.now().isoformat()
+    row = (user.id, Mood.TRISTE, Feeling.MEDO, Motive.CANSACO, 'texto', now)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO post_post '
+            '(user_id, mood, feeling, motive, text, create_in) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            (row for _ in range(posts)),
+        )
+    return user, writer
+
+
+def write_loop(writer, stop, latencies):
+    from django.db import connection
+
+    from post.models import Feeling, Mood, Motive, Post
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        Post.objects.create(
+            user=writer,
+            mood=Mood.NEUTRO,
+            feeling=Feeling.NEUTRO,
+            motive=Motive.SONO,
+            text='Ainda por aqui.',
+        )
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+    connection.close()
+
+
+def summarize(latencies):
+    return {
+        'writes': len(latencies),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def run(posts, inline=False):
+    """Gera os posts no banco já configurado e exclui o dono deles."""
+    from post.models import Post
+    from user.deletion import request_deletion, run as run_deletion
+
+    user, writer = seed(posts)
+
+    stop = threading.Event()
+    latencies = []
+    thread = threading.Thread(
+        target=write_loop, args=(writer, stop, latencies)
+    )
+    thread.start()
+    time.sleep(2)
+    baseline = len(latencies)
+
+    rss_before = utils.peak_rss_kb()
+    started = time.perf_counter()
+    if inline:
+        user.delete()
+    else:
+        run_deletion(request_deletion(user))
+    elapsed = time.perf_counter() - started
+    during = len(latencies)
+
+    stop.set()
+    thread.join()
+
+    return {
+        'mode': 'inline' if inline else 'chunked',
+        'posts': posts,
+        'remaining_posts': Post.objects.filter(user_id=user.id).count(),
+        'seconds': {'delete': round(elapsed, 3)},
+        'posts_per_second': round(posts / elapsed, 1),
+        'peak_rss_growth_mb': round(
+            (utils.peak_rss_kb() - rss_before) / 1024, 1
+        ),
+        'writes_before': summarize(latencies[:baseline]),
+        'writes_during': summarize(latencies[baseline:during]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--inline', action='store_true')
+    parser.add_argument('--db')
+    args = parser.parse_args()
+
+    utils.setup(args.db, fresh=True)
+    result = run(args.posts, args.inline)
+    print(json.dumps({'account_deletion': result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Compara vazão e latência (p50/p99) das views async de feed, criação de
+post e perfil servidas por app.asgi contra as mesmas rotas via app.wsgi.
+Os dois handlers são chamados em processo, sem servidor HTTP, para medir
+só o caminho do Django: WSGI com um pool de threads do tamanho da
+concorrência, ASGI com corrotinas num único event loop.
+
+    python -m benchmarks.asgi_vs_wsgi [--concurrency 64] [--requests 2000]
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import utils
+
+POST_BODY = json.dumps(
+    {'mood': 'neutro', 'feeling': 'neutro', 'motive': 'sono', 'text': 'ok'}
+).encode()
+
+ENDPOINTS = {
+    'feed': ('GET', '/api/posts/', b'limit=20', b''),
+    'create_post': ('POST', '/api/posts/create/', b'', POST_BODY),
+    'profile': ('GET', '/api/profile/', b'', b''),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(latencies, elapsed, statuses):
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'errors': sum(1 for code in statuses if code >= 400),
+    }
+
+
+def run_wsgi(application, endpoint, token, concurrency, total):
+    method, path, query, body = endpoint
+
+    def call(_):
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query.decode(),
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'testserver',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': io.StringIO(),
+        }
+        status = []
+        started = time.perf_counter()
+        result = application(
+            environ, lambda code, headers: status.append(int(code[:3]))
+        )
+        b''.join(result)
+        result.close()
+        return time.perf_counter() - started, status[0]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        [latency for latency, _ in results],
+        elapsed,
+        [code for _, code in results],
+    )
+
+
+async def run_asgi(application, endpoint, token, concurrency, total):
+    method, path, query, body = endpoint
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'root_path': '',
+            'query_string': query,
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Bearer {token}'.encode()),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body}]
+        disconnected = asyncio.Event()
+        status = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        async with semaphore:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            disconnected.set()
+            return time.perf_counter() - started, status[0]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        [latency for latency, _ in results],
+        elapsed,
+        [code for _, code in results],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    utils.setup(fresh=True)
+
+    from app.asgi import application as asgi_application
+    from app.wsgi import application as wsgi_application
+    from post.models import Feeling, Mood, Motive, Post
+    from user.keys import get_key_provider
+    from user.models import CustomUser
+
+    user = CustomUser.objects.create(username='bench-uid', email='b@x.y')
+    Post.objects.bulk_create(
+        Post(
+            user=user,
+            mood=Mood.NEUTRO,
+            feeling=Feeling.NEUTRO,
+            motive=Motive.SONO,
+        )
+        for _ in range(args.posts)
+    )
+    token = get_key_provider().issue_token('bench-uid')
+
+    results = {}
+    for name, endpoint in ENDPOINTS.items():
+        results[name] = {
+            'wsgi': run_wsgi(
+                wsgi_application,
+                endpoint,
+                token,
+                args.concurrency,
+                args.requests,
+            ),
+            'asgi': asyncio.run(
+                run_asgi(
+                    asgi_application,
+                    endpoint,
+                    token,
+                    args.concurrency,
+                    args.requests,
+                )
+            ),
+        }
+
+    print(
+        json.dumps(
+            {
+                'asgi_vs_wsgi': {
+                    'concurrency': args.concurrency,
+                    'requests': args.requests,
+                    'endpoints': results,
+                }
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
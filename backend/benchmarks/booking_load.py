@@ -0,0 +1,94 @@
+"""
+Dispara agendamentos em paralelo contra um único psicólogo e confere que
+nenhuma sessão gravada se sobrepõe a outra.
+
+    python -m benchmarks.booking_load [--threads 16] [--requests 400]
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from . import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--patients', type=int, default=50)
+    args = parser.parse_args()
+
+    utils.setup(fresh=True)
+
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    from user.models import CustomUser, Session
+
+    psychologist = CustomUser.objects.create(
+        username='psi', email='psi@x.y', type='psychologist'
+    )
+    patients = CustomUser.objects.bulk_create(
+        CustomUser(username=f'p{i}', email=f'p{i}@x.y', type='user')
+        for i in range(args.patients)
+    )
+    day = date.today() + timedelta(days=1)
+
+    def book(_):
+        client = APIClient()
+        client.force_authenticate(random.choice(patients))
+        # Sessões de 50 min começando em múltiplos de 10 min, das 8h às 18h
+        start = 8 * 60 + random.randrange(0, 10 * 60, 10)
+        response = client.post(
+            '/api/sessions/',
+            {
+                'date': day.isoformat(),
+                'start_time': f'{start // 60:02d}:{start % 60:02d}',
+                'end_time': f'{(start + 50) // 60:02d}:{(start + 50) % 60:02d}',
+                'psychologist': psychologist.id,
+            },
+            format='json',
+        )
+        connection.close()
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        statuses = Counter(pool.map(book, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    sessions = list(
+        Session.objects.filter(psychologist=psychologist, date=day)
+        .order_by('start_time')
+        .values_list('start_time', 'end_time')
+    )
+    overlaps = sum(
+        1
+        for (_, previous_end), (start, _) in zip(sessions, sessions[1:])
+        if start < previous_end
+    )
+
+    print(
+        json.dumps(
+            {
+                'booking_load': {
+                    'threads': args.threads,
+                    'requests': args.requests,
+                    'seconds': round(elapsed, 3),
+                    'requests_per_second': round(args.requests / elapsed, 1),
+                    'statuses': dict(statuses),
+                    'booked': len(sessions),
+                    'overlaps': overlaps,
+                }
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compara dois resultados de `benchmarks.run` e aponta as métricas que
+pioraram mais que o limite. Sai com código 1 se houver regressão.
+
+    python -m benchmarks.compare antes.json depois.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+
+def direction(path):
+    """+1 se maior é melhor, -1 se menor é melhor, None para ignorar."""
+    name = path[-1]
+    if name.endswith('per_second'):
+        return 1
+    if (
+        name.endswith('_ms')
+        or name == 'us_per_op'
+        or name == 'errors'
+        or 'seconds' in path[:-1]
+    ):
+        return -1
+    return None
+
+
+def flatten(data, path=()):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key != 'meta':
+                yield from flatten(value, (*path, key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield path, data
+
+
+def compare(before, after, threshold):
+    previous = dict(flatten(before))
+    rows = []
+    for path, value in flatten(after):
+        sign = direction(path)
+        old = previous.get(path)
+        if sign is None or old is None:
+            continue
+        if old == 0:
+            change = 0.0 if value == 0 else float('inf')
+        else:
+            change = (value - old) / abs(old)
+        rows.append(
+            {
+                'metric': '.'.join(path),
+                'before': old,
+                'after': value,
+                'change': round(change, 4),
+                'regression': change * sign < -threshold,
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.before) as fp:
+        before = json.load(fp)
+    with open(args.after) as fp:
+        after = json.load(fp)
+
+    rows = compare(before, after, args.threshold)
+    regressions = [row for row in rows if row['regression']]
+    print(
+        json.dumps(
+            {
+                'before': before.get('meta', {}).get('commit'),
+                'after': after.get('meta', {}).get('commit'),
+                'threshold': args.threshold,
+                'metrics': rows,
+                'regressions': [row['metric'] for row in regressions],
+            },
+            indent=2,
+        )
+    )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
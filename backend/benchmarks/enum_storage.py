@@ -0,0 +1,163 @@
+"""
+Mede o efeito de gravar humor, sentimento e motivo como inteiro pequeno
+(migration post 0005) em vez de texto: tamanho da tabela e dos índices e
+tempo das agregações. Gera os posts, volta o schema para a 0004 (texto),
+mede, aplica a 0005 de novo e mede outra vez, conferindo que nenhum valor
+mudou no caminho.
+
+    python -m benchmarks.enum_storage [--posts 100000] [--db caminho.sqlite3]
+        [--repeat 5]
+"""
+import argparse
+import json
+import random
+import time
+
+from . import utils
+
+FIELDS = ('mood', 'feeling', 'motive')
+QUERIES = {
+    'group_by_mood': 'SELECT mood, COUNT(*) FROM post_post GROUP BY mood',
+    'group_by_user_mood': (
+        'SELECT user_id, mood, COUNT(*) FROM post_post GROUP BY user_id, mood'
+    ),
+    'group_by_all': (
+        'SELECT mood, feeling, motive, COUNT(*) FROM post_post '
+        'GROUP BY mood, feeling, motive'
+    ),
+    # Página do feed filtrado, pelo índice (mood, -create_in, -id)
+    'mood_feed': (
+        'SELECT id FROM post_post WHERE mood = %s '
+        'ORDER BY create_in DESC, id DESC LIMIT 20'
+    ),
+}
+
+
+def storage():
+    """Bytes da tabela de posts e de cada um dos seus índices."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('VACUUM FULL ANALYZE post_post')
+            cursor.execute("SELECT pg_relation_size('post_post')")
+            table = cursor.fetchone()[0]
+            cursor.execute(
+                'SELECT indexrelid::regclass::text, '
+                'pg_relation_size(indexrelid) FROM pg_index '
+                "WHERE indrelid = 'post_post'::regclass"
+            )
+            indexes = dict(cursor.fetchall())
+        else:
+            # dbstat conta as páginas de cada b-tree; VACUUM tira as sobras
+            # das tabelas recriadas pela migration
+            cursor.execute('VACUUM')
+            cursor.execute('ANALYZE')
+            cursor.execute(
+                'SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ('
+                "SELECT name FROM sqlite_master WHERE tbl_name = 'post_post'"
+                ') GROUP BY name'
+            )
+            indexes = dict(cursor.fetchall())
+            table = indexes.pop('post_post')
+
+    return {
+        'table_bytes': table,
+        'index_bytes': sum(indexes.values()),
+        'indexes': indexes,
+    }
+
+
+def timings(feed_value, repeat):
+    """Melhor tempo de cada consulta, em ms."""
+    from django.db import connection
+
+    results = {}
+    with connection.cursor() as cursor:
+        for name, sql in QUERIES.items():
+            params = [feed_value] if '%s' in sql else []
+            best = float('inf')
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                best = min(best, time.perf_counter() - started)
+            results[f'{name}_ms'] = round(best * 1000, 3)
+    return results
+
+
+def checksum(codes):
+    """Contagem e soma dos ids por combinação, sempre em códigos."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT mood, feeling, motive, COUNT(*), SUM(id) FROM post_post '
+            'GROUP BY mood, feeling, motive'
+        )
+        return {
+            tuple(
+                codes[field][value] if codes else value
+                for field, value in zip(FIELDS, row[:3])
+            ): row[3:]
+            for row in cursor.fetchall()
+        }
+
+
+def migrate(target):
+    from django.core.management import call_command
+
+    started = time.perf_counter()
+    call_command('migrate', 'post', target, verbosity=0)
+    return round(time.perf_counter() - started, 3)
+
+
+def run(posts, repeat=5, seed=42):
+    """Gera os posts no banco já configurado e mede os dois schemas."""
+    from post.models import CHOICE_NAMES, CHOICE_VALUES, Mood
+
+    from .generators import generate_posts, generate_users
+
+    rng = random.Random(seed)
+    patients, _ = generate_users(max(posts // 10, 1), rng)
+    generate_posts(posts, patients, rng)
+    expected = checksum(None)
+
+    seconds = {'to_text': migrate('0004')}
+    before = {
+        **storage(),
+        **timings(CHOICE_NAMES['mood'][Mood.ANSIOSO], repeat),
+    }
+    text_checksum = checksum(CHOICE_VALUES)
+
+    seconds['to_smallint'] = migrate('0005')
+    after = {**storage(), **timings(Mood.ANSIOSO, repeat)}
+
+    return {
+        'posts': posts,
+        'lossless': text_checksum == expected == checksum(None),
+        'seconds': seconds,
+        'text': before,
+        'smallint': after,
+        'reduction': {
+            key: round(1 - after[key] / before[key], 4)
+            for key in ('table_bytes', 'index_bytes')
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db')
+    args = parser.parse_args()
+
+    utils.setup(args.db, fresh=True)
+    result = run(args.posts, args.repeat, args.seed)
+    print(json.dumps({'enum_storage': result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Mede o pico de memória do export de posts em 10k, 100k e 1M linhas. Cada
+medição roda num processo novo para que o ru_maxrss não herde o pico do
+anterior (nem o da geração dos dados). Mede o caminho do WSGI (iterador
+síncrono) e o do ASGI (`async for` na resposta, como o ASGIHandler);
+'asgi-sync' mostra o iterador síncrono servido pelo ASGI.
+
+    python -m benchmarks.export_memory [--sizes 10000 100000 1000000]
+        [--servers wsgi asgi asgi-sync]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import utils
+
+
+def seed(db_path, size):
+    utils.setup(db_path, fresh=True)
+
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from post.models import Feeling, Mood, Motive
+    from user.models import CustomUser
+
+    user = CustomUser.objects.create(username='bench', email='bench@x.y')
+    now = timezone.now().isoformat()
+    text = 'Hoje foi um dia difícil, mas consegui descansar um pouco. ' * 4
+    row = (user.id, Mood.TRISTE, Feeling.MEDO, Motive.CANSACO, text, now)
+    rows = (row for _ in range(size))
+
+    # INSERT direto: aqui só interessa ter as linhas, não o caminho do ORM
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO post_post '
+            '(user_id, mood, feeling, motive, text, create_in) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+    print(user.id)
+
+
+def consume_asgi(content):
+    """Lê a resposta como o ASGIHandler: `async for` no StreamingHttpResponse."""
+    import asyncio
+
+    from django.http import StreamingHttpResponse
+
+    async def drain():
+        chunks = 0
+        with open(os.devnull, 'wb') as devnull:
+            async for chunk in StreamingHttpResponse(content):
+                devnull.write(chunk)
+                chunks += 1
+        return chunks
+
+    return asyncio.run(drain())
+
+
+def measure(db_path, user_id, fmt, server):
+    utils.setup(db_path)
+
+    from post.exports import astream_export, stream_export
+
+    baseline = utils.peak_rss_kb()
+    # O RSS inclui o cache de páginas e o mmap do SQLite (app/databases.py);
+    # o pico do heap do Python mostra só o que o export acumula
+    tracemalloc.start()
+    started = time.perf_counter()
+    lines = 0
+    if server == 'wsgi':
+        with open(os.devnull, 'w') as devnull:
+            for line in stream_export(user_id, fmt):
+                devnull.write(line)
+                lines += 1
+    elif server == 'asgi':
+        lines = consume_asgi(astream_export(user_id, fmt))
+    else:
+        # 'asgi-sync': o iterador síncrono sob ASGI, como era antes
+        lines = consume_asgi(stream_export(user_id, fmt))
+    elapsed = time.perf_counter() - started
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        json.dumps(
+            {
+                'server': server,
+                # No ASGI, blocos de linhas
+                'chunks': lines,
+                'seconds': round(elapsed, 3),
+                'baseline_rss_kb': baseline,
+                'peak_rss_kb': utils.peak_rss_kb(),
+                'peak_alloc_kb': peak_alloc // 1024,
+            }
+        )
+    )
+
+
+def run_child(*args):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.export_memory', *map(str, args)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return output.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson'])
+    parser.add_argument('--seed', nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument(
+        '--servers',
+        nargs='+',
+        default=['wsgi', 'asgi'],
+        choices=['wsgi', 'asgi', 'asgi-sync'],
+    )
+    parser.add_argument('--measure', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        return seed(args.seed[0], int(args.seed[1]))
+    if args.measure:
+        return measure(*args.measure)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'export.sqlite3')
+        for size in args.sizes:
+            user_id = run_child('--seed', db_path, size)
+            for server in args.servers:
+                result = json.loads(
+                    run_child(
+                        '--measure', db_path, user_id, args.format, server
+                    )
+                )
+                result['size'] = size
+                result['delta_rss_kb'] = (
+                    result['peak_rss_kb'] - result['baseline_rss_kb']
+                )
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+
+    print(json.dumps({'export_memory': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Gera usuários, posts e sessões sintéticos (e determinísticos, via --seed)
+no banco do benchmark. --scale define a quantidade de cada modelo; --users,
+--posts e --sessions sobrescrevem individualmente.
+
+    python -m benchmarks.generators [--scale 10000|100000|1000000]
+        [--db caminho.sqlite3] [--rollups]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from . import utils
+
+SCALES = (10_000, 100_000, 1_000_000)
+BATCH_SIZE = 5000
+PSYCHOLOGIST_RATIO = 0.05
+POST_DAYS = 90
+TEXTS = (
+    '',
+    'Hoje foi um dia difícil, mas consegui descansar um pouco.',
+    'Acordei bem e saí para caminhar.',
+    'Muita coisa no trabalho, pouco tempo para mim.',
+    'Senti falta da minha família hoje.',
+)
+
+
+def _batches(count):
+    for start in range(0, count, BATCH_SIZE):
+        yield range(start, min(start + BATCH_SIZE, count))
+
+
+def generate_users(count, rng):
+    """Cria `count` usuários (5% psicólogos) e devolve (pacientes, psis)."""
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from user.models import CustomUser
+
+    # Um hash só: calcular o PBKDF2 por usuário levaria horas em 1M
+    password = make_password('benchmark-password')
+    psychologist_every = round(1 / PSYCHOLOGIST_RATIO)
+
+    for batch in _batches(count):
+        users = []
+        for index in batch:
+            psychologist = index % psychologist_every == 0
+            users.append(
+                CustomUser(
+                    username=f'bench-{index}',
+                    email=f'bench-{index}@bench.local',
+                    password=password,
+                    name=f'Usuário {index}',
+                    first_name='Usuário',
+                    type='psychologist' if psychologist else 'user',
+                    crp=f'06/{index:06d}' if psychologist else None,
+                    phone=f'119{rng.randrange(10**8):08d}',
+                    birth=date(1960, 1, 1)
+                    + timedelta(days=rng.randrange(40 * 365)),
+                )
+            )
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+
+    patients, psychologists = [], []
+    for pk, type_ in (
+        CustomUser.objects.filter(username__startswith='bench-')
+        .order_by('id')
+        .values_list('id', 'type')
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        (psychologists if type_ == 'psychologist' else patients).append(pk)
+    return patients, psychologists
+
+
+def generate_posts(count, user_ids, rng):
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from post.models import Feeling, Mood, Motive
+
+    moods = Mood.values
+    feelings = Feeling.values
+    motives = Motive.values
+    now = timezone.now()
+    window = POST_DAYS * 24 * 60 * 60
+    adapt = connection.ops.adapt_datetimefield_value
+
+    # INSERT direto: o auto_now_add do ORM daria a mesma data a todos
+    for batch in _batches(count):
+        rows = [
+            (
+                rng.choice(user_ids),
+                rng.choice(moods),
+                rng.choice(feelings),
+                rng.choice(motives),
+                rng.choice(TEXTS),
+                adapt(now - timedelta(seconds=rng.randrange(window))),
+            )
+            for _ in batch
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO post_post '
+                '(user_id, mood, feeling, motive, text, create_in) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+
+def generate_sessions(count, patient_ids, psychologist_ids, rng):
+    """Sessões de 50 min, sem sobreposição na agenda de cada psicólogo."""
+    from datetime import time as clock
+
+    from django.db import transaction
+    from django.utils import timezone
+
+    from user.models import Session
+
+    first_day = timezone.localdate() - timedelta(days=60)
+    slots_per_day = 8
+
+    for batch in _batches(count):
+        sessions = []
+        for index in batch:
+            psychologist = psychologist_ids[index % len(psychologist_ids)]
+            position = index // len(psychologist_ids)
+            hour = 9 + position % slots_per_day
+            sessions.append(
+                Session(
+                    date=first_day + timedelta(days=position // slots_per_day),
+                    start_time=clock(hour, 0),
+                    end_time=clock(hour, 50),
+                    psychologist_id=psychologist,
+                    user_id=rng.choice(patient_ids),
+                )
+            )
+        with transaction.atomic():
+            Session.objects.bulk_create(sessions)
+
+
+def generate(users, posts, sessions, seed=42, rollups=False):
+    """Popula o banco já configurado e devolve contagens e tempos."""
+    rng = random.Random(seed)
+    timings = {}
+
+    started = time.perf_counter()
+    patients, psychologists = generate_users(users, rng)
+    timings['users'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    generate_posts(posts, patients, rng)
+    timings['posts'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    generate_sessions(sessions, patients, psychologists, rng)
+    timings['sessions'] = time.perf_counter() - started
+
+    if rollups:
+        from django.core.management import call_command
+
+        started = time.perf_counter()
+        call_command('backfill_post_rollups', verbosity=0)
+        timings['rollups'] = time.perf_counter() - started
+
+    return {
+        'seed': seed,
+        'users': users,
+        'psychologists': len(psychologists),
+        'posts': posts,
+        'sessions': sessions,
+        'seconds': {name: round(value, 3) for name, value in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=SCALES[0])
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--posts', type=int)
+    parser.add_argument('--sessions', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db')
+    parser.add_argument('--rollups', action='store_true')
+    args = parser.parse_args()
+
+    utils.setup(args.db, fresh=True)
+    result = generate(
+        args.users or args.scale,
+        args.posts or args.scale,
+        args.sessions or args.scale,
+        seed=args.seed,
+        rollups=args.rollups,
+    )
+    print(json.dumps({'generators': result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
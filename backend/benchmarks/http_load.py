@@ -0,0 +1,218 @@
+"""
+Sobe o runserver numa porta local, com o banco do benchmark, e dispara
+requisições HTTP de verdade contra o cadastro, a criação de posts e o feed.
+Os tokens são emitidos pelo FixtureKeyProvider do driver; o servidor lê a
+chave pública pelo FileKeyProvider (BENCHMARK_KEYS).
+
+    python -m benchmarks.http_load [--db caminho.sqlite3] [--concurrency 8]
+        [--requests 500] [--register-requests 50]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from . import utils
+from .write_concurrency import summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+POST_BODY = {
+    'mood': 'ansioso',
+    'feeling': 'medo',
+    'motive': 'estresse',
+    'text': 'Semana pesada no trabalho.',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, db_path, keys_path):
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+        'BENCHMARK_DB': db_path,
+        'BENCHMARK_KEYS': keys_path,
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(BACKEND_DIR, 'manage.py'),
+            'runserver',
+            f'127.0.0.1:{port}',
+            '--noreload',
+            '--skip-checks',
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('O runserver não subiu em 60s.')
+
+
+class Driver:
+    """Uma conexão keep-alive por thread, reaberta quando o servidor fecha."""
+
+    def __init__(self, port):
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode() if body is not None else None
+
+        started = time.perf_counter()
+        try:
+            connection = self._connection()
+            connection.request(method, path, data, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.will_close:
+                self._local.connection = None
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self._local.connection = None
+            status = 599
+        return time.perf_counter() - started, status
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(
+                '127.0.0.1', self.port, timeout=60
+            )
+            self._local.connection = connection
+        return connection
+
+
+def load(call, concurrency, total):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    return summarize(results, time.perf_counter() - started)
+
+
+def run(db_path, concurrency, total, register_total):
+    """Roda a carga contra o banco já migrado em `db_path`."""
+    from user.keys import get_key_provider
+
+    provider = get_key_provider()
+    keys_path = os.path.join(tempfile.gettempdir(), 'hackathon-keys.json')
+    with open(keys_path, 'w') as fp:
+        json.dump(provider.export_keys(), fp)
+
+    tokens = [
+        provider.issue_token(f'load-{index}', email=f'load-{index}@x.y')
+        for index in range(concurrency)
+    ]
+    run_id = uuid.uuid4().hex[:8]
+
+    port = free_port()
+    server = start_server(port, db_path, keys_path)
+    driver = Driver(port)
+    try:
+        # Cria os usuários dos tokens antes de medir
+        for token in tokens:
+            driver.request('GET', '/api/profile/', token=token)
+
+        results = {}
+        results['register'] = load(
+            lambda index: driver.request(
+                'POST',
+                '/api/register/',
+                {
+                    'name': f'Carga {index}',
+                    'email': f'carga-{run_id}-{index}@x.y',
+                    'username': f'carga-{run_id}-{index}',
+                    'password': 'uma-senha-bem-forte',
+                    'type': 'user',
+                    'phone': '11999990000',
+                    'birth': '1990-05-12',
+                },
+            ),
+            concurrency,
+            register_total,
+        )
+        results['create_post'] = load(
+            lambda index: driver.request(
+                'POST',
+                '/api/posts/create/',
+                POST_BODY,
+                tokens[index % concurrency],
+            ),
+            concurrency,
+            total,
+        )
+        results['feed'] = load(
+            lambda index: driver.request(
+                'GET',
+                '/api/posts/?limit=20',
+                token=tokens[index % concurrency],
+            ),
+            concurrency,
+            total,
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        os.remove(keys_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--register-requests', type=int, default=50)
+    args = parser.parse_args()
+
+    utils.setup(args.db)
+
+    from django.conf import settings
+
+    results = run(
+        str(settings.DATABASES['default']['NAME']),
+        args.concurrency,
+        args.requests,
+        args.register_requests,
+    )
+    print(
+        json.dumps(
+            {
+                'http_load': {
+                    'concurrency': args.concurrency,
+                    'endpoints': results,
+                }
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
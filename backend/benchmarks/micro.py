@@ -0,0 +1,141 @@
+"""
+Micro-benchmarks dos caminhos quentes: PostSerializer, FirebaseAuthentication
+(com tokens do FixtureKeyProvider, sem rede), a validação de cadastro e a
+detecção de frases de risco (precisa ficar abaixo de 1 ms por post). Usa
+o banco atual do benchmark; se estiver vazio, gera 10k de cada modelo.
+
+    python -m benchmarks.micro [--db caminho.sqlite3] [--repeat 5]
+"""
+import argparse
+import json
+import time
+
+from . import utils
+
+REGISTRATION = {
+    'name': 'Maria Silva',
+    'email': 'Maria.Silva@Example.com',
+    'username': 'maria.silva',
+    'password': 'uma-senha-bem-forte',
+    'type': 'psychologist',
+    'phone': '11999990000',
+    'crp': '06/123456',
+    'birth': '1990-05-12',
+}
+
+
+def measure(function, number, repeat):
+    """Melhor de `repeat` rodadas de `number` chamadas."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - started)
+    return {
+        'number': number,
+        'us_per_op': round(best / number * 1_000_000, 2),
+        'ops_per_second': round(number / best, 1),
+    }
+
+
+def run(repeat=5):
+    """Roda os micro-benchmarks no banco já configurado."""
+    from rest_framework.test import APIRequestFactory
+
+    from post.models import Mood, Post
+    from post.risk import get_detector
+    from post.serializers import PostSerializer
+    from user.auth_cache import token_cache, user_cache
+    from user.authentication import FirebaseAuthentication
+    from user.keys import get_key_provider
+    from user.models import CustomUser
+    from user.validators import validate_registration, validate_unique
+
+    if not Post.objects.exists():
+        from .generators import generate
+
+        generate(10_000, 10_000, 10_000)
+
+    results = {}
+
+    post = Post.objects.order_by('-id').first()
+    page = list(Post.objects.order_by('-create_in', '-id')[:20])
+    payload = {
+        'mood': 'ansioso',
+        'feeling': 'medo',
+        'motive': 'estresse',
+        'text': 'Semana pesada no trabalho.',
+    }
+
+    results['post_serializer_one'] = measure(
+        lambda: PostSerializer(post).data, 2000, repeat
+    )
+    results['post_serializer_page_20'] = measure(
+        lambda: PostSerializer(page, many=True).data, 200, repeat
+    )
+    results['post_serializer_validate'] = measure(
+        lambda: PostSerializer(data=payload).is_valid(), 2000, repeat
+    )
+
+    user = CustomUser.objects.order_by('id').first()
+    token = get_key_provider().issue_token(user.username)
+    request = APIRequestFactory().get(
+        '/api/profile/', HTTP_AUTHORIZATION=f'Bearer {token}'
+    )
+    authentication = FirebaseAuthentication()
+
+    def authenticate_cold():
+        token_cache.clear()
+        user_cache.clear()
+        authentication.authenticate(request)
+
+    # Frio: verifica a assinatura RS256 e busca o usuário no banco
+    results['firebase_auth_cold'] = measure(authenticate_cold, 200, repeat)
+    # Quente: token e usuário já nos caches em memória
+    results['firebase_auth_warm'] = measure(
+        lambda: authentication.authenticate(request), 5000, repeat
+    )
+
+    results['registration_validate'] = measure(
+        lambda: validate_registration(REGISTRATION), 2000, repeat
+    )
+    results['registration_unique'] = measure(
+        lambda: validate_unique(
+            email=f'{user.username}@other.local', username=user.username
+        ),
+        500,
+        repeat,
+    )
+
+    # Texto longo no limite do que os posts costumam ter, com e sem frase
+    detector = get_detector()
+    calm = Post(
+        mood=Mood.TRISTE,
+        text='Hoje o dia foi cansativo, mas conversei com amigos. ' * 20,
+    )
+    risky = Post(
+        mood=Mood.DEPRIMIDO,
+        text=calm.text + 'Não aguento mais, não vejo saída.',
+    )
+    results['risk_score_1k_chars'] = measure(
+        lambda: detector.score(calm), 2000, repeat
+    )
+    results['risk_score_1k_chars_match'] = measure(
+        lambda: detector.score(risky), 2000, repeat
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    utils.setup(args.db)
+    print(json.dumps({'micro': run(args.repeat)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Suíte completa: gera os dados na escala pedida, roda os micro-benchmarks e
+a carga HTTP e grava tudo num JSON com o commit atual, para comparar com
+`python -m benchmarks.compare antes.json depois.json`.
+
+    python -m benchmarks.run [--scale 10000] [--output bench.json]
+        [--skip-http]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+from . import generators, http_load, micro, utils
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=http_load.BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=generators.SCALES[0])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--register-requests', type=int, default=50)
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--output', default='bench.json')
+    args = parser.parse_args()
+
+    db_path = os.path.join(
+        tempfile.gettempdir(), f'hackathon-suite-{args.scale}.sqlite3'
+    )
+    utils.setup(db_path, fresh=True)
+
+    import django
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+            'seed': args.seed,
+        },
+        'generators': generators.generate(
+            args.scale, args.scale, args.scale, seed=args.seed
+        ),
+        'micro': micro.run(args.repeat),
+    }
+
+    if not args.skip_http:
+        results['http_load'] = http_load.run(
+            db_path,
+            args.concurrency,
+            args.requests,
+            args.register_requests,
+        )
+
+    with open(args.output, 'w') as fp:
+        json.dump(results, fp, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
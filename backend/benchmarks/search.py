@@ -0,0 +1,77 @@
+"""
+Latência da busca textual (post/search.py) no banco do benchmark: gera os
+posts, reconstrói o índice e mede algumas consultas típicas, com e sem
+filtro de humor.
+
+    python -m benchmarks.search [--posts 1000000] [--db caminho.sqlite3]
+        [--repeat 5]
+"""
+import argparse
+import io
+import json
+import random
+import time
+
+from . import utils
+from .micro import measure
+
+QUERIES = {
+    'common_term': ('trabalho', {}),
+    'two_terms': ('falta família', {}),
+    'filtered': ('descansar', {'mood': 'triste'}),
+    'no_match': ('inexistente', {}),
+}
+
+
+def run(posts, repeat=5, seed=42):
+    """Gera os posts no banco já configurado, indexa e mede as consultas."""
+    from django.core.management import call_command
+
+    from post.models import CHOICE_VALUES
+    from post.search import get_search_backend
+
+    from .generators import generate_posts, generate_users
+
+    rng = random.Random(seed)
+    patients, _ = generate_users(max(posts // 10, 1), rng)
+    generate_posts(posts, patients, rng)
+
+    started = time.perf_counter()
+    call_command('rebuild_post_search', stdout=io.StringIO())
+    rebuild = time.perf_counter() - started
+
+    backend = get_search_backend()
+    results = {}
+    for name, (query, filters) in QUERIES.items():
+        filters = {
+            field: CHOICE_VALUES[field][value]
+            for field, value in filters.items()
+        }
+        results[name] = {
+            'hits': len(backend.search(query, filters, 20)),
+            **measure(lambda: backend.search(query, filters, 20), 20, repeat),
+        }
+
+    return {
+        'posts': posts,
+        'seconds': {'rebuild': round(rebuild, 3)},
+        'rebuild_posts_per_second': round(posts / rebuild, 1),
+        'queries': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db')
+    args = parser.parse_args()
+
+    utils.setup(args.db, fresh=True)
+    result = run(args.posts, args.repeat, args.seed)
+    print(json.dumps({'search': result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import ACCOUNT_DELETION, DATABASES, THROTTLING
+
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['default']['NAME'] = os.environ.get(
+        'BENCHMARK_DB',
+        os.path.join(tempfile.gettempdir(), 'hackathon-bench.sqlite3'),
+    )
+
+ALLOWED_HOSTS = ['*']
+
+# Tokens emitidos localmente (FixtureKeyProvider.issue_token), sem rede. O
+# servidor do http_load lê a chave pública que o driver grava em disco.
+if os.environ.get('BENCHMARK_KEYS'):
+    FIREBASE_KEY_PROVIDER = {
+        'BACKEND': 'user.keys.FileKeyProvider',
+        'OPTIONS': {'path': os.environ['BENCHMARK_KEYS']},
+    }
+else:
+    FIREBASE_KEY_PROVIDER = {'BACKEND': 'user.keys.FixtureKeyProvider'}
+
+# A carga sai de um IP e de poucos usuários: mede o servidor, não o limite
+THROTTLING = {**THROTTLING, 'RATES': {}}
+
+# As exclusões de conta rodam na thread do benchmark, não na do worker
+ACCOUNT_DELETION = {**ACCOUNT_DELETION, 'WORKER': False}
@@ -0,0 +1,29 @@
+import os
+import resource
+
+
+def setup(db_path=None, fresh=False):
+    """Configura o Django com o banco do benchmark e aplica as migrations."""
+    if db_path:
+        os.environ['BENCHMARK_DB'] = db_path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+    import django
+    from django.conf import settings
+
+    name = settings.DATABASES['default']['NAME']
+    if fresh:
+        # Em WAL o banco deixa os arquivos -wal e -shm ao lado
+        for path in (name, f'{name}-wal', f'{name}-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
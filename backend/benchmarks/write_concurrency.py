@@ -0,0 +1,203 @@
+"""
+Mede a vazão de escrita de /api/posts/create/ com vários escritores
+simultâneos (e leitores do feed em paralelo) para cada perfil de banco de
+app/databases.py. Cada perfil roda num processo novo, com DB_PROFILE
+próprio e um banco vazio; o perfil postgres usa as variáveis POSTGRES_*.
+
+    python -m benchmarks.write_concurrency [--profiles sqlite-basic sqlite]
+        [--writers 16] [--readers 4] [--requests 2000]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import utils
+from .asgi_vs_wsgi import POST_BODY, percentile
+
+
+def call(application, method, path, token, body=b''):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'testserver',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': io.StringIO(),
+    }
+    status = []
+    started = time.perf_counter()
+    result = application(
+        environ, lambda code, headers: status.append(int(code[:3]))
+    )
+    b''.join(result)
+    result.close()
+    return time.perf_counter() - started, status[0]
+
+
+def summarize(results, elapsed):
+    latencies = [latency for latency, _ in results]
+    return {
+        'requests': len(results),
+        'per_second': round(len(results) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'errors': sum(1 for _, code in results if code >= 400),
+    }
+
+
+def run(profile, writers, readers, total):
+    db_path = os.path.join(
+        tempfile.gettempdir(), f'hackathon-writes-{profile}.sqlite3'
+    )
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    utils.setup(db_path)
+    # "database is locked" vira 500; só a contagem interessa aqui
+    logging.disable(logging.CRITICAL)
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    if connection.vendor != 'sqlite':
+        call_command('flush', interactive=False, verbosity=0)
+
+    from app.wsgi import application
+    from user.keys import get_key_provider
+
+    tokens = [
+        get_key_provider().issue_token(
+            f'writer-{index}', email=f'writer-{index}@bench.local'
+        )
+        for index in range(writers)
+    ]
+    # Cria os usuários antes de medir (o primeiro acesso faz get_or_create)
+    for token in tokens:
+        call(application, 'GET', '/api/profile/', token)
+
+    done = []
+
+    def write(index):
+        try:
+            return call(
+                application,
+                'POST',
+                '/api/posts/create/',
+                tokens[index % writers],
+                POST_BODY,
+            )
+        finally:
+            connection.close()
+
+    def read(index):
+        results = []
+        while not done:
+            results.append(
+                call(application, 'GET', '/api/posts/', tokens[index])
+            )
+        connection.close()
+        return results
+
+    with ThreadPoolExecutor(max(readers, 1)) as reader_pool:
+        reading = [
+            reader_pool.submit(read, index % writers)
+            for index in range(readers)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(writers) as writer_pool:
+            writes = list(writer_pool.map(write, range(total)))
+        elapsed = time.perf_counter() - started
+        done.append(True)
+        reads = [result for future in reading for result in future.result()]
+
+    print(
+        json.dumps(
+            {
+                'vendor': connection.vendor,
+                'writes': summarize(writes, elapsed),
+                'reads': summarize(reads, elapsed) if reads else None,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--profiles', nargs='+', default=['sqlite-basic', 'sqlite']
+    )
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.writers, args.readers, args.requests)
+        return
+
+    results = {}
+    for profile in args.profiles:
+        output = subprocess.run(
+            [
+                sys.executable,
+                '-m',
+                'benchmarks.write_concurrency',
+                '--run',
+                profile,
+                '--writers',
+                str(args.writers),
+                '--readers',
+                str(args.readers),
+                '--requests',
+                str(args.requests),
+            ],
+            env={**os.environ, 'DB_PROFILE': profile},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[profile] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = results.get('sqlite-basic')
+    if baseline:
+        for result in results.values():
+            result['writes_speedup'] = round(
+                result['writes']['per_second']
+                / baseline['writes']['per_second'],
+                2,
+            )
+
+    print(
+        json.dumps(
+            {
+                'write_concurrency': {
+                    'writers': args.writers,
+                    'readers': args.readers,
+                    'requests': args.requests,
+                    'profiles': results,
+                }
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
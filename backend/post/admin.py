@@ -1,3 +1,44 @@
 from django.contrib import admin
+from app.pagination import EstimatedCountPaginator
+from .models import Post, RiskAlert, SupportGroup
 
 # Register your models here.
+
+
+class PostAdmin(admin.ModelAdmin):
+    list_display = ('create_in', 'user', 'mood', 'feeling', 'motive')
+    # Post.__str__ e a coluna user leem user.username
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    # Cobertos pelos índices do feed (campo, -create_in, -id)
+    list_filter = ('mood', 'feeling', 'motive')
+    ordering = ('-create_in', '-id')
+    raw_id_fields = ('user', 'group')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+admin.site.register(Post, PostAdmin)
+
+
+class SupportGroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'member_count', 'fanout', 'create_in')
+    prepopulated_fields = {'slug': ('name',)}
+    # Mantidos pelos endpoints de participação
+    readonly_fields = ('member_count',)
+    search_fields = ('name',)
+
+
+admin.site.register(SupportGroup, SupportGroupAdmin)
+
+
+class RiskAlertAdmin(admin.ModelAdmin):
+    list_display = ('create_in', 'user', 'score', 'reviewed_in')
+    list_select_related = ('user',)
+    list_filter = ('reviewed_in',)
+    ordering = ('-create_in',)
+    raw_id_fields = ('post', 'user', 'reviewed_by')
+    readonly_fields = ('score', 'phrases', 'dictionary_version')
+
+
+admin.site.register(RiskAlert, RiskAlertAdmin)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class PostConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'post'
+
+    def ready(self):
+        from app import metrics
+
+        from . import signals  # noqa: F401
+        from . import groups
+        from .broker import get_broker
+        from .risk import get_detector
+
+        metrics.register('post_stream', lambda: get_broker().stats())
+        metrics.register('risk_detection', lambda: get_detector().stats())
+        metrics.register('group_fanout', lambda: groups.get_worker().stats())
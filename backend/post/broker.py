@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+FILTER_FIELDS = ('mood', 'feeling', 'motive')
+
+
+class Subscription:
+    """Fila de um assinante, consumida no event loop que a criou."""
+
+    def __init__(self, filters, maxsize):
+        self.key = tuple(filters.get(field) for field in FILTER_FIELDS)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta em vez de acumular memória
+            self.dropped += 1
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InMemoryBroker:
+    """
+    Pub/sub dentro do processo. Os assinantes ficam agrupados pela
+    combinação de filtros (None = qualquer valor), então publicar consulta
+    no máximo 8 grupos, não a lista inteira de conexões.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._groups = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, filters):
+        subscription = Subscription(filters, self.queue_size)
+        with self._lock:
+            self._groups[subscription.key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            group = self._groups.get(subscription.key)
+            if group is not None:
+                group.discard(subscription)
+                if not group:
+                    del self._groups[subscription.key]
+
+    def publish(self, message):
+        values = [(message[field], None) for field in FILTER_FIELDS]
+        with self._lock:
+            subscriptions = [
+                subscription
+                for key in itertools.product(*values)
+                for subscription in self._groups.get(key, ())
+            ]
+            self.published += 1
+
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': sum(map(len, self._groups.values())),
+                'groups': len(self._groups),
+                'published': self.published,
+            }
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'POST_BROKER', {})
+                backend = import_string(
+                    config.get('BACKEND', 'post.broker.InMemoryBroker')
+                )
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,113 @@
+import csv
+import itertools
+import json
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import CHOICE_NAMES, Post
+
+EXPORT_FIELDS = ('id', 'mood', 'feeling', 'motive', 'text', 'create_in')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_queryset(user, start=None, end=None):
+    posts = Post.objects.filter(user=user)
+
+    # Limites como datetime para continuar usando o índice (user, create_in)
+    if start:
+        posts = posts.filter(
+            create_in__gte=timezone.make_aware(
+                datetime.combine(start, time.min)
+            )
+        )
+    if end:
+        posts = posts.filter(
+            create_in__lt=timezone.make_aware(
+                datetime.combine(end + timedelta(days=1), time.min)
+            )
+        )
+
+    return posts.order_by('create_in', 'id').values_list(*EXPORT_FIELDS)
+
+
+def _with_names(rows):
+    # Os valores saem pelo nome, como na API, e não pelo código gravado
+    columns = [
+        (index, CHOICE_NAMES[field])
+        for index, field in enumerate(EXPORT_FIELDS)
+        if field in CHOICE_NAMES
+    ]
+    for row in rows:
+        row = list(row)
+        for index, names in columns:
+            row[index] = names[row[index]]
+        yield row
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ]
+        )
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(EXPORT_FIELDS, row)),
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + '\n'
+
+
+RENDERERS = {'csv': render_csv, 'ndjson': render_ndjson}
+
+
+def stream_export(user, fmt, start=None, end=None, chunk_size=None):
+    """Gera o export linha a linha, sem materializar o histórico."""
+    rows = export_queryset(user, start, end).iterator(
+        chunk_size=chunk_size or EXPORT_CHUNK_SIZE
+    )
+    return RENDERERS[fmt](_with_names(rows))
+
+
+def _next_lines(lines, count):
+    return ''.join(itertools.islice(lines, count))
+
+
+async def astream_export(user, fmt, start=None, end=None, chunk_size=None):
+    """
+    O mesmo export para o ASGI. Com um iterador síncrono, o Django juntaria
+    a resposta inteira numa lista antes de mandar o primeiro byte; aqui
+    cada bloco de linhas sai da thread do banco por vez.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    lines = stream_export(user, fmt, start, end, chunk_size)
+    # thread_sensitive: o cursor do iterator() fica sempre na mesma thread
+    next_lines = sync_to_async(_next_lines)
+    try:
+        while True:
+            block = await next_lines(lines, chunk_size)
+            if not block:
+                break
+            yield block
+    finally:
+        # Cliente desconectado no meio: fecha o cursor do iterator()
+        await sync_to_async(lines.close)()
@@ -0,0 +1,264 @@
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from app.workers import BackgroundWorker
+
+from .models import GroupMembership, GroupTimelineEntry, Post, SupportGroup
+
+DEFAULTS = {
+    'FANOUT_MAX_MEMBERS': 5000,
+    'BATCH_SIZE': 1000,
+    'JOIN_BACKFILL': 50,
+    'WORKER': True,
+}
+
+
+def _config(name):
+    return getattr(settings, 'GROUP_TIMELINE', {}).get(name, DEFAULTS[name])
+
+
+def fan_out(posts):
+    """
+    Agenda a cópia dos posts de grupo para a timeline dos membros, depois
+    do commit e fora da requisição (no worker), em lotes de até BATCH_SIZE
+    linhas. Grupos sem fan-out ficam de fora: são lidos sob demanda.
+    """
+    by_group = defaultdict(list)
+    for post in posts:
+        if post.group_id is not None:
+            by_group[post.group_id].append(post)
+    if not by_group:
+        return
+
+    fanout_groups = set(
+        SupportGroup.objects.filter(id__in=by_group, fanout=True).values_list(
+            'id', flat=True
+        )
+    )
+    deliver = get_worker().deliver if _config('WORKER') else _deliver
+    for group_id in fanout_groups:
+        group_posts = [
+            (post.id, post.create_in) for post in by_group[group_id]
+        ]
+        transaction.on_commit(
+            lambda group_id=group_id, group_posts=group_posts: deliver(
+                group_id, group_posts
+            )
+        )
+
+
+def _deliver(group_id, posts):
+    """
+    Copia `posts` para a timeline de cada membro. Membros × posts por
+    bulk_create ficam em BATCH_SIZE linhas (uma transação por lote).
+    """
+    batch_size = _config('BATCH_SIZE')
+    member_batch = max(1, batch_size // len(posts))
+    post_batches = [
+        posts[start : start + batch_size]
+        for start in range(0, len(posts), batch_size)
+    ]
+    members = GroupMembership.objects.filter(group_id=group_id).order_by('id')
+    cursor = 0
+
+    while True:
+        batch = list(
+            members.filter(id__gt=cursor).values_list('id', 'user_id')[
+                :member_batch
+            ]
+        )
+        if not batch:
+            break
+
+        for post_batch in post_batches:
+            GroupTimelineEntry.objects.bulk_create(
+                [
+                    GroupTimelineEntry(
+                        user_id=user_id,
+                        post_id=post_id,
+                        group_id=group_id,
+                        create_in=create_in,
+                    )
+                    for _, user_id in batch
+                    for post_id, create_in in post_batch
+                ],
+                ignore_conflicts=True,
+            )
+        cursor = batch[-1][0]
+
+
+class FanOutWorker(BackgroundWorker):
+    """
+    Entrega os posts de grupo e limpa a timeline de quem saiu, na ordem em
+    que chegam.
+    """
+
+    name = 'group-fanout'
+
+    def __init__(self):
+        super().__init__()
+        self.delivered = 0
+        self.failed_posts = 0
+        self.removals = 0
+
+    def deliver(self, group_id, posts):
+        self.submit('deliver', group_id, posts)
+
+    def remove(self, user_id, group_id):
+        self.submit('remove', user_id, group_id)
+
+    def handle(self, kind, *args):
+        if kind == 'remove':
+            _remove_entries(*args)
+            self.removals += 1
+            return
+
+        group_id, posts = args
+        try:
+            _deliver(group_id, posts)
+        except Exception:
+            self.failed_posts += len(posts)
+            raise
+        self.delivered += len(posts)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'delivered_posts': self.delivered,
+            'failed_posts': self.failed_posts,
+            'removals': self.removals,
+        }
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = FanOutWorker()
+    return _worker
+
+
+def join(user, group):
+    """Adiciona o membro e devolve False se ele já participava."""
+    try:
+        with transaction.atomic():
+            GroupMembership.objects.create(user=user, group=group)
+            SupportGroup.objects.filter(id=group.id).update(
+                member_count=F('member_count') + 1
+            )
+            # Passou do limite: daqui em diante o grupo é lido sob demanda
+            SupportGroup.objects.filter(
+                id=group.id,
+                fanout=True,
+                member_count__gt=_config('FANOUT_MAX_MEMBERS'),
+            ).update(fanout=False)
+    except IntegrityError:
+        return False
+
+    group.refresh_from_db(fields=['member_count', 'fanout'])
+    if group.fanout:
+        # Os posts recentes, para a timeline não começar vazia
+        GroupTimelineEntry.objects.bulk_create(
+            [
+                GroupTimelineEntry(
+                    user=user,
+                    post_id=post_id,
+                    group=group,
+                    create_in=create_in,
+                )
+                for post_id, create_in in Post.objects.filter(group=group)
+                .order_by('-create_in', '-id')
+                .values_list('id', 'create_in')[: _config('JOIN_BACKFILL')]
+            ],
+            ignore_conflicts=True,
+        )
+    return True
+
+
+def _remove_entries(user_id, group_id):
+    """Apaga a cópia do grupo na timeline do ex-membro, em lotes."""
+    batch_size = _config('BATCH_SIZE')
+    entries = GroupTimelineEntry.objects.filter(
+        user_id=user_id, group_id=group_id
+    )
+    while True:
+        # Voltou ao grupo antes da limpeza: a timeline dele vale de novo
+        if GroupMembership.objects.filter(
+            user_id=user_id, group_id=group_id
+        ).exists():
+            return
+        ids = list(entries.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        GroupTimelineEntry.objects.filter(id__in=ids).delete()
+
+
+def leave(user, group):
+    """
+    Remove o membro. A cópia dos posts do grupo na timeline dele sai depois
+    do commit, no worker; até lá a leitura já ignora o grupo.
+    """
+    with transaction.atomic():
+        deleted, _ = GroupMembership.objects.filter(
+            user=user, group=group
+        ).delete()
+        if not deleted:
+            return False
+        SupportGroup.objects.filter(id=group.id).update(
+            member_count=F('member_count') - 1
+        )
+
+    remove = get_worker().remove if _config('WORKER') else _remove_entries
+    transaction.on_commit(lambda: remove(user.id, group.id))
+    return True
+
+
+def timeline_keys(user, limit, after=None):
+    """
+    (id, create_in) dos próximos `limit` posts da timeline de grupos, do
+    mais novo ao mais antigo, a partir do cursor `after`. Junta a timeline
+    materializada com a leitura direta dos grupos sem fan-out.
+    """
+    # Só dos grupos atuais: quem saiu pode ter cópias ainda não apagadas
+    entries = GroupTimelineEntry.objects.filter(
+        user=user,
+        group__in=GroupMembership.objects.filter(user=user).values('group'),
+    )
+    if after is not None:
+        create_in, post_id = after
+        entries = entries.filter(
+            Q(create_in__lt=create_in)
+            | Q(create_in=create_in, post_id__lt=post_id)
+        )
+    keys = set(
+        entries.order_by('-create_in', '-post').values_list(
+            'post_id', 'create_in'
+        )[:limit]
+    )
+
+    large = GroupMembership.objects.filter(
+        user=user, group__fanout=False
+    ).values_list('group_id', flat=True)
+    posts = Post.objects.filter(group_id__in=large)
+    if after is not None:
+        posts = posts.filter(
+            Q(create_in__lt=create_in) | Q(create_in=create_in, id__lt=post_id)
+        )
+    # Quase sempre vazio: os grupos grandes são poucos
+    keys.update(
+        posts.order_by('-create_in', '-id').values_list('id', 'create_in')[
+            :limit
+        ]
+    )
+
+    return sorted(keys, key=lambda key: (key[1], key[0]), reverse=True)[:limit]
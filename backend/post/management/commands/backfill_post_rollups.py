@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDate, TruncWeek
+
+from post.models import CHOICE_NAMES, Post, PostRollup
+from post.rollups import DIMENSIONS
+
+# Mesmos inícios de período de rollups.period_starts, no fuso atual
+PERIODS = {
+    'day': lambda: TruncDate('create_in'),
+    'week': lambda: TruncWeek('create_in', output_field=DateField()),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula as agregações de humor, sentimento e motivo a partir '
+        'do histórico de posts, com um GROUP BY por período e dimensão.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        written = 0
+
+        # Uma transação só: o analytics continua lendo as linhas antigas
+        # até o commit, e nunca vê contagens pela metade
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Os incrementos dos posts novos esperam a troca; os que
+                # ainda não commitaram entram nas linhas novas depois dela
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'LOCK TABLE post_postrollup IN EXCLUSIVE MODE'
+                    )
+            # Antes das leituras: no SQLite, já segura a escrita
+            PostRollup.objects.all().delete()
+
+            for period, trunc in PERIODS.items():
+                for dimension in DIMENSIONS:
+                    for scope in (('user',), ()):
+                        rows = (
+                            Post.objects.annotate(period_start=trunc())
+                            .values(*scope, 'period_start', dimension)
+                            .annotate(count=Count('id'))
+                            .order_by()
+                        )
+                        batch = []
+                        for row in rows.iterator(chunk_size=chunk_size):
+                            batch.append(
+                                PostRollup(
+                                    user_id=row.get('user'),
+                                    period=period,
+                                    period_start=row['period_start'],
+                                    dimension=dimension,
+                                    value=CHOICE_NAMES[dimension][
+                                        row[dimension]
+                                    ],
+                                    count=row['count'],
+                                )
+                            )
+                            if len(batch) >= chunk_size:
+                                PostRollup.objects.bulk_create(batch)
+                                written += len(batch)
+                                batch = []
+                        PostRollup.objects.bulk_create(batch)
+                        written += len(batch)
+                        self.stdout.write(
+                            f'{period}/{dimension}/'
+                            f'{"usuário" if scope else "plataforma"}: '
+                            f'{written} linhas gravadas'
+                        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Agregações recalculadas: {written} linhas.')
+        )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from post.models import CHOICE_NAMES, Post, WellbeingDay
+from post.timeline import MOOD_SCORES
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula a linha do tempo de bem-estar (resumos diários por '
+        'usuário) a partir do histórico de posts, com um GROUP BY só.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        # Dia no fuso atual, como o timezone.localdate() do signal
+        groups = (
+            Post.objects.annotate(day=TruncDate('create_in'))
+            .values('user', 'day', 'mood', 'feeling', 'motive')
+            .annotate(count=Count('id'))
+            .order_by('user', 'day')
+        )
+        written = 0
+        batch = []
+        current = None
+
+        def flush():
+            nonlocal written, batch
+            WellbeingDay.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+            self.stdout.write(f'{written} dias gravados')
+
+        # Uma transação só: a linha do tempo continua lendo os resumos
+        # antigos até o commit, e nunca vê dias pela metade
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Os posts novos esperam a troca (o signal usa SELECT ...
+                # FOR UPDATE) e depois somam nas linhas novas
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'LOCK TABLE post_wellbeingday IN EXCLUSIVE MODE'
+                    )
+            # Antes das leituras: no SQLite, já segura a escrita
+            WellbeingDay.objects.all().delete()
+
+            # Os grupos chegam em ordem de (user, day): um dia por vez
+            for row in groups.iterator(chunk_size=chunk_size):
+                key = (row['user'], row['day'])
+                if current is None or (current.user_id, current.day) != key:
+                    if len(batch) >= chunk_size:
+                        flush()
+                    current = WellbeingDay(
+                        user_id=key[0], day=key[1], feelings={}, motives={}
+                    )
+                    batch.append(current)
+
+                count = row['count']
+                current.posts += count
+                current.mood_score_sum += MOOD_SCORES[row['mood']] * count
+                # O JSON guarda os nomes, que a linha do tempo devolve
+                for field, counts in (
+                    ('feeling', current.feelings),
+                    ('motive', current.motives),
+                ):
+                    name = CHOICE_NAMES[field][row[field]]
+                    counts[name] = counts.get(name, 0) + count
+            flush()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Linha do tempo recalculada: {written} dias.')
+        )
@@ -0,0 +1,51 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from post.exports import EXPORT_CHUNK_SIZE, RENDERERS, stream_export
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Exporta o histórico de posts de um usuário em CSV ou NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='id ou username do usuário')
+        parser.add_argument(
+            '--format', choices=sorted(RENDERERS), default='csv'
+        )
+        parser.add_argument('--start', type=date.fromisoformat)
+        parser.add_argument('--end', type=date.fromisoformat)
+        parser.add_argument(
+            '--output', help='arquivo de saída (padrão: stdout)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        lookup = options['user']
+        users = CustomUser.objects.filter(username=lookup)
+        if lookup.isdigit():
+            users = CustomUser.objects.filter(id=int(lookup)) | users
+
+        user = users.first()
+        if user is None:
+            raise CommandError(f'Usuário "{lookup}" não encontrado.')
+
+        lines = stream_export(
+            user,
+            options['format'],
+            options['start'],
+            options['end'],
+            options['chunk_size'],
+        )
+
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as fp:
+                fp.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
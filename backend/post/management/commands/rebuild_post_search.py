@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from post.models import Post
+from post.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca dos posts a partir do histórico, em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        backend = get_search_backend()
+
+        # Posts criados depois deste ponto já entram pelo signal
+        with transaction.atomic():
+            last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+            backend.clear()
+
+        posts = Post.objects.filter(id__lte=last_id).only('id', 'text')
+        cursor = 0
+        processed = 0
+
+        while True:
+            chunk = list(
+                posts.filter(id__gt=cursor).order_by('id')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                backend.index(chunk)
+            cursor = chunk[-1].id
+            processed += len(chunk)
+            self.stdout.write(
+                f'{processed} posts processados (id <= {cursor})'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Índice de busca reconstruído: {processed} posts.'
+            )
+        )
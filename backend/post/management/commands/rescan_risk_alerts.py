@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from post.models import Post
+from post.risk import get_detector, rescan
+
+
+class Command(BaseCommand):
+    help = (
+        'Reaplica o dicionário de frases de risco ao histórico de posts, '
+        'em lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        detector = get_detector()
+        self.stdout.write(
+            f'Dicionário {detector.version}: {len(detector.phrases)} frases.'
+        )
+
+        # Posts criados depois deste ponto já passam pelo signal
+        last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        posts = Post.objects.filter(id__lte=last_id).only(
+            'id', 'user_id', 'mood', 'text'
+        )
+        cursor = 0
+        processed = alerts = removed = 0
+        started = time.perf_counter()
+
+        while True:
+            chunk = list(
+                posts.filter(id__gt=cursor).order_by('id')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                created, deleted = rescan(chunk)
+            cursor = chunk[-1].id
+            processed += len(chunk)
+            alerts += created
+            removed += deleted
+            rate = processed / (time.perf_counter() - started)
+            self.stdout.write(
+                f'{processed} posts processados (id <= {cursor}), '
+                f'{rate:.0f} posts/s'
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rescan concluído: {processed} posts em {elapsed:.1f}s '
+                f'({processed / elapsed if elapsed else 0:.0f} posts/s), '
+                f'{alerts} alertas, {removed} removidos.'
+            )
+        )
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Post',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'mood',
+                    models.CharField(
+                        choices=[
+                            ('alegre', 'Alegre'),
+                            ('triste', 'Triste'),
+                            ('ansioso', 'Ansioso'),
+                            ('neutro', 'Neutro'),
+                            ('assustado', 'Assustado'),
+                            ('raivoso', 'Raivoso'),
+                            ('deprimido', 'Deprimido'),
+                            ('entusiasmado', 'Entusiasmado'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    'feeling',
+                    models.CharField(
+                        choices=[
+                            ('raiva', 'Raiva'),
+                            ('alegria', 'Alegria'),
+                            ('medo', 'Medo'),
+                            ('angustia', 'Angustia'),
+                            ('neutro', 'Neutro'),
+                            ('segurança', 'Segurança'),
+                            ('insegurança', 'Insegurança'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    'motive',
+                    models.CharField(
+                        choices=[
+                            ('luto', 'Luto'),
+                            ('cansaço', 'Cansaço'),
+                            ('estresse', 'Estresse'),
+                            ('sono', 'Sono'),
+                            ('saudade', 'Saudade'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ('text', models.TextField(blank=True)),
+                ('create_in', models.DateTimeField(auto_now_add=True)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
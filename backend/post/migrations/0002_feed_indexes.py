@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['-create_in', '-id'], name='post_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['user', '-create_in', '-id'], name='post_user_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['mood', '-create_in', '-id'], name='post_mood_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['feeling', '-create_in', '-id'],
+                name='post_feeling_feed_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['motive', '-create_in', '-id'],
+                name='post_motive_feed_idx',
+            ),
+        ),
+    ]
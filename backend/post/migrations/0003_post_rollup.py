@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0002_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRollup',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'period',
+                    models.CharField(
+                        choices=[('day', 'Dia'), ('week', 'Semana')],
+                        max_length=5,
+                    ),
+                ),
+                ('period_start', models.DateField()),
+                (
+                    'dimension',
+                    models.CharField(
+                        choices=[
+                            ('mood', 'Humor'),
+                            ('feeling', 'Sentimento'),
+                            ('motive', 'Motivo'),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ('value', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='post_rollups',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        condition=models.Q(('user__isnull', False)),
+                        fields=(
+                            'user',
+                            'period',
+                            'period_start',
+                            'dimension',
+                            'value',
+                        ),
+                        name='post_rollup_user_uniq',
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(('user__isnull', True)),
+                        fields=(
+                            'period',
+                            'period_start',
+                            'dimension',
+                            'value',
+                        ),
+                        name='post_rollup_platform_uniq',
+                    ),
+                ],
+            },
+        ),
+    ]
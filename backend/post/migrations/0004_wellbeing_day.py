@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0003_post_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WellbeingDay',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('day', models.DateField()),
+                ('posts', models.PositiveIntegerField(default=0)),
+                ('mood_score_sum', models.PositiveIntegerField(default=0)),
+                ('feelings', models.JSONField(default=dict)),
+                ('motives', models.JSONField(default=dict)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='wellbeing_days',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('user', 'day'), name='wellbeing_day_uniq'
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,207 @@
+from django.db import migrations, models
+
+# Congelado aqui: a migration não pode depender do código atual do model
+NAMES = {
+    'mood': {
+        'alegre': 1,
+        'triste': 2,
+        'ansioso': 3,
+        'neutro': 4,
+        'assustado': 5,
+        'raivoso': 6,
+        'deprimido': 7,
+        'entusiasmado': 8,
+    },
+    'feeling': {
+        'raiva': 1,
+        'alegria': 2,
+        'medo': 3,
+        'angustia': 4,
+        'neutro': 5,
+        'segurança': 6,
+        'insegurança': 7,
+    },
+    'motive': {
+        'luto': 1,
+        'cansaço': 2,
+        'estresse': 3,
+        'sono': 4,
+        'saudade': 5,
+    },
+}
+
+MOOD_CHOICES = [
+    (1, 'Alegre'),
+    (2, 'Triste'),
+    (3, 'Ansioso'),
+    (4, 'Neutro'),
+    (5, 'Assustado'),
+    (6, 'Raivoso'),
+    (7, 'Deprimido'),
+    (8, 'Entusiasmado'),
+]
+FEELING_CHOICES = [
+    (1, 'Raiva'),
+    (2, 'Alegria'),
+    (3, 'Medo'),
+    (4, 'Angustia'),
+    (5, 'Neutro'),
+    (6, 'Segurança'),
+    (7, 'Insegurança'),
+]
+MOTIVE_CHOICES = [
+    (1, 'Luto'),
+    (2, 'Cansaço'),
+    (3, 'Estresse'),
+    (4, 'Sono'),
+    (5, 'Saudade'),
+]
+
+
+def to_codes(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+
+    # Um UPDATE por valor, sem carregar os posts na memória
+    for field, names in NAMES.items():
+        for name, code in names.items():
+            Post.objects.filter(**{field: name}).update(
+                **{f'{field}_code': code}
+            )
+
+        unknown = set(
+            Post.objects.filter(**{f'{field}_code__isnull': True})
+            .values_list(field, flat=True)
+            .distinct()
+        )
+        if unknown:
+            # Abortar é melhor que perder o valor ao remover a coluna antiga
+            raise ValueError(
+                f'Valores de {field} sem código: {sorted(unknown)}'
+            )
+
+
+def to_names(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+
+    for field, names in NAMES.items():
+        for name, code in names.items():
+            Post.objects.filter(**{f'{field}_code': code}).update(
+                **{field: name}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0004_wellbeing_day'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_mood_feed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_feeling_feed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_motive_feed_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='mood_code',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='feeling_code',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='motive_code',
+            field=models.SmallIntegerField(null=True),
+        ),
+        # Nulas antes de sair: ao desfazer, as colunas de texto voltam vazias
+        # e só depois o to_names as preenche
+        migrations.AlterField(
+            model_name='post',
+            name='mood',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='feeling',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='motive',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.RunPython(to_codes, to_names),
+        migrations.RemoveField(
+            model_name='post',
+            name='mood',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='feeling',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='motive',
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='mood_code',
+            new_name='mood',
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='feeling_code',
+            new_name='feeling',
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='motive_code',
+            new_name='motive',
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='mood',
+            field=models.SmallIntegerField(choices=MOOD_CHOICES),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='feeling',
+            field=models.SmallIntegerField(choices=FEELING_CHOICES),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='motive',
+            field=models.SmallIntegerField(choices=MOTIVE_CHOICES),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['mood', '-create_in', '-id'], name='post_mood_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['feeling', '-create_in', '-id'],
+                name='post_feeling_feed_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['motive', '-create_in', '-id'],
+                name='post_motive_feed_idx',
+            ),
+        ),
+    ]
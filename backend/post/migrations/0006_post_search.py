@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# A busca não tem model: cada banco tem a sua estrutura (post.search)
+SCHEMA = {
+    'sqlite': (
+        # Sem trigger em post_post: o SQLite o perderia a cada migration
+        # que recria a tabela. Os posts apagados saem pelo post_delete.
+        [
+            'CREATE VIRTUAL TABLE post_search USING fts5('
+            "terms, tokenize = 'unicode61 remove_diacritics 2')",
+        ],
+        ['DROP TABLE post_search'],
+    ),
+    'postgresql': (
+        [
+            'CREATE TABLE post_search ('
+            'post_id bigint PRIMARY KEY '
+            'REFERENCES post_post (id) ON DELETE CASCADE, '
+            'terms tsvector NOT NULL)',
+            'CREATE INDEX post_search_terms_idx ON post_search '
+            'USING GIN (terms)',
+        ],
+        ['DROP TABLE post_search'],
+    ),
+}
+
+
+def create_schema(apps, schema_editor):
+    forwards, _ = SCHEMA.get(schema_editor.connection.vendor, ([], []))
+    for sql in forwards:
+        schema_editor.execute(sql)
+
+
+def drop_schema(apps, schema_editor):
+    _, backwards = SCHEMA.get(schema_editor.connection.vendor, ([], []))
+    for sql in backwards:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0005_post_choices_smallint'),
+    ]
+
+    # Os posts já existentes entram com `manage.py rebuild_post_search`
+    operations = [
+        migrations.RunPython(create_schema, drop_schema),
+    ]
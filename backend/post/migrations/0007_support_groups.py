@@ -0,0 +1,174 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Os grupos divulgados na página inicial
+GROUPS = [
+    (
+        'Ansiedade & Estresse',
+        'ansiedade-estresse',
+        'Grupo de apoio para gerenciar ansiedade',
+    ),
+    (
+        'Autoconfiança',
+        'autoconfianca',
+        'Desenvolvimento pessoal e autoestima',
+    ),
+    ('TDAH & Foco', 'tdah-foco', 'Estratégias e suporte para TDAH'),
+]
+
+
+def create_groups(apps, schema_editor):
+    SupportGroup = apps.get_model('post', 'SupportGroup')
+    for name, slug, description in GROUPS:
+        SupportGroup.objects.get_or_create(
+            slug=slug, defaults={'name': name, 'description': description}
+        )
+
+
+def delete_groups(apps, schema_editor):
+    SupportGroup = apps.get_model('post', 'SupportGroup')
+    SupportGroup.objects.filter(
+        slug__in=[slug for _, slug, _ in GROUPS]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0006_post_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupportGroup',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('name', models.CharField(max_length=80, unique=True)),
+                ('slug', models.SlugField(max_length=80, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('fanout', models.BooleanField(default=True)),
+                ('create_in', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupTimelineEntry',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('create_in', models.DateTimeField()),
+                (
+                    'post',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='post.post',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='group_timeline',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'group',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='post.supportgroup',
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupMembership',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('join_in', models.DateTimeField(auto_now_add=True)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='group_memberships',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'group',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='memberships',
+                        to='post.supportgroup',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='posts',
+                to='post.supportgroup',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['group', '-create_in', '-id'],
+                name='post_group_feed_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='grouptimelineentry',
+            index=models.Index(
+                fields=['user', '-create_in', '-post'],
+                name='group_timeline_idx',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='grouptimelineentry',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'post'), name='group_timeline_uniq'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='groupmembership',
+            constraint=models.UniqueConstraint(
+                fields=('group', 'user'), name='group_membership_uniq'
+            ),
+        ),
+        migrations.RunPython(create_groups, delete_groups),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0007_support_groups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskAlert',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('score', models.PositiveSmallIntegerField()),
+                ('phrases', models.JSONField(default=list)),
+                ('dictionary_version', models.CharField(max_length=12)),
+                ('create_in', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_in', models.DateTimeField(blank=True, null=True)),
+                (
+                    'post',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='risk_alert',
+                        to='post.post',
+                    ),
+                ),
+                (
+                    'reviewed_by',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='risk_alerts',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        fields=['user', '-create_in'],
+                        name='risk_alert_user_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0008_risk_alert'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='posts',
+                to='post.supportgroup',
+            ),
+        ),
+    ]
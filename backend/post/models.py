@@ -2,44 +2,313 @@ from django.db import models
 from django.conf import settings
 
 
+class Mood(models.IntegerChoices):
+    ALEGRE = 1, 'Alegre'
+    TRISTE = 2, 'Triste'
+    ANSIOSO = 3, 'Ansioso'
+    NEUTRO = 4, 'Neutro'
+    ASSUSTADO = 5, 'Assustado'
+    RAIVOSO = 6, 'Raivoso'
+    DEPRIMIDO = 7, 'Deprimido'
+    ENTUSIASMADO = 8, 'Entusiasmado'
+
+
+class Feeling(models.IntegerChoices):
+    RAIVA = 1, 'Raiva'
+    ALEGRIA = 2, 'Alegria'
+    MEDO = 3, 'Medo'
+    ANGUSTIA = 4, 'Angustia'
+    NEUTRO = 5, 'Neutro'
+    SEGURANCA = 6, 'Segurança'
+    INSEGURANCA = 7, 'Insegurança'
+
+
+class Motive(models.IntegerChoices):
+    LUTO = 1, 'Luto'
+    CANSACO = 2, 'Cansaço'
+    ESTRESSE = 3, 'Estresse'
+    SONO = 4, 'Sono'
+    SAUDADE = 5, 'Saudade'
+
+
+# Nome de cada valor na API, nos filtros e nas agregações. É o texto que
+# ficava gravado na coluna antes da migration 0005; não mude um nome sem
+# migrar os clientes, as PostRollup e os WellbeingDay.
+CHOICE_NAMES = {
+    'mood': {
+        Mood.ALEGRE: 'alegre',
+        Mood.TRISTE: 'triste',
+        Mood.ANSIOSO: 'ansioso',
+        Mood.NEUTRO: 'neutro',
+        Mood.ASSUSTADO: 'assustado',
+        Mood.RAIVOSO: 'raivoso',
+        Mood.DEPRIMIDO: 'deprimido',
+        Mood.ENTUSIASMADO: 'entusiasmado',
+    },
+    'feeling': {
+        Feeling.RAIVA: 'raiva',
+        Feeling.ALEGRIA: 'alegria',
+        Feeling.MEDO: 'medo',
+        Feeling.ANGUSTIA: 'angustia',
+        Feeling.NEUTRO: 'neutro',
+        Feeling.SEGURANCA: 'segurança',
+        Feeling.INSEGURANCA: 'insegurança',
+    },
+    'motive': {
+        Motive.LUTO: 'luto',
+        Motive.CANSACO: 'cansaço',
+        Motive.ESTRESSE: 'estresse',
+        Motive.SONO: 'sono',
+        Motive.SAUDADE: 'saudade',
+    },
+}
+CHOICE_VALUES = {
+    field: {name: value for value, name in names.items()}
+    for field, names in CHOICE_NAMES.items()
+}
+
+
 class Post(models.Model):
-    MOOD_CHOICES = [
-        ('alegre', 'Alegre'),
-        ('triste', 'Triste'),
-        ('ansioso', 'Ansioso'),
-        ('neutro', 'Neutro'),
-        ('assustado', 'Assustado'),
-        ('raivoso', 'Raivoso'),
-        ('deprimido', 'Deprimido'),
-        ('entusiasmado', 'Entusiasmado'),
-    ]
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+    )
+    mood = models.SmallIntegerField(choices=Mood.choices)
+    feeling = models.SmallIntegerField(choices=Feeling.choices)
+    motive = models.SmallIntegerField(choices=Motive.choices)
+    text = models.TextField(blank=True)
+    # Post público (sem grupo) ou feito dentro de um grupo de apoio
+    # PROTECT: com SET_NULL, apagar o grupo tornaria públicos os posts
+    # que eram só dos membros
+    group = models.ForeignKey(
+        'SupportGroup',
+        on_delete=models.PROTECT,
+        related_name='posts',
+        null=True,
+        blank=True,
+    )
+    create_in = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Índices compostos para a paginação por cursor do feed
+        indexes = [
+            models.Index(fields=['-create_in', '-id'], name='post_feed_idx'),
+            models.Index(
+                fields=['user', '-create_in', '-id'], name='post_user_feed_idx'
+            ),
+            models.Index(
+                fields=['mood', '-create_in', '-id'], name='post_mood_feed_idx'
+            ),
+            models.Index(
+                fields=['feeling', '-create_in', '-id'],
+                name='post_feeling_feed_idx',
+            ),
+            models.Index(
+                fields=['motive', '-create_in', '-id'],
+                name='post_motive_feed_idx',
+            ),
+            # Leitura sob demanda dos grupos grandes (sem fan-out)
+            models.Index(
+                fields=['group', '-create_in', '-id'],
+                name='post_group_feed_idx',
+            ),
+        ]
 
-    FEELING_CHOICES = [
-        ('raiva', 'Raiva'),
-        ('alegria', 'Alegria'),
-        ('medo', 'Medo'),
-        ('angustia', 'Angustia'),
-        ('neutro', 'Neutro'),
-        ('segurança', 'Segurança'),
-        ('insegurança', 'Insegurança'),
+    def __str__(self):
+        return (
+            f'{self.user.username} - {self.get_mood_display()} - '
+            f'{self.get_motive_display()}'
+        )
+
+
+class PostRollup(models.Model):
+    PERIOD_CHOICES = [
+        ('day', 'Dia'),
+        ('week', 'Semana'),
     ]
 
-    MOTIVE_CHOICES = [
-        ('luto', 'Luto'),
-        ('cansaço', 'Cansaço'),
-        ('estresse', 'Estresse'),
-        ('sono', 'Sono'),
-        ('saudade', 'Saudade'),
+    DIMENSION_CHOICES = [
+        ('mood', 'Humor'),
+        ('feeling', 'Sentimento'),
+        ('motive', 'Motivo'),
     ]
 
+    # user nulo guarda o total da plataforma
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='post_rollups',
+        null=True,
     )
-    mood = models.CharField(max_length=20, choices=MOOD_CHOICES)
-    feeling = models.CharField(max_length=20, choices=FEELING_CHOICES)
-    motive = models.CharField(max_length=20, choices=MOTIVE_CHOICES)
-    text = models.TextField(blank=True)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'period',
+                    'period_start',
+                    'dimension',
+                    'value',
+                ],
+                condition=models.Q(user__isnull=False),
+                name='post_rollup_user_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'dimension', 'value'],
+                condition=models.Q(user__isnull=True),
+                name='post_rollup_platform_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.user_id or 'plataforma'
+        return (
+            f'{scope} - {self.period} {self.period_start} - '
+            f'{self.dimension}={self.value}: {self.count}'
+        )
+
+
+class WellbeingDay(models.Model):
+    """Resumo diário dos posts de um usuário, para a linha do tempo."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='wellbeing_days',
+    )
+    day = models.DateField()
+    posts = models.PositiveIntegerField(default=0)
+    # Soma das notas de humor (ver post.timeline.MOOD_SCORES)
+    mood_score_sum = models.PositiveIntegerField(default=0)
+    # {valor: quantidade}
+    feelings = models.JSONField(default=dict)
+    motives = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day'], name='wellbeing_day_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.day}: {self.posts} posts'
+
+
+class SupportGroup(models.Model):
+    """Grupo de apoio temático, com timeline própria para os membros."""
+
+    name = models.CharField(max_length=80, unique=True)
+    slug = models.SlugField(max_length=80, unique=True)
+    description = models.TextField(blank=True)
+    member_count = models.PositiveIntegerField(default=0)
+    # False quando o grupo passa de GROUP_TIMELINE['FANOUT_MAX_MEMBERS']: os
+    # posts deixam de ser copiados e são lidos direto de Post
+    fanout = models.BooleanField(default=True)
     create_in = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f'{self.user.username} - {self.mood} - {self.motive}'
+        return self.name
+
+
+class GroupMembership(models.Model):
+    group = models.ForeignKey(
+        SupportGroup, on_delete=models.CASCADE, related_name='memberships'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='group_memberships',
+    )
+    join_in = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'user'], name='group_membership_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} em {self.group_id}'
+
+
+class GroupTimelineEntry(models.Model):
+    """
+    Cópia de um post de grupo na timeline de um membro, gravada quando o
+    post é criado (post.groups). A leitura é um range scan de user.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='group_timeline',
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    group = models.ForeignKey(
+        SupportGroup, on_delete=models.CASCADE, related_name='+'
+    )
+    # Copiado do post para ordenar sem join
+    create_in = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-create_in', '-post'],
+                name='group_timeline_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='group_timeline_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - post {self.post_id}'
+
+
+class RiskAlert(models.Model):
+    """
+    Post com frases de risco (post.risk), para os psicólogos do autor
+    revisarem. Um por post; o rescan atualiza só os ainda não revisados.
+    """
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, related_name='risk_alert'
+    )
+    # Copiado do post para listar os alertas dos pacientes sem join
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='risk_alerts',
+    )
+    score = models.PositiveSmallIntegerField()
+    # Frases encontradas, normalizadas e em ordem
+    phrases = models.JSONField(default=list)
+    # Versão do dicionário que gerou o alerta (RiskDetector.version)
+    dictionary_version = models.CharField(max_length=12)
+    create_in = models.DateTimeField(auto_now_add=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    reviewed_in = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-create_in'], name='risk_alert_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Alerta {self.score} - post {self.post_id}'
@@ -0,0 +1,222 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+
+from django.conf import settings
+
+from .models import CHOICE_VALUES, RiskAlert
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """Minúsculas, sem acentos e com um espaço entre as palavras (e nas
+    pontas), para as frases casarem só com palavras inteiras."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    plain = ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return f' {_SEPARATORS.sub(" ", plain).strip()} '
+
+
+class Automaton:
+    """
+    Aho-Corasick sobre as frases normalizadas: acha todas as ocorrências
+    num texto em uma passada, qualquer que seja o tamanho da lista.
+    """
+
+    def __init__(self, phrases):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for phrase in phrases:
+            state = 0
+            for char in phrase:
+                state = self._goto[state].setdefault(char, self._new_state())
+            self._output[state] += (phrase,)
+
+        # Falhas em largura: cada estado herda as saídas do seu sufixo
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self._goto[state].items():
+                queue.append(target)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[target] = self._goto[fail].get(char, 0)
+                self._output[target] += self._output[self._fail[target]]
+
+    def _new_state(self):
+        self._goto.append({})
+        self._fail.append(0)
+        self._output.append(())
+        return len(self._goto) - 1
+
+    def find(self, text):
+        """Frases presentes em `text` (já normalizado), sem repetição."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def load_phrases(path):
+    """{frase normalizada: peso} a partir do arquivo de frases."""
+    phrases = {}
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            weight, phrase = line.split(maxsplit=1)
+            phrases[normalize(phrase)] = int(weight)
+    return phrases
+
+
+class RiskDetector:
+    """
+    Pontua cada post pela soma dos pesos das frases encontradas e do peso do
+    humor. Gera alerta quando há ao menos uma frase e a soma chega ao limite.
+    """
+
+    def __init__(self, phrases, mood_weights, threshold):
+        self.phrases = phrases
+        self.mood_weights = {
+            CHOICE_VALUES['mood'][name]: weight
+            for name, weight in mood_weights.items()
+        }
+        self.threshold = threshold
+        self.automaton = Automaton(phrases)
+
+        # Muda com a lista, os pesos ou o limite: marca quais alertas
+        # vieram de qual dicionário
+        signature = repr(
+            (sorted(phrases.items()), sorted(mood_weights.items()), threshold)
+        )
+        self.version = hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+        self._lock = threading.Lock()
+        self.scanned = 0
+        self.alerts = 0
+        self.seconds = 0.0
+
+    def score(self, post):
+        """(pontuação, frases em ordem) do post; (0, []) sem frase de risco."""
+        found = self.automaton.find(normalize(post.text)) if post.text else ()
+        if not found:
+            return 0, []
+        score = sum(self.phrases[phrase] for phrase in found)
+        score += self.mood_weights.get(post.mood, 0)
+        return score, sorted(phrase.strip() for phrase in found)
+
+    def alerts_for(self, posts):
+        """RiskAlerts (não gravados) dos posts que passam do limite."""
+        started = time.perf_counter()
+        alerts = []
+        for post in posts:
+            score, phrases = self.score(post)
+            if phrases and score >= self.threshold:
+                alerts.append(
+                    RiskAlert(
+                        post_id=post.id,
+                        user_id=post.user_id,
+                        score=score,
+                        phrases=phrases,
+                        dictionary_version=self.version,
+                    )
+                )
+
+        with self._lock:
+            self.scanned += len(posts)
+            self.alerts += len(alerts)
+            self.seconds += time.perf_counter() - started
+        return alerts
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self.version,
+                'phrases': len(self.phrases),
+                'scanned': self.scanned,
+                'alerts': self.alerts,
+                'us_per_post': round(
+                    self.seconds / self.scanned * 1_000_000, 2
+                )
+                if self.scanned
+                else None,
+            }
+
+
+def scan(posts):
+    """Grava os alertas dos posts; os que já têm alerta ficam como estão."""
+    alerts = get_detector().alerts_for(posts)
+    if alerts:
+        RiskAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+    return len(alerts)
+
+
+def rescan(posts):
+    """
+    Reaplica o dicionário atual a posts já gravados, em ordem de id: grava
+    ou atualiza os alertas ainda não revisados e apaga os que deixaram de
+    casar. Os revisados ficam como estão. Devolve (alertas, removidos).
+    """
+    if not posts:
+        return 0, 0
+    existing = RiskAlert.objects.filter(
+        post_id__gte=posts[0].id, post_id__lte=posts[-1].id
+    )
+    reviewed = set(
+        existing.filter(reviewed_in__isnull=False).values_list(
+            'post_id', flat=True
+        )
+    )
+
+    alerts = [
+        alert
+        for alert in get_detector().alerts_for(posts)
+        if alert.post_id not in reviewed
+    ]
+    if alerts:
+        RiskAlert.objects.bulk_create(
+            alerts,
+            update_conflicts=True,
+            unique_fields=['post'],
+            update_fields=['score', 'phrases', 'dictionary_version'],
+        )
+    removed, _ = (
+        existing.filter(reviewed_in__isnull=True)
+        .exclude(post_id__in=[alert.post_id for alert in alerts])
+        .delete()
+    )
+    return len(alerts), removed
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    global _detector
+
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                config = getattr(settings, 'RISK_DETECTION', {})
+                _detector = RiskDetector(
+                    load_phrases(config['PHRASES_FILE']),
+                    config.get('MOOD_WEIGHTS', {}),
+                    config.get('THRESHOLD', 5),
+                )
+    return _detector
@@ -0,0 +1,119 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CHOICE_NAMES
+
+DIMENSIONS = ('mood', 'feeling', 'motive')
+
+
+def period_starts(created):
+    day = timezone.localdate(created)
+    return (('day', day), ('week', day - timedelta(days=day.weekday())))
+
+
+def rollup_keys(post):
+    for period, period_start in period_starts(post.create_in):
+        for dimension in DIMENSIONS:
+            # As agregações guardam o nome, como a API devolve
+            value = CHOICE_NAMES[dimension][getattr(post, dimension)]
+            yield (post.user_id, period, period_start, dimension, value)
+            yield (None, period, period_start, dimension, value)
+
+
+# Um INSERT ... ON CONFLICT por linha, somando à contagem existente. Cada
+# escopo tem o seu índice único parcial, e o alvo do conflito repete o
+# WHERE dele (SQLite 3.24+ e PostgreSQL).
+UPSERT_SQL = (
+    'INSERT INTO post_postrollup '
+    '(user_id, period, period_start, dimension, value, count) '
+    'VALUES (%s, %s, %s, %s, %s, %s) '
+    'ON CONFLICT ({target}) WHERE {scope} '
+    'DO UPDATE SET count = post_postrollup.count + excluded.count'
+)
+USER_UPSERT_SQL = UPSERT_SQL.format(
+    target='user_id, period, period_start, dimension, value',
+    scope='user_id IS NOT NULL',
+)
+PLATFORM_UPSERT_SQL = UPSERT_SQL.format(
+    target='period, period_start, dimension, value',
+    scope='user_id IS NULL',
+)
+
+
+# Para posts apagados: desconta até zero (as agregações podem ter sido
+# reconstruídas depois deles) e apaga as linhas que zeraram.
+DECREMENT_SQL = (
+    'UPDATE post_postrollup SET count = '
+    'CASE WHEN count > %s THEN count - %s ELSE 0 END '
+    'WHERE {scope} AND period = %s AND period_start = %s '
+    'AND dimension = %s AND value = %s'
+)
+EMPTY_SQL = (
+    'DELETE FROM post_postrollup WHERE {scope} AND period = %s '
+    'AND period_start = %s AND dimension = %s AND value = %s AND count = 0'
+)
+USER_SCOPE = 'user_id = %s'
+PLATFORM_SCOPE = 'user_id IS NULL'
+
+
+def apply_posts(posts):
+    """Soma os posts informados às agregações por dia e por semana."""
+    write_counts(Counter(key for post in posts for key in rollup_keys(post)))
+
+
+def remove_posts(posts):
+    """Desconta das agregações os posts informados (antes de apagá-los)."""
+    user_rows, platform_rows = _rows(
+        Counter(key for post in posts for key in rollup_keys(post))
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        # As linhas da plataforma não passam o user_id: o escopo é IS NULL
+        for scope, rows, key_start in (
+            (USER_SCOPE, user_rows, 0),
+            (PLATFORM_SCOPE, platform_rows, 1),
+        ):
+            if not rows:
+                continue
+            cursor.executemany(
+                DECREMENT_SQL.format(scope=scope),
+                [(row[-1], row[-1], *row[key_start:-1]) for row in rows],
+            )
+            cursor.executemany(
+                EMPTY_SQL.format(scope=scope),
+                [row[key_start:-1] for row in rows],
+            )
+
+
+def _rows(counts):
+    """
+    Linhas (user_id, period, period_start, dimension, value, n) de cada
+    escopo, em ordem: duas transações nunca travam as mesmas linhas ao
+    contrário.
+    """
+    adapt = connection.ops.adapt_datefield_value
+    user_rows, platform_rows = [], []
+    for key in sorted(counts, key=lambda key: (key[0] or 0, *key[1:])):
+        user_id, period, period_start, dimension, value = key
+        row = (
+            user_id,
+            period,
+            adapt(period_start),
+            dimension,
+            value,
+            counts[key],
+        )
+        (platform_rows if user_id is None else user_rows).append(row)
+    return user_rows, platform_rows
+
+
+def write_counts(counts):
+    """Soma {(user_id, period, period_start, dimension, value): n}."""
+    user_rows, platform_rows = _rows(counts)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if user_rows:
+            cursor.executemany(USER_UPSERT_SQL, user_rows)
+        if platform_rows:
+            cursor.executemany(PLATFORM_UPSERT_SQL, platform_rows)
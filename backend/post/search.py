@@ -0,0 +1,238 @@
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'sqlite': 'post.search.SQLiteSearch',
+    'postgresql': 'post.search.PostgresSearch',
+}
+SEARCH_FILTERS = ('mood', 'feeling', 'motive')
+
+_WORD = re.compile(r'\w+')
+
+# Palavras que aparecem em quase todo post e só incham o índice
+STOPWORDS = frozenset(
+    (
+        'a o e as os um uma uns umas de da do das dos em na no nas nos '
+        'para pra por pelo pela com sem que se ao aos ou mas como '
+        'eu me mim meu minha ele ela isso isto esse essa este esta foi '
+        'ser ter estar ja tao'
+    ).split()
+)
+
+
+def _unaccent(text):
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+
+
+def _plural(word):
+    if len(word) > 4 and word.endswith('es') and word[-3] in 'rslz':
+        return word[:-2]
+    if len(word) > 3 and word.endswith('ns'):
+        return word[:-2] + 'm'
+    if len(word) > 4 and word.endswith(('eis', 'ois')):
+        return word[:-2] + 'l'
+    if len(word) > 4 and word.endswith('ais'):
+        return word[:-2] + 'l'
+    if len(word) > 4 and word.endswith(('oes', 'aes')):
+        return word[:-3] + 'ao'
+    if len(word) > 6 and word.endswith('mente'):
+        return word[:-5]
+    if len(word) > 3 and word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def _feminine(word):
+    if len(word) > 7 and word.endswith(('inha', 'iaca', 'eira')):
+        return word[:-1] + 'o'
+    if len(word) > 6:
+        if word.endswith(('osa', 'ica', 'ida', 'ada', 'iva', 'ama', 'na')):
+            return word[:-1] + 'o'
+        if word.endswith(('ora', 'esa')):
+            return word[:-1]
+    return word
+
+
+def stem(word):
+    """
+    Radical "leve" de uma palavra já sem acentos (Savoy, o mesmo do
+    PortugueseLightStemmer do Lucene): tira plural, feminino e a vogal final.
+    """
+    if len(word) < 4:
+        return word
+    word = _plural(word)
+    if len(word) > 3 and word.endswith('a'):
+        word = _feminine(word)
+    if len(word) > 4 and word[-1] in 'aeo':
+        word = word[:-1]
+    return word
+
+
+def terms(text):
+    """Termos indexados: sem acento, sem stopwords e reduzidos ao radical."""
+    return [
+        stem(word)
+        for word in _WORD.findall(_unaccent(text))
+        if word not in STOPWORDS
+    ]
+
+
+class SearchBackend:
+    """
+    Índice textual de Post.text. O texto passa por `terms()` aqui, em
+    Python, nos dois bancos; assim a mesma consulta acha os mesmos posts no
+    SQLite e no PostgreSQL.
+    """
+
+    def __init__(self, max_terms=8, candidates=2000):
+        self.max_terms = max_terms
+        # Só os `candidates` matches mais recentes são ranqueados: o custo
+        # fica constante mesmo quando o termo aparece em milhões de posts
+        self.candidates = candidates
+
+    def index(self, posts):
+        """Grava (ou atualiza) os posts no índice."""
+        rows, empty = [], []
+        for post in posts:
+            words = ' '.join(terms(post.text))
+            if words:
+                rows.append((post.id, words))
+            else:
+                empty.append((post.id,))
+
+        with connection.cursor() as cursor:
+            if rows:
+                cursor.executemany(self.upsert_sql, rows)
+            if empty:
+                cursor.executemany(self.delete_sql, empty)
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                self.delete_sql, [(post_id,) for post_id in post_ids]
+            )
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, filters=None, limit=20, offset=0):
+        """
+        Ids dos posts que têm todos os termos, do mais relevante ao menos,
+        entre os `candidates` mais recentes.
+        """
+        words = list(dict.fromkeys(terms(query)))[: self.max_terms]
+        if not words:
+            return []
+
+        # Posts de grupo ficam fora da busca pública
+        conditions, params = ['post_post.group_id IS NULL'], []
+        for field, value in (filters or {}).items():
+            if field not in SEARCH_FILTERS:
+                raise ValueError(f'Filtro de busca inválido: {field}')
+            conditions.append(f'post_post.{field} = %s')
+            params.append(value)
+
+        sql, match_params = self.search_sql(words)
+        where = ''.join(f' AND {condition}' for condition in conditions)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql.format(where=where),
+                [*match_params, *params, self.candidates, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteSearch(SearchBackend):
+    """
+    Tabela virtual FTS5 `post_search` (rowid = id do post), ordenada por
+    bm25.
+    """
+
+    upsert_sql = (
+        'INSERT OR REPLACE INTO post_search (rowid, terms) VALUES (%s, %s)'
+    )
+    delete_sql = 'DELETE FROM post_search WHERE rowid = %s'
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM post_search')
+
+    def search_sql(self, words):
+        # Cada termo entre aspas: nada do texto vira operador do FTS5
+        match = ' '.join(f'"{word}"' for word in words)
+        # O FTS5 devolve os matches já em ordem de rowid; o bm25 (rank) só
+        # é calculado para os candidatos
+        sql = (
+            'SELECT id FROM ('
+            'SELECT post_post.id, post_search.rank AS score '
+            'FROM post_search '
+            'JOIN post_post ON post_post.id = post_search.rowid '
+            'WHERE post_search MATCH %s{where} '
+            'ORDER BY post_search.rowid DESC LIMIT %s'
+            ') ORDER BY score, id DESC LIMIT %s OFFSET %s'
+        )
+        return sql, [match]
+
+
+class PostgresSearch(SearchBackend):
+    """
+    Tabela `post_search` com um tsvector por post e índice GIN, ordenada por
+    ts_rank. A FK com ON DELETE CASCADE cobre até os DELETEs feitos fora do
+    ORM.
+    """
+
+    upsert_sql = (
+        'INSERT INTO post_search (post_id, terms) '
+        "VALUES (%s, to_tsvector('simple', %s)) "
+        'ON CONFLICT (post_id) DO UPDATE SET terms = EXCLUDED.terms'
+    )
+    delete_sql = 'DELETE FROM post_search WHERE post_id = %s'
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE post_search')
+
+    def search_sql(self, words):
+        # Os termos já passaram pelo stemmer: 'simple' só separa e indexa
+        sql = (
+            'SELECT id FROM ('
+            'SELECT post_post.id, ts_rank(post_search.terms, query) AS score '
+            'FROM post_search '
+            'JOIN post_post ON post_post.id = post_search.post_id, '
+            "plainto_tsquery('simple', %s) query "
+            'WHERE post_search.terms @@ query{where} '
+            'ORDER BY post_search.post_id DESC LIMIT %s'
+            ') candidates ORDER BY score DESC, id DESC LIMIT %s OFFSET %s'
+        )
+        return sql, [' '.join(words)]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'POST_SEARCH', {})
+                path = config.get('BACKEND') or BACKENDS.get(connection.vendor)
+                if path is None:
+                    raise ImproperlyConfigured(
+                        f'Sem busca textual para o banco {connection.vendor}'
+                        ": defina POST_SEARCH['BACKEND']."
+                    )
+                backend = import_string(path)
+                _backend = backend(**config.get('OPTIONS', {}))
+    return _backend
@@ -1,9 +1,76 @@
 from rest_framework import serializers
-from .models import Post
+from .models import CHOICE_NAMES, Post, RiskAlert, SupportGroup
+
+
+class ChoiceNameField(serializers.ChoiceField):
+    """Recebe e devolve o nome em texto ('cansaço'); grava o inteiro."""
+
+    def __init__(self, names, **kwargs):
+        self.names = names
+        self.values = {name: value for value, name in names.items()}
+        super().__init__(choices=list(self.values), **kwargs)
+
+    def to_internal_value(self, data):
+        return self.values[super().to_internal_value(data)]
+
+    def to_representation(self, value):
+        return self.names[value]
 
 
 class PostSerializer(serializers.ModelSerializer):
+    mood = ChoiceNameField(CHOICE_NAMES['mood'])
+    feeling = ChoiceNameField(CHOICE_NAMES['feeling'])
+    motive = ChoiceNameField(CHOICE_NAMES['motive'])
+    # Só o id: validar aqui consultaria o banco dentro da view assíncrona.
+    # A participação no grupo é conferida na view.
+    group = serializers.IntegerField(
+        source='group_id', required=False, allow_null=True
+    )
+
     class Meta:
         model = Post
-        fields = ['id', 'mood', 'feeling', 'motive', 'text', 'create_in']
-        read_only_fields = ['id', 'create_in']
+        fields = [
+            'id',
+            'user',
+            'mood',
+            'feeling',
+            'motive',
+            'text',
+            'group',
+            'create_in',
+        ]
+        read_only_fields = ['id', 'user', 'create_in']
+
+
+class SupportGroupSerializer(serializers.ModelSerializer):
+    is_member = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SupportGroup
+        fields = [
+            'id',
+            'name',
+            'slug',
+            'description',
+            'member_count',
+            'is_member',
+        ]
+
+    def get_is_member(self, group):
+        return group.id in self.context.get('member_of', ())
+
+
+class RiskAlertSerializer(serializers.ModelSerializer):
+    post = PostSerializer(read_only=True)
+
+    class Meta:
+        model = RiskAlert
+        fields = [
+            'id',
+            'post',
+            'user',
+            'score',
+            'phrases',
+            'create_in',
+            'reviewed_in',
+        ]
@@ -0,0 +1,166 @@
+import copy
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from app import response_cache
+
+from .broker import FILTER_FIELDS, get_broker
+from .models import Post
+from . import groups, risk, rollups, timeline
+from .search import get_search_backend
+
+# Enviado com `posts=[...]` sempre que posts novos são gravados, tanto por
+# save() quanto por bulk_create() (que não dispara post_save).
+posts_created = Signal()
+
+# Campos que decidem em quais agregações o post conta
+CLASSIFICATION = ('mood', 'feeling', 'motive')
+
+# Dentro de removing_posts(), os posts apagados são descontados de uma vez
+# na saída, e não um a um no post_delete
+_removed = ContextVar('removed_posts', default=None)
+
+
+@contextmanager
+def removing_posts():
+    """Agrupa o desconto dos posts apagados dentro do bloco."""
+    posts = []
+    token = _removed.set(posts)
+    try:
+        yield
+    finally:
+        _removed.reset(token)
+    if posts:
+        _discount(posts)
+
+
+def _discount(posts):
+    rollups.remove_posts(posts)
+    timeline.remove_posts(posts)
+
+
+@receiver(post_init, sender=Post)
+def remember_classification(sender, instance, **kwargs):
+    # Para descontar a classificação antiga quando o post muda. Campos
+    # adiados (only/defer) ficam None: ler um deles faria uma query
+    instance._classification = tuple(
+        instance.__dict__.get(field) for field in CLASSIFICATION
+    )
+
+
+def _reclassified(instance):
+    """Cópia do post com a classificação antiga, se ela mudou."""
+    old = instance._classification
+    new = tuple(getattr(instance, field) for field in CLASSIFICATION)
+    instance._classification = new
+    if None in old or old == new:
+        return None
+    previous = copy.copy(instance)
+    for field, value in zip(CLASSIFICATION, old):
+        setattr(previous, field, value)
+    return previous
+
+
+@receiver(post_save, sender=Post)
+def announce_post(sender, instance, created, **kwargs):
+    if created:
+        instance._classification = tuple(
+            getattr(instance, field) for field in CLASSIFICATION
+        )
+        posts_created.send(sender=Post, posts=[instance])
+        return
+
+    previous = _reclassified(instance)
+    if previous is not None:
+        # Na mesma transação do save: sai das contagens antigas, entra nas
+        # novas
+        _discount([previous])
+        rollups.apply_posts([instance])
+        timeline.apply_posts([instance])
+    _invalidate_responses([instance])
+    get_search_backend().index([instance])
+    risk.rescan([instance])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _invalidate_responses([instance])
+    get_search_backend().remove([instance.id])
+    pending = _removed.get()
+    if pending is None:
+        _discount([instance])
+    else:
+        pending.append(instance)
+
+
+def _invalidate_responses(posts):
+    response_cache.invalidate(
+        response_cache.posts_tag(),
+        *{response_cache.posts_tag(post.user_id) for post in posts},
+    )
+
+
+@receiver(posts_created, sender=Post)
+def update_rollups(sender, posts, **kwargs):
+    rollups.apply_posts(posts)
+
+
+@receiver(posts_created, sender=Post)
+def update_timeline(sender, posts, **kwargs):
+    timeline.apply_posts(posts)
+
+
+@receiver(posts_created, sender=Post)
+def fan_out_posts(sender, posts, **kwargs):
+    groups.fan_out(posts)
+
+
+@receiver(posts_created, sender=Post)
+def detect_risk(sender, posts, **kwargs):
+    risk.scan(posts)
+
+
+@receiver(posts_created, sender=Post)
+def index_posts(sender, posts, **kwargs):
+    get_search_backend().index(posts)
+
+
+@receiver(posts_created, sender=Post)
+def invalidate_responses(sender, posts, **kwargs):
+    _invalidate_responses(posts)
+
+
+@receiver(posts_created, sender=Post)
+def publish_posts(sender, posts, **kwargs):
+    from .serializers import PostSerializer
+
+    # Serializa uma vez por post; cada assinante recebe a mesma string
+    messages = []
+    for post in posts:
+        if post.group_id is not None:
+            # O stream é público; posts de grupo são só dos membros
+            continue
+        data = PostSerializer(post).data
+        messages.append(
+            {
+                'id': post.id,
+                # Os filtros dos assinantes usam os nomes, como a API
+                **{field: data[field] for field in FILTER_FIELDS},
+                'data': json.dumps(data, ensure_ascii=False),
+            }
+        )
+
+    if not messages:
+        return
+
+    def publish():
+        broker = get_broker()
+        for message in messages:
+            broker.publish(message)
+
+    transaction.on_commit(publish)
@@ -1,3 +1,552 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import ProtectedError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from user.tests import APITestCase
+
+from . import groups, risk
+from .models import (
+    Feeling,
+    GroupMembership,
+    GroupTimelineEntry,
+    Mood,
+    Motive,
+    Post,
+    PostRollup,
+    RiskAlert,
+    SupportGroup,
+    WellbeingDay,
+)
+
+
+class FeedPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        now = timezone.now()
+        # Três instantes com empates: o id desempata dentro de cada um
+        for offset in (0, 0, 0, 1, 1, 2, 2):
+            post = self.create_post(self.ana)
+            Post.objects.filter(id=post.id).update(
+                create_in=now - timedelta(minutes=offset)
+            )
+        self.expected = list(
+            Post.objects.order_by('-create_in', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def create_post(self, user, **fields):
+        return Post.objects.create(
+            user=user,
+            mood=Mood.TRISTE,
+            feeling=Feeling.MEDO,
+            motive=Motive.CANSACO,
+            text='Um dia difícil.',
+            **fields,
+        )
+
+    def feed(self, **params):
+        return self.client.get(
+            reverse('post-feed'), params, **self.auth(self.ana)
+        )
+
+    def walk(self, limit):
+        """Ids de todas as páginas, seguindo o cursor até o fim."""
+        ids, pages, cursor = [], 0, None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.feed(**params).json()
+            ids += [post['id'] for post in data['results']]
+            pages += 1
+            cursor = data['next']
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_cover_every_post_once_across_ties(self):
+        for limit in (1, 2, 3, 4):
+            with self.subTest(limit=limit):
+                ids, pages = self.walk(limit)
+                self.assertEqual(ids, self.expected)
+                self.assertEqual(pages, -(-len(self.expected) // limit))
+
+    def test_exact_last_page_has_no_cursor(self):
+        data = self.feed(limit=len(self.expected)).json()
+        self.assertEqual(len(data['results']), len(self.expected))
+        self.assertIsNone(data['next'])
+
+    def test_one_short_of_the_end_has_cursor(self):
+        data = self.feed(limit=len(self.expected) - 1).json()
+        self.assertIsNotNone(data['next'])
+        rest = self.feed(limit=10, cursor=data['next']).json()
+        self.assertEqual(
+            [post['id'] for post in rest['results']], self.expected[-1:]
+        )
+        self.assertIsNone(rest['next'])
+
+    def test_new_post_does_not_shift_later_pages(self):
+        first = self.feed(limit=3).json()
+        self.create_post(self.ana)
+        second = self.feed(limit=3, cursor=first['next']).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], self.expected[3:6]
+        )
+
+    def test_rejects_limit_out_of_range(self):
+        self.assertEqual(self.feed(limit=0).status_code, 400)
+        self.assertEqual(self.feed(limit=101).status_code, 400)
+
+    def test_rejects_invalid_cursor(self):
+        self.assertEqual(self.feed(cursor='não-é-cursor').status_code, 400)
+
+    def test_leaves_group_posts_out(self):
+        group = SupportGroup.objects.create(name='Luto', slug='luto')
+        self.create_post(self.ana, group=group)
+        ids, _ = self.walk(10)
+        self.assertEqual(ids, self.expected)
+
+    def test_group_with_posts_cannot_be_deleted(self):
+        group = SupportGroup.objects.create(name='Luto', slug='luto')
+        post = self.create_post(self.ana, group=group)
+        with self.assertRaises(ProtectedError):
+            group.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.group_id, group.id)
+
+
+class RiskDetectionTests(SimpleTestCase):
+    def detector(self, threshold=5):
+        phrases = {
+            risk.normalize(phrase): weight
+            for phrase, weight in (
+                ('me matar', 5),
+                ('vou me matar', 5),
+                ('sem esperança', 3),
+                ('sozinho', 1),
+            )
+        }
+        return risk.RiskDetector(phrases, {'deprimido': 2}, threshold)
+
+    def post(self, text, mood=Mood.NEUTRO):
+        return SimpleNamespace(id=1, user_id=1, text=text, mood=mood)
+
+    def test_normalize(self):
+        self.assertEqual(
+            risk.normalize('  Sem ESPERANÇA,já...\nNão_dá! '),
+            ' sem esperanca ja nao da ',
+        )
+        self.assertEqual(risk.normalize(''), '  ')
+
+    def test_automaton_finds_overlapping_phrases(self):
+        automaton = risk.Automaton([' me matar ', ' vou me matar ', ' vou '])
+        self.assertEqual(
+            automaton.find(' eu vou me matar hoje '),
+            {' me matar ', ' vou me matar ', ' vou '},
+        )
+
+    def test_automaton_matches_whole_words_only(self):
+        automaton = risk.Automaton([' sozinho ', ' me matar '])
+        self.assertEqual(automaton.find(' sozinhos e me matarei '), set())
+
+    def test_automaton_ignores_accents_and_case(self):
+        automaton = risk.Automaton([risk.normalize('sem esperança')])
+        self.assertEqual(
+            automaton.find(risk.normalize('Estou SEM esperanca.')),
+            {' sem esperanca '},
+        )
+
+    def test_score_sums_phrases_and_mood(self):
+        detector = self.detector()
+        score, phrases = detector.score(
+            self.post('Sozinho e sem esperança.', Mood.DEPRIMIDO)
+        )
+        self.assertEqual(score, 6)
+        self.assertEqual(phrases, ['sem esperanca', 'sozinho'])
+
+    def test_mood_alone_does_not_score(self):
+        detector = self.detector(threshold=1)
+        self.assertEqual(
+            detector.score(self.post('Dia comum.', Mood.DEPRIMIDO)), (0, [])
+        )
+        self.assertEqual(
+            detector.alerts_for([self.post('', Mood.DEPRIMIDO)]), []
+        )
+
+    def test_threshold(self):
+        detector = self.detector()
+        below = self.post('Sem esperança.')
+        at = self.post('Sem esperança.', Mood.DEPRIMIDO)
+        self.assertEqual(detector.score(below)[0], 3)
+        self.assertEqual(detector.alerts_for([below]), [])
+        [alert] = detector.alerts_for([at])
+        self.assertEqual(alert.score, 5)
+        self.assertEqual(alert.dictionary_version, detector.version)
+        self.assertEqual(detector.stats()['scanned'], 2)
+        self.assertEqual(detector.stats()['alerts'], 1)
+
+    def test_version_follows_dictionary(self):
+        self.assertEqual(self.detector().version, self.detector().version)
+        self.assertNotEqual(
+            self.detector().version, self.detector(threshold=6).version
+        )
+
+
+class RiskRescanTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        self.psychologist = self.create_user('psi', type='psychologist')
+        self.posts = [
+            Post.objects.create(
+                user=self.ana,
+                mood=Mood.TRISTE,
+                feeling=Feeling.MEDO,
+                motive=Motive.CANSACO,
+                text=text,
+            )
+            for text in (
+                'Quero morrer.',
+                'Quero morrer de novo.',
+                'Estou sem esperança.',
+                'Um dia comum.',
+            )
+        ]
+
+    def alerts(self):
+        return dict(
+            RiskAlert.objects.values_list('post_id', 'dictionary_version')
+        )
+
+    def test_new_posts_are_scanned(self):
+        self.assertEqual(
+            set(self.alerts()), {self.posts[0].id, self.posts[1].id}
+        )
+
+    def test_rescan_applies_new_dictionary(self):
+        reviewed = RiskAlert.objects.get(post=self.posts[1])
+        reviewed.reviewed_by = self.psychologist
+        reviewed.reviewed_in = timezone.now()
+        reviewed.save()
+        old_version = reviewed.dictionary_version
+
+        detector = risk.RiskDetector(
+            {risk.normalize('sem esperança'): 5}, {}, 5
+        )
+        with mock.patch.object(risk, '_detector', detector):
+            self.assertEqual(risk.rescan(self.posts), (1, 1))
+
+        # O não revisado que deixou de casar sai; o revisado fica como está
+        self.assertEqual(
+            self.alerts(),
+            {
+                self.posts[1].id: old_version,
+                self.posts[2].id: detector.version,
+            },
+        )
+
+    def test_rescan_updates_unreviewed_alerts(self):
+        detector = risk.RiskDetector(
+            {risk.normalize('quero morrer'): 7}, {}, 5
+        )
+        with mock.patch.object(risk, '_detector', detector):
+            self.assertEqual(risk.rescan(self.posts), (2, 0))
+        self.assertEqual(
+            set(RiskAlert.objects.values_list('score', 'dictionary_version')),
+            {(7, detector.version)},
+        )
+
+    def test_rescan_without_posts(self):
+        self.assertEqual(risk.rescan([]), (0, 0))
+
+
+@override_settings(
+    GROUP_TIMELINE={
+        **settings.GROUP_TIMELINE,
+        'BATCH_SIZE': 2,
+        'WORKER': False,
+    }
+)
+class GroupLeaveTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        self.bia = self.create_user('bia')
+        self.group = SupportGroup.objects.create(name='Luto', slug='luto')
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in (self.ana, self.bia):
+                groups.join(user, self.group)
+            for _ in range(5):
+                Post.objects.create(
+                    user=self.bia,
+                    group=self.group,
+                    mood=Mood.TRISTE,
+                    feeling=Feeling.MEDO,
+                    motive=Motive.LUTO,
+                    text='Saudade.',
+                )
+
+    def entries(self):
+        return GroupTimelineEntry.objects.filter(user=self.ana).count()
+
+    def test_cleanup_runs_after_commit(self):
+        self.assertEqual(self.entries(), 5)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertTrue(groups.leave(self.ana, self.group))
+        # As cópias ficam até a limpeza, mas a leitura já as ignora
+        self.assertEqual(self.entries(), 5)
+        self.assertEqual(groups.timeline_keys(self.ana, 10), [])
+        self.assertEqual(len(groups.timeline_keys(self.bia, 10)), 5)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.entries(), 0)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.member_count, 1)
+
+    def test_rejoin_before_cleanup_keeps_the_timeline(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            groups.leave(self.ana, self.group)
+        groups.join(self.ana, self.group)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.entries(), 5)
+        self.assertEqual(len(groups.timeline_keys(self.ana, 10)), 5)
+
+    def test_leave_twice(self):
+        self.assertTrue(groups.leave(self.ana, self.group))
+        self.assertFalse(groups.leave(self.ana, self.group))
+        self.assertFalse(
+            GroupMembership.objects.filter(user=self.ana).exists()
+        )
+
+
+class AggregateConsistencyTests(APITestCase):
+    """As agregações acompanham edições e exclusões como um rebuild."""
+
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        self.bia = self.create_user('bia')
+        self.posts = [
+            Post.objects.create(
+                user=user,
+                mood=mood,
+                feeling=Feeling.MEDO,
+                motive=Motive.CANSACO,
+                text='Um dia difícil.',
+            )
+            for user in (self.ana, self.bia)
+            for mood in (Mood.TRISTE, Mood.TRISTE, Mood.ALEGRE)
+        ]
+
+    def snapshot(self):
+        rollups = sorted(
+            PostRollup.objects.values_list(
+                'user_id',
+                'period',
+                'period_start',
+                'dimension',
+                'value',
+                'count',
+            ),
+            key=lambda row: (row[0] or 0, *row[1:]),
+        )
+        days = list(
+            WellbeingDay.objects.order_by('user', 'day').values_list(
+                'user_id',
+                'day',
+                'posts',
+                'mood_score_sum',
+                'feelings',
+                'motives',
+            )
+        )
+        return rollups, days
+
+    def assertMatchesRebuild(self):
+        current = self.snapshot()
+        call_command('backfill_post_rollups', stdout=io.StringIO())
+        call_command('backfill_wellbeing_timeline', stdout=io.StringIO())
+        self.assertEqual(current, self.snapshot())
+
+    def test_delete(self):
+        self.posts[0].delete()
+        self.assertMatchesRebuild()
+
+    def test_queryset_delete(self):
+        Post.objects.filter(mood=Mood.TRISTE).delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(PostRollup.objects.filter(value='triste').exists())
+
+    def test_deleting_last_post_of_the_day_drops_the_day(self):
+        Post.objects.filter(user=self.ana).delete()
+        self.assertFalse(WellbeingDay.objects.filter(user=self.ana).exists())
+        self.assertMatchesRebuild()
+
+    def test_reclassification(self):
+        post = self.posts[0]
+        post.mood = Mood.ALEGRE
+        post.feeling = Feeling.RAIVA
+        post.save()
+        self.assertMatchesRebuild()
+
+    def test_edit_without_reclassification(self):
+        post = Post.objects.only('id', 'text').get(id=self.posts[0].id)
+        post.text = 'Editado.'
+        post.save()
+        self.assertMatchesRebuild()
+
+
+@override_settings(
+    QUERY_PROFILING={
+        **settings.QUERY_PROFILING,
+        'ASSERT_BUDGETS': True,
+        'LOG': False,
+    }
+)
+class QueryBudgetTests(APITestCase):
+    """Com ASSERT_BUDGETS, passar do orçamento da rota falha o teste."""
+
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana', type='user')
+        self.psychologist = self.create_user('psi', type='psychologist')
+        self.group = SupportGroup.objects.create(name='Luto', slug='luto')
+        self.post_data = {
+            'mood': 'triste',
+            'feeling': 'medo',
+            'motive': 'sono',
+            'text': 'Não consigo dormir há dias.',
+        }
+
+    def get(self, name, user=None, **params):
+        response = self.client.get(
+            reverse(name), params, **self.auth(user or self.ana)
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def post(self, name, data, args=()):
+        response = self.client.post(
+            reverse(name, args=args),
+            data,
+            content_type='application/json',
+            **self.auth(self.ana),
+        )
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_create_post(self):
+        self.post('create-post', self.post_data)
+
+    def test_bulk_create_post(self):
+        self.post('bulk-create-post', [self.post_data] * 20)
+
+    def test_feed(self):
+        self.post('bulk-create-post', [self.post_data] * 5)
+        first = self.get('post-feed', limit=2).json()
+        self.get('post-feed', limit=2, cursor=first['next'])
+        self.get('post-feed', mood='triste')
+
+    def test_search(self):
+        self.post('create-post', self.post_data)
+        self.get('post-search', q='dormir')
+
+    def test_analytics(self):
+        self.post('create-post', self.post_data)
+        self.get('post-analytics')
+        self.get('post-analytics', period='week', scope='platform')
+
+    def test_groups(self):
+        self.post('group-membership', {}, args=[self.group.id])
+        self.get('groups')
+        self.post('create-post', {**self.post_data, 'group': self.group.id})
+        self.get('group-timeline')
+
+    def test_risk_alerts(self):
+        self.get('risk-alerts', user=self.psychologist)
+
+
+class PostChoicesMigrationTests(TransactionTestCase):
+    """0005: escolhas em texto viram códigos SmallInteger, e voltam."""
+
+    before = [('post', '0004_wellbeing_day')]
+    after = [('post', '0005_post_choices_smallint')]
+
+    def setUp(self):
+        self.addCleanup(self.migrate, None)
+        self.migrate(self.before)
+        apps = self.executor.loader.project_state(self.before).apps
+        user = apps.get_model('user', 'CustomUser').objects.create(
+            username='ana', email='ana@example.com'
+        )
+        Post = apps.get_model('post', 'Post')
+        self.posts = [
+            Post.objects.create(
+                user_id=user.id,
+                mood=mood,
+                feeling=feeling,
+                motive=motive,
+                text='Um dia difícil.',
+            ).id
+            for mood, feeling, motive in (
+                ('triste', 'medo', 'cansaço'),
+                ('entusiasmado', 'segurança', 'saudade'),
+            )
+        ]
+
+    def migrate(self, targets):
+        self.executor = MigrationExecutor(connection)
+        if targets is None:
+            targets = self.executor.loader.graph.leaf_nodes()
+        self.executor.migrate(targets)
+
+    def choices(self, state):
+        Post = self.executor.loader.project_state(state).apps.get_model(
+            'post', 'Post'
+        )
+        return list(
+            Post.objects.filter(id__in=self.posts)
+            .order_by('id')
+            .values_list('mood', 'feeling', 'motive')
+        )
+
+    def test_forward_converts_names_to_codes(self):
+        self.migrate(self.after)
+        self.assertEqual(self.choices(self.after), [(2, 3, 2), (8, 6, 5)])
+
+    def test_backward_restores_names(self):
+        self.migrate(self.after)
+        self.migrate(self.before)
+        self.assertEqual(
+            self.choices(self.before),
+            [
+                ('triste', 'medo', 'cansaço'),
+                ('entusiasmado', 'segurança', 'saudade'),
+            ],
+        )
+
+    def test_unknown_value_aborts(self):
+        apps = self.executor.loader.project_state(self.before).apps
+        posts = apps.get_model('post', 'Post').objects.filter(id=self.posts[0])
+        posts.update(mood='eufórico')
+        # Sem o valor estranho, a limpeza consegue migrar até o fim
+        self.addCleanup(posts.update, mood='triste')
+        with self.assertRaisesMessage(ValueError, 'eufórico'):
+            self.migrate(self.after)
+        # Nada mudou: a migration roda numa transação só
+        self.assertEqual(
+            self.choices(self.before)[0], ('eufórico', 'medo', 'cansaço')
+        )
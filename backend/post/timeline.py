@@ -0,0 +1,172 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import CHOICE_NAMES, Mood, WellbeingDay
+
+# Nota de cada humor, de 0 (pior) a 5 (melhor)
+MOOD_SCORES = {
+    Mood.ENTUSIASMADO: 5,
+    Mood.ALEGRE: 4,
+    Mood.NEUTRO: 3,
+    Mood.ANSIOSO: 2,
+    Mood.ASSUSTADO: 2,
+    Mood.RAIVOSO: 2,
+    Mood.TRISTE: 1,
+    Mood.DEPRIMIDO: 0,
+}
+
+ROLLING_WINDOWS = (7, 30)
+
+
+def apply_posts(posts):
+    """Soma os posts informados aos resumos diários dos seus autores."""
+    groups = defaultdict(list)
+    for post in posts:
+        groups[post.user_id, timezone.localdate(post.create_in)].append(post)
+
+    with transaction.atomic():
+        for (user_id, day), day_posts in groups.items():
+            _merge(_locked_day(user_id, day), day_posts)
+
+
+def remove_posts(posts):
+    """
+    Desconta os posts informados dos resumos diários. Um dia que fica sem
+    posts é apagado; o que já não existe (rebuild depois dos posts) fica.
+    """
+    groups = defaultdict(list)
+    for post in posts:
+        groups[post.user_id, timezone.localdate(post.create_in)].append(post)
+
+    with transaction.atomic():
+        for (user_id, day), day_posts in sorted(groups.items()):
+            summary = (
+                WellbeingDay.objects.select_for_update()
+                .filter(user_id=user_id, day=day)
+                .first()
+            )
+            if summary is not None:
+                _subtract(summary, day_posts)
+
+
+def _locked_day(user_id, day):
+    days = WellbeingDay.objects.select_for_update().filter(
+        user_id=user_id, day=day
+    )
+    summary = days.first()
+    if summary is not None:
+        return summary
+
+    try:
+        with transaction.atomic():
+            return WellbeingDay.objects.create(user_id=user_id, day=day)
+    except IntegrityError:
+        # outra requisição criou o dia primeiro
+        return days.get()
+
+
+def _merge(summary, posts):
+    feelings = Counter(summary.feelings)
+    motives = Counter(summary.motives)
+    for post in posts:
+        summary.posts += 1
+        summary.mood_score_sum += MOOD_SCORES[post.mood]
+        # O JSON guarda os nomes, que a linha do tempo devolve
+        feelings[CHOICE_NAMES['feeling'][post.feeling]] += 1
+        motives[CHOICE_NAMES['motive'][post.motive]] += 1
+
+    summary.feelings = dict(feelings)
+    summary.motives = dict(motives)
+    summary.save(
+        update_fields=['posts', 'mood_score_sum', 'feelings', 'motives']
+    )
+
+
+def _subtract(summary, posts):
+    feelings = Counter(summary.feelings)
+    motives = Counter(summary.motives)
+    for post in posts:
+        feelings[CHOICE_NAMES['feeling'][post.feeling]] -= 1
+        motives[CHOICE_NAMES['motive'][post.motive]] -= 1
+
+    summary.posts = max(summary.posts - len(posts), 0)
+    if not summary.posts:
+        summary.delete()
+        return
+    summary.mood_score_sum = max(
+        summary.mood_score_sum - sum(MOOD_SCORES[post.mood] for post in posts),
+        0,
+    )
+    # Counter com + descarta as contagens que zeraram
+    summary.feelings = dict(+feelings)
+    summary.motives = dict(+motives)
+    summary.save(
+        update_fields=['posts', 'mood_score_sum', 'feelings', 'motives']
+    )
+
+
+def _dominant(counts):
+    # Empate: o valor em ordem alfabética, para a resposta ser estável
+    return min(counts, key=lambda value: (-counts[value], value))
+
+
+def series(user_id, start, end):
+    """
+    Linha do tempo de `start` a `end` em arrays paralelos, um item por dia.
+    Lê no máximo (dias + 29) linhas de WellbeingDay.
+    """
+    lookback = max(ROLLING_WINDOWS) - 1
+    first = start - timedelta(days=lookback)
+    total_days = (end - first).days + 1
+
+    posts = [0] * total_days
+    scores = [0] * total_days
+    feelings = [None] * total_days
+    motives = defaultdict(lambda: [0] * total_days)
+
+    for summary in WellbeingDay.objects.filter(
+        user_id=user_id, day__range=(first, end)
+    ).only('day', 'posts', 'mood_score_sum', 'feelings', 'motives'):
+        index = (summary.day - first).days
+        posts[index] = summary.posts
+        scores[index] = summary.mood_score_sum
+        if summary.feelings:
+            feelings[index] = _dominant(summary.feelings)
+        for motive, count in summary.motives.items():
+            motives[motive][index] = count
+
+    # Somas acumuladas: cada média móvel sai em O(1) por dia
+    post_sums, score_sums = [0], [0]
+    for count, score in zip(posts, scores):
+        post_sums.append(post_sums[-1] + count)
+        score_sums.append(score_sums[-1] + score)
+
+    def mean(begin, stop):
+        count = post_sums[stop] - post_sums[begin]
+        if not count:
+            return None
+        return round((score_sums[stop] - score_sums[begin]) / count, 2)
+
+    visible = range(lookback, total_days)
+    return {
+        'start': start,
+        'end': end,
+        'scores': [mean(index, index + 1) for index in visible],
+        'posts': posts[lookback:],
+        **{
+            f'avg{window}': [
+                mean(max(index - window + 1, 0), index + 1)
+                for index in visible
+            ]
+            for window in ROLLING_WINDOWS
+        },
+        'feelings': feelings[lookback:],
+        'motives': {
+            motive: counts[lookback:]
+            for motive, counts in sorted(motives.items())
+            if any(counts[lookback:])
+        },
+    }
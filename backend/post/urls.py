@@ -1,6 +1,40 @@
 from django.urls import path
-from .views import create_post_view
+from .views import (
+    analytics_view,
+    bulk_create_post_view,
+    create_post_view,
+    export_posts_view,
+    feed_view,
+    group_membership_view,
+    group_timeline_view,
+    groups_view,
+    review_risk_alert_view,
+    risk_alerts_view,
+    search_view,
+    stream_posts_view,
+    timeline_view,
+)
 
 urlpatterns = [
+    path('', feed_view, name='post-feed'),
+    path('search/', search_view, name='post-search'),
     path('create/', create_post_view, name='create-post'),
+    path('stream/', stream_posts_view, name='post-stream'),
+    path('bulk/', bulk_create_post_view, name='bulk-create-post'),
+    path('analytics/', analytics_view, name='post-analytics'),
+    path('timeline/', timeline_view, name='post-timeline'),
+    path('export/<str:fmt>/', export_posts_view, name='post-export'),
+    path('groups/', groups_view, name='groups'),
+    path('groups/timeline/', group_timeline_view, name='group-timeline'),
+    path(
+        'groups/<int:group_id>/membership/',
+        group_membership_view,
+        name='group-membership',
+    ),
+    path('alerts/', risk_alerts_view, name='risk-alerts'),
+    path(
+        'alerts/<int:alert_id>/review/',
+        review_risk_alert_view,
+        name='risk-alert-review',
+    ),
 ]
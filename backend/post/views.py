@@ -1,18 +1,684 @@
+import asyncio
+import base64
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status
-from .serializers import PostSerializer
-from .models import Post
+from rest_framework import serializers, status
+from .serializers import (
+    PostSerializer,
+    RiskAlertSerializer,
+    SupportGroupSerializer,
+)
+from app.http import request_data
+from app.profiling import span
+from app.response_cache import cache_response, posts_tag
+from app.throttling import throttle
+from user.authentication import async_login_required
+from user.models import Session
+
+from .broker import FILTER_FIELDS, get_broker
+from .exports import EXPORT_CONTENT_TYPES, astream_export, stream_export
+from .models import (
+    CHOICE_VALUES,
+    GroupMembership,
+    Post,
+    PostRollup,
+    RiskAlert,
+    SupportGroup,
+)
+from .search import SEARCH_FILTERS, get_search_backend
+from .signals import posts_created
+from . import groups, timeline
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+FEED_FILTERS = ('mood', 'feeling', 'motive', 'user')
+FEED_ORDERING = ('-create_in', '-id')
+STREAM_HEARTBEAT = 15
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+TIMELINE_DEFAULT_DAYS = 30
+TIMELINE_MAX_DAYS = 366
+# Relevância não tem cursor estável: paginação por offset, limitada
+SEARCH_MAX_OFFSET = 1000
+
+
+def encode_cursor(create_in, post_id):
+    raw = f'{create_in.isoformat()}|{post_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    create_in, post_id = raw.split('|')
+    return datetime.fromisoformat(create_in), int(post_id)
+
+
+@sync_to_async
+def _create_post(user, data):
+    # Post e agregações numa transação só: um lock de escrita e um commit
+    with transaction.atomic():
+        return Post.objects.create(user=user, **data)
+
+
+def _outside_groups(user, group_ids):
+    # Só os membros postam no grupo
+    group_ids = set(group_ids) - {None}
+    if not group_ids:
+        return set()
+    return group_ids - set(
+        GroupMembership.objects.filter(
+            user=user, group_id__in=group_ids
+        ).values_list('group_id', flat=True)
+    )
+
+
+GROUP_FORBIDDEN = 'Você não participa deste grupo.'
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+@async_login_required
+@throttle
+async def create_post_view(request):
+    data = request_data(request)
+    if data is None:
+        return JsonResponse(
+            {'error': 'Corpo da requisição inválido.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    serializer = PostSerializer(data=data)
+
+    if serializer.is_valid():
+        group_id = serializer.validated_data.get('group_id')
+        if await sync_to_async(_outside_groups)(request.user, [group_id]):
+            return JsonResponse(
+                {'error': GROUP_FORBIDDEN},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        post = await _create_post(request.user, serializer.validated_data)
+        with span('serialize'):
+            data = PostSerializer(post).data
+        return JsonResponse(data, status=status.HTTP_201_CREATED)
+
+    return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def create_post_view(request):
-    serializer = PostSerializer(data=request.data)
+def bulk_create_post_view(request):
+    items = request.data
+    if isinstance(items, dict):
+        items = items.get('posts')
 
-    if serializer.is_valid():
-        serializer.save(user=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'error': 'Envie uma lista de posts.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    max_items = settings.POST_BULK_MAX_ITEMS
+    if len(items) > max_items:
+        return Response(
+            {'error': f'Envie no máximo {max_items} posts por vez.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Valida item a item para aceitar os válidos e apontar os inválidos
+    child = PostSerializer(many=True).child
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, child.run_validation(item)))
+        except serializers.ValidationError as e:
+            errors.append({'index': index, 'errors': e.detail})
+
+    outside = _outside_groups(
+        request.user, [data.get('group_id') for _, data in valid]
+    )
+    if outside:
+        for index, data in valid:
+            if data.get('group_id') in outside:
+                errors.append(
+                    {'index': index, 'errors': {'group': [GROUP_FORBIDDEN]}}
+                )
+        errors.sort(key=lambda error: error['index'])
+        valid = [
+            (index, data)
+            for index, data in valid
+            if data.get('group_id') not in outside
+        ]
+
+    if not valid:
+        return Response(
+            {'created': [], 'errors': errors},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    with transaction.atomic():
+        posts = Post.objects.bulk_create(
+            [Post(user=request.user, **data) for _, data in valid]
+        )
+        posts_created.send(sender=Post, posts=posts)
+
+    with span('serialize'):
+        created = PostSerializer(posts, many=True).data
+
+    return Response(
+        {
+            'created': created,
+            'errors': errors,
+        },
+        status=(
+            status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        ),
+    )
+
+
+def _feed_tags(request):
+    return [posts_tag(request.GET.get('user'))]
+
+
+@require_http_methods(['GET'])
+@async_login_required
+@cache_response(_feed_tags)
+async def feed_view(request):
+    params = request.GET
+
+    try:
+        limit = int(params.get('limit', FEED_PAGE_SIZE))
+        if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        return JsonResponse(
+            {'error': f'O limite deve estar entre 1 e {FEED_MAX_PAGE_SIZE}.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if params.get('user') and not params['user'].isdigit():
+        return JsonResponse(
+            {'error': 'Usuário inválido.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    filters = {
+        field: params[field] for field in FEED_FILTERS if params.get(field)
+    }
+    for field in CHOICE_VALUES.keys() & filters.keys():
+        # Nome desconhecido vira 0, que não casa com nenhum post
+        filters[field] = CHOICE_VALUES[field].get(filters[field], 0)
+    # Posts de grupo só aparecem para os membros, na timeline do grupo
+    queryset = Post.objects.filter(group__isnull=True, **filters)
+
+    cursor = params.get('cursor')
+    if cursor:
+        try:
+            create_in, post_id = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse(
+                {'error': 'Cursor inválido.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Keyset: continua exatamente depois do último item da página
+        queryset = queryset.filter(
+            Q(create_in__lt=create_in) | Q(create_in=create_in, id__lt=post_id)
+        )
+
+    # Primeiro só as chaves (coberto pelo índice), depois os dados da página
+    keys = [
+        key
+        async for key in queryset.order_by(*FEED_ORDERING).values_list(
+            'id', 'create_in'
+        )[: limit + 1]
+    ]
+    page = keys[:limit]
+
+    posts = [
+        post
+        async for post in Post.objects.filter(
+            id__in=[post_id for post_id, _ in page]
+        )
+        .only(*PostSerializer.Meta.fields)
+        .order_by(*FEED_ORDERING)
+    ]
+
+    next_cursor = None
+    if len(keys) > limit:
+        last_id, last_create_in = page[-1]
+        next_cursor = encode_cursor(last_create_in, last_id)
+
+    with span('serialize'):
+        results = PostSerializer(posts, many=True).data
+
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+async def _post_events(filters):
+    broker = get_broker()
+    subscription = broker.subscribe(filters)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = await subscription.get(timeout=STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Comentário SSE: mantém a conexão viva em proxies
+                yield ': keepalive\n\n'
+                continue
+            yield (
+                f'id: {message["id"]}\n'
+                f'event: post\n'
+                f'data: {message["data"]}\n\n'
+            )
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_http_methods(['GET'])
+@async_login_required
+async def stream_posts_view(request):
+    # Sob WSGI cada conexão prenderia uma thread (e o Django consumiria o
+    # gerador inteiro antes de responder)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'O stream de posts só está disponível via ASGI.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    filters = {
+        field: request.GET[field]
+        for field in FILTER_FIELDS
+        if request.GET.get(field)
+    }
+    response = StreamingHttpResponse(
+        _post_events(filters), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _analytics_tags(request):
+    if request.GET.get('scope', 'me') == 'me':
+        return [posts_tag(request.user.id)]
+    return [posts_tag()]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response(_analytics_tags)
+def analytics_view(request):
+    params = request.query_params
+    period = params.get('period', 'day')
+    scope = params.get('scope', 'me')
+
+    if period not in dict(PostRollup.PERIOD_CHOICES):
+        return Response(
+            {'error': 'Período inválido.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if scope not in ('me', 'platform'):
+        return Response(
+            {'error': 'Escopo inválido.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        end = date.fromisoformat(
+            params.get('end', timezone.localdate().isoformat())
+        )
+        start = date.fromisoformat(
+            params.get(
+                'start',
+                (end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)).isoformat(),
+            )
+        )
+    except ValueError:
+        return Response(
+            {'error': 'Formato de data inválido.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if start > end or (end - start).days >= ANALYTICS_MAX_DAYS:
+        return Response(
+            {
+                'error': f'O intervalo deve ter no máximo {ANALYTICS_MAX_DAYS} dias.'
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if period == 'week':
+        start -= timedelta(days=start.weekday())
+
+    rollups = PostRollup.objects.filter(
+        user=request.user if scope == 'me' else None,
+        period=period,
+        period_start__range=(start, end),
+    ).values_list('period_start', 'dimension', 'value', 'count')
+
+    series = defaultdict(lambda: defaultdict(dict))
+    totals = defaultdict(lambda: defaultdict(int))
+    for period_start, dimension, value, count in rollups:
+        series[dimension][period_start.isoformat()][value] = count
+        totals[dimension][value] += count
+
+    return Response(
+        {
+            'period': period,
+            'scope': scope,
+            'start': start,
+            'end': end,
+            'series': series,
+            'totals': totals,
+        }
+    )
+
+
+def _can_view_posts(viewer, user_id):
+    # Psicólogos podem ver o histórico dos seus pacientes
+    return (
+        user_id == viewer.id
+        or Session.objects.filter(
+            psychologist=viewer, user_id=user_id
+        ).exists()
+    )
+
+
+def _timeline_tags(request):
+    return [posts_tag(request.GET.get('user') or request.user.id)]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response(_timeline_tags)
+def timeline_view(request):
+    params = request.query_params
+    try:
+        end = date.fromisoformat(
+            params.get('end', timezone.localdate().isoformat())
+        )
+        days = int(params.get('days', TIMELINE_DEFAULT_DAYS))
+        user_id = int(params.get('user', request.user.id))
+    except ValueError:
+        return Response(
+            {'error': 'Parâmetros inválidos.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not 1 <= days <= TIMELINE_MAX_DAYS:
+        return Response(
+            {'error': f'Informe entre 1 e {TIMELINE_MAX_DAYS} dias.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not _can_view_posts(request.user, user_id):
+        return Response(
+            {'error': 'Você não tem acesso aos posts deste usuário.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    return Response(
+        timeline.series(user_id, end - timedelta(days=days - 1), end)
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_posts_view(request, fmt):
+    if fmt not in EXPORT_CONTENT_TYPES:
+        return Response(
+            {'error': 'Formato inválido. Use csv ou ndjson.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    params = request.query_params
+    try:
+        start = (
+            date.fromisoformat(params['start']) if 'start' in params else None
+        )
+        end = date.fromisoformat(params['end']) if 'end' in params else None
+        user_id = int(params.get('user', request.user.id))
+    except ValueError:
+        return Response(
+            {'error': 'Parâmetros inválidos.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not _can_view_posts(request.user, user_id):
+        return Response(
+            {'error': 'Você não tem acesso aos posts deste usuário.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    # Sob ASGI, um iterador síncrono seria consumido inteiro antes de sair
+    if isinstance(request._request, ASGIRequest):
+        content = astream_export(user_id, fmt, start, end)
+    else:
+        content = stream_export(user_id, fmt, start, end)
+    response = StreamingHttpResponse(
+        content,
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+    )
+    response[
+        'Content-Disposition'
+    ] = f'attachment; filename="posts-{user_id}.{fmt}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_view(request):
+    params = request.query_params
+    query = params.get('q', '').strip()
+    if not query:
+        return Response(
+            {'error': 'Informe o texto da busca.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        limit = int(params.get('limit', FEED_PAGE_SIZE))
+        offset = int(params.get('offset', 0))
+        if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+            raise ValueError
+        if not 0 <= offset <= SEARCH_MAX_OFFSET:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {'error': 'Paginação inválida.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Filtros pelo nome, como no feed; nome desconhecido não casa com nada
+    filters = {
+        field: CHOICE_VALUES[field].get(params[field], 0)
+        for field in SEARCH_FILTERS
+        if params.get(field)
+    }
+    post_ids = get_search_backend().search(query, filters, limit + 1, offset)
+
+    posts = Post.objects.only(*PostSerializer.Meta.fields).in_bulk(
+        post_ids[:limit]
+    )
+    with span('serialize'):
+        results = PostSerializer(
+            # Um post apagado entre a busca e o in_bulk só fica de fora
+            [
+                posts[post_id]
+                for post_id in post_ids[:limit]
+                if post_id in posts
+            ],
+            many=True,
+        ).data
+
+    return Response(
+        {
+            'results': results,
+            'next': offset + limit if len(post_ids) > limit else None,
+        }
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def groups_view(request):
+    member_of = set(
+        GroupMembership.objects.filter(user=request.user).values_list(
+            'group_id', flat=True
+        )
+    )
+    serializer = SupportGroupSerializer(
+        SupportGroup.objects.order_by('name'),
+        many=True,
+        context={'member_of': member_of},
+    )
+    return Response(serializer.data)
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def group_membership_view(request, group_id):
+    group = SupportGroup.objects.filter(id=group_id).first()
+    if group is None:
+        return Response(
+            {'error': 'Grupo não encontrado.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    if request.method == 'POST':
+        joined = groups.join(request.user, group)
+        return Response(
+            {'joined': joined},
+            status=status.HTTP_201_CREATED if joined else status.HTTP_200_OK,
+        )
+
+    if not groups.leave(request.user, group):
+        return Response(
+            {'error': GROUP_FORBIDDEN},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def group_timeline_view(request):
+    params = request.query_params
+    try:
+        limit = int(params.get('limit', FEED_PAGE_SIZE))
+        if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {'error': f'O limite deve estar entre 1 e {FEED_MAX_PAGE_SIZE}.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    after = None
+    if params.get('cursor'):
+        try:
+            after = decode_cursor(params['cursor'])
+        except (ValueError, UnicodeDecodeError):
+            return Response(
+                {'error': 'Cursor inválido.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    keys = groups.timeline_keys(request.user, limit + 1, after)
+    page = keys[:limit]
+    posts = Post.objects.only(*PostSerializer.Meta.fields).in_bulk(
+        [post_id for post_id, _ in page]
+    )
+
+    next_cursor = None
+    if len(keys) > limit:
+        last_id, last_create_in = page[-1]
+        next_cursor = encode_cursor(last_create_in, last_id)
+
+    with span('serialize'):
+        results = PostSerializer(
+            [posts[post_id] for post_id, _ in page if post_id in posts],
+            many=True,
+        ).data
+
+    return Response({'results': results, 'next': next_cursor})
+
+
+RISK_ALERTS_FORBIDDEN = 'Apenas psicólogos recebem alertas de risco.'
+
+
+def _patients_alerts(psychologist):
+    # Os mesmos pacientes de _can_view_posts: quem tem sessão com ele
+    return RiskAlert.objects.filter(
+        user__in=Session.objects.filter(psychologist=psychologist).values(
+            'user_id'
+        )
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def risk_alerts_view(request):
+    if not request.user.is_psychologist():
+        return Response(
+            {'error': RISK_ALERTS_FORBIDDEN},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    try:
+        limit = int(request.query_params.get('limit', FEED_PAGE_SIZE))
+        if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {'error': f'O limite deve estar entre 1 e {FEED_MAX_PAGE_SIZE}.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Os não revisados, mais graves primeiro
+    alerts = (
+        _patients_alerts(request.user)
+        .filter(reviewed_in__isnull=True)
+        .select_related('post')
+        .order_by('-score', '-create_in', '-id')[:limit]
+    )
+    with span('serialize'):
+        results = RiskAlertSerializer(alerts, many=True).data
+    return Response(results)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def review_risk_alert_view(request, alert_id):
+    if not request.user.is_psychologist():
+        return Response(
+            {'error': RISK_ALERTS_FORBIDDEN},
+            status=status.HTTP_403_FORBIDDEN,
+        )
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    reviewed = (
+        _patients_alerts(request.user)
+        .filter(id=alert_id, reviewed_in__isnull=True)
+        .update(reviewed_by=request.user, reviewed_in=timezone.now())
+    )
+    if not reviewed:
+        return Response(
+            {'error': 'Alerta não encontrado ou já revisado.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response(status=status.HTTP_204_NO_CONTENT)
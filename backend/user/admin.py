@@ -1,27 +1,76 @@
 from django.contrib import admin
-from user.models import CustomUser, Session
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from app.pagination import EstimatedCountPaginator
+from user.models import AccountDeletion, CustomUser, Session
 
 # Register your models here.
 
 
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BaseUserAdmin):
+    # O do auth: senha só pelo formulário próprio, nunca o hash na tela
     list_display = (
         'username',
         'email',
-        'password',
         'name',
         'type',
         'birth',
         'phone',
         'crp',
     )
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ('Perfil', {'fields': ('type', 'name', 'birth', 'phone', 'crp')}),
+    )
+    add_fieldsets = BaseUserAdmin.add_fieldsets + (
+        (None, {'fields': ('email', 'type', 'name')}),
+    )
     search_fields = ('username', 'email', 'name')
+    list_filter = ('type', 'is_active')
+    # Sem date_hierarchy: o dates() dela varre a tabela inteira
+    ordering = ('-date_joined',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class SessionAdmin(admin.ModelAdmin):
     list_display = ('date', 'start_time', 'end_time', 'psychologist', 'user')
-    search_fields = ('psychologist__username', 'user__username', 'date')
+    # psychologist/user aparecem via CustomUser.__str__; sem o JOIN seriam
+    # duas queries por linha
+    list_select_related = ('psychologist', 'user')
+    search_fields = ('psychologist__username', 'user__username')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    ordering = ('-date', '-start_time')
+    # Um <select> com todos os usuários não escala
+    raw_id_fields = ('psychologist', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
-admin.site.register(CustomUser)
+admin.site.register(CustomUser, UserAdmin)
 admin.site.register(Session, SessionAdmin)
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'account_id',
+        'status',
+        'posts_deleted',
+        'posts_total',
+        'create_in',
+        'finish_in',
+    )
+    list_filter = ('status',)
+    ordering = ('-create_in',)
+    # Mantidos pelo user.deletion
+    readonly_fields = (
+        'user',
+        'account_id',
+        'session_policy',
+        'posts_total',
+        'posts_deleted',
+        'sessions_resolved',
+        'error',
+    )
+
+
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
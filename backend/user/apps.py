@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user'
+
+    def ready(self):
+        from app import metrics, response_cache, throttling
+
+        from . import auth_cache, hashing, signals  # noqa: F401
+        from .deletion import get_worker
+
+        metrics.register('auth_cache', auth_cache.stats)
+        metrics.register('password_hashing', hashing.stats)
+        metrics.register('response_cache', response_cache.stats)
+        metrics.register('throttling', throttling.stats)
+        metrics.register('account_deletion', lambda: get_worker().stats())
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class TTLCache:
+    """Cache LRU limitado, com expiração por entrada."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at=None):
+        limit = time.time() + self.ttl
+        expires_at = limit if expires_at is None else min(expires_at, limit)
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_config = getattr(settings, 'FIREBASE_AUTH_CACHE', {})
+
+# token bruto -> claims decodificadas (expira no máximo em `exp`)
+token_cache = TTLCache(
+    maxsize=_config.get('MAX_TOKENS', 1024),
+    ttl=_config.get('TOKEN_TTL', 300),
+)
+
+# uid do Firebase -> CustomUser já carregado
+user_cache = TTLCache(
+    maxsize=_config.get('MAX_USERS', 1024),
+    ttl=_config.get('USER_TTL', 60),
+)
+
+
+def invalidate_user(username):
+    user_cache.delete(username)
+
+
+def stats():
+    return {'tokens': token_cache.stats(), 'users': user_cache.stats()}
@@ -1,31 +1,130 @@
-import firebase_admin
-from firebase_admin import auth
-from rest_framework import authentication, exceptions
+import functools
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from rest_framework import authentication, exceptions, status
+from rest_framework.settings import api_settings
+
+from .auth_cache import token_cache, user_cache
+from .keys import verify_id_token
+
 User = get_user_model()
 
+
+def _user_defaults(decoded_token):
+    return {
+        'email': decoded_token.get('email', ''),
+        'first_name': decoded_token.get('name', '').split(' ')[0]
+        if decoded_token.get('name')
+        else '',
+    }
+
+
 class FirebaseAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
         auth_header = request.META.get('HTTP_AUTHORIZATION')
 
         if not auth_header:
             return None
-        
+
         try:
             token = auth_header.split(' ')[1]
-            decoded_token = auth.verify_id_token(token)
+            decoded_token = token_cache.get(token)
+            if decoded_token is None:
+                decoded_token = verify_id_token(token)
+                token_cache.set(token, decoded_token, decoded_token.get('exp'))
             uid = decoded_token['uid']
-            
-            # Buscar ou criar usuário
-            user, created = User.objects.get_or_create(
-                username=uid,
-                defaults={
-                    'email': decoded_token.get('email', ''),
-                    'first_name': decoded_token.get('name', '').split(' ')[0] if decoded_token.get('name') else '',
-                }
+
+            user = user_cache.get(uid)
+            if user is None:
+                # Buscar ou criar usuário
+                user, created = User.objects.get_or_create(
+                    username=uid, defaults=_user_defaults(decoded_token)
+                )
+                user_cache.set(uid, user)
+
+            if not user.is_active:
+                # Conta em exclusão (user.deletion)
+                raise exceptions.AuthenticationFailed('Usuário inativo.')
+            return (user, None)
+
+        except Exception as e:
+            raise exceptions.AuthenticationFailed(
+                f'Erro de autenticação: {str(e)}'
             )
-            
+
+    async def aauthenticate(self, request):
+        auth_header = request.META.get('HTTP_AUTHORIZATION')
+
+        if not auth_header:
+            return None
+
+        try:
+            token = auth_header.split(' ')[1]
+            decoded_token = token_cache.get(token)
+            if decoded_token is None:
+                # Pode precisar buscar as chaves na rede; fica fora do loop
+                decoded_token = await sync_to_async(
+                    verify_id_token, thread_sensitive=False
+                )(token)
+                token_cache.set(token, decoded_token, decoded_token.get('exp'))
+            uid = decoded_token['uid']
+
+            user = user_cache.get(uid)
+            if user is None:
+                user, created = await User.objects.aget_or_create(
+                    username=uid, defaults=_user_defaults(decoded_token)
+                )
+                user_cache.set(uid, user)
+
+            if not user.is_active:
+                # Conta em exclusão (user.deletion)
+                raise exceptions.AuthenticationFailed('Usuário inativo.')
             return (user, None)
-            
+
         except Exception as e:
-            raise exceptions.AuthenticationFailed(f'Erro de autenticação: {str(e)}')
\ No newline at end of file
+            raise exceptions.AuthenticationFailed(
+                f'Erro de autenticação: {str(e)}'
+            )
+
+
+async def authenticate_async(request):
+    """Roda as DEFAULT_AUTHENTICATION_CLASSES do DRF numa view async."""
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authenticator_class()
+        if hasattr(authenticator, 'aauthenticate'):
+            result = await authenticator.aauthenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+def async_login_required(view):
+    """Equivalente async de @permission_classes([IsAuthenticated])."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticate_async(request)
+        except exceptions.AuthenticationFailed as e:
+            return JsonResponse(
+                {'detail': str(e.detail)},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        if user is None or not user.is_active:
+            return JsonResponse(
+                {
+                    'detail': 'As credenciais de autenticação não foram '
+                    'fornecidas.'
+                },
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,179 @@
+import time as clock
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Session, WorkingHours
+
+# Horários livres por (psicólogo, dia), em minutos desde 00:00. Cada
+# psicólogo tem uma versão: mudar o template de horários troca a versão e
+# descarta todos os dias de uma vez; sessões descartam só o dia afetado.
+DEFAULTS = {
+    'ALIAS': 'responses',
+    'TIMEOUT': 300,
+}
+
+
+def _config(name):
+    return getattr(settings, 'AVAILABILITY_CACHE', {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+def _cache():
+    return caches[_config('ALIAS')]
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(value):
+    return time(value // 60, value % 60)
+
+
+def merge_intervals(intervals):
+    """Junta intervalos sobrepostos ou encostados (ordena e varre)."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract_intervals(windows, busy):
+    """Remove de `windows` os trechos ocupados; ambos já mesclados."""
+    free = []
+    index = 0
+    for start, end in windows:
+        while index < len(busy) and busy[index][1] <= start:
+            index += 1
+
+        cursor = start
+        position = index
+        while position < len(busy) and busy[position][0] < end:
+            busy_start, busy_end = busy[position]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            position += 1
+
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def _version_key(psychologist_id):
+    return f'availability:version:{psychologist_id}'
+
+
+def _day_key(psychologist_id, version, day):
+    return f'availability:{psychologist_id}:{version}:{day.isoformat()}'
+
+
+def _versions(psychologist_ids):
+    cache = _cache()
+    keys = {_version_key(pk): pk for pk in psychologist_ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+
+    for key, pk in keys.items():
+        if pk not in versions:
+            cache.add(key, clock.time_ns(), None)
+            versions[pk] = cache.get(key)
+    return versions
+
+
+def _compute(pairs):
+    psychologist_ids = {pk for pk, _ in pairs}
+    days = {day for _, day in pairs}
+
+    windows = defaultdict(list)
+    for pk, weekday, start, end in WorkingHours.objects.filter(
+        psychologist_id__in=psychologist_ids
+    ).values_list('psychologist_id', 'weekday', 'start_time', 'end_time'):
+        windows[pk, weekday].append((to_minutes(start), to_minutes(end)))
+
+    busy = defaultdict(list)
+    for pk, day, start, end in Session.objects.filter(
+        psychologist_id__in=psychologist_ids,
+        date__range=(min(days), max(days)),
+        start_time__isnull=False,
+        end_time__isnull=False,
+    ).values_list('psychologist_id', 'date', 'start_time', 'end_time'):
+        busy[pk, day].append((to_minutes(start), to_minutes(end)))
+
+    return {
+        (pk, day): subtract_intervals(
+            merge_intervals(windows[pk, day.weekday()]),
+            merge_intervals(busy[pk, day]),
+        )
+        for pk, day in pairs
+    }
+
+
+def free_intervals(psychologist_ids, start, days):
+    """Retorna {psicólogo: {dia: [(início, fim), ...]}} em minutos."""
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    versions = _versions(psychologist_ids)
+    keys = {
+        _day_key(pk, versions[pk], day): (pk, day)
+        for pk in psychologist_ids
+        for day in dates
+    }
+
+    cache = _cache()
+    found = cache.get_many(keys)
+    result = {keys[key]: value for key, value in found.items()}
+
+    missing = [pair for key, pair in keys.items() if key not in found]
+    if missing:
+        computed = _compute(missing)
+        result.update(computed)
+        cache.set_many(
+            {
+                _day_key(pk, versions[pk], day): value
+                for (pk, day), value in computed.items()
+            },
+            _config('TIMEOUT'),
+        )
+
+    availability = defaultdict(dict)
+    for (pk, day), intervals in result.items():
+        availability[pk][day] = intervals
+    return availability
+
+
+def split_slots(intervals, duration, not_before=0):
+    for start, end in intervals:
+        cursor = max(start, not_before)
+        while cursor + duration <= end:
+            yield cursor, cursor + duration
+            cursor += duration
+
+
+def _invalidate_day(psychologist_id, day):
+    cache = _cache()
+    version = cache.get(_version_key(psychologist_id))
+    if version is not None:
+        cache.delete(_day_key(psychologist_id, version, day))
+
+
+def invalidate_day(psychologist_id, day):
+    """Descarta os horários livres do dia, após o commit."""
+    transaction.on_commit(lambda: _invalidate_day(psychologist_id, day))
+
+
+def invalidate_psychologist(psychologist_id):
+    """Descarta todos os dias do psicólogo, após o commit."""
+    transaction.on_commit(
+        lambda: _cache().set(
+            _version_key(psychologist_id), clock.time_ns(), None
+        )
+    )
@@ -0,0 +1,204 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.workers import BackgroundWorker
+from post import groups
+from post.models import GroupMembership, GroupTimelineEntry, Post
+from post.signals import removing_posts
+
+from .models import AccountDeletion, Session
+
+# Sessões do usuário excluído (a FK é PROTECT): 'detach' mantém todas sem
+# o usuário, 'cancel_future' apaga as de hoje em diante e mantém as
+# passadas sem o usuário, 'delete' apaga todas.
+SESSION_POLICIES = ('detach', 'cancel_future', 'delete')
+OPEN = ('pending', 'running')
+
+DEFAULTS = {
+    'CHUNK_SIZE': 200,
+    'PAUSE': 0.05,
+    'SESSION_POLICY': 'cancel_future',
+    'WORKER': True,
+}
+
+
+def _config(name):
+    return getattr(settings, 'ACCOUNT_DELETION', {}).get(name, DEFAULTS[name])
+
+
+def request_deletion(user):
+    """
+    Desativa o usuário e agenda a exclusão do resto. Devolve o
+    AccountDeletion, o mesmo se já houver um pedido em aberto.
+    """
+    policy = _config('SESSION_POLICY')
+    if policy not in SESSION_POLICIES:
+        raise ImproperlyConfigured(f'SESSION_POLICY inválida: {policy}')
+
+    try:
+        with transaction.atomic():
+            deletion = AccountDeletion.objects.create(
+                user=user,
+                account_id=user.id,
+                session_policy=policy,
+                posts_total=Post.objects.filter(user=user).count(),
+            )
+            # Inativo não autentica mais: nenhum post novo durante a exclusão
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+    except IntegrityError:
+        return AccountDeletion.objects.get(user=user, status__in=OPEN)
+
+    if _config('WORKER'):
+        transaction.on_commit(lambda: get_worker().submit(deletion.id))
+    return deletion
+
+
+def _delete_chunks(queryset, on_chunk=None):
+    """
+    Apaga as linhas de `queryset` em lotes de CHUNK_SIZE, uma transação
+    curta por lote e uma pausa entre eles para os outros escritores.
+    """
+    chunk_size = _config('CHUNK_SIZE')
+    pause = _config('PAUSE')
+    model = queryset.model
+    # Sem ORDER BY: qualquer lote serve, e o índice da FK já basta
+    pending = queryset.order_by().values_list('id', flat=True)
+
+    while True:
+        ids = list(pending[:chunk_size])
+        if not ids:
+            break
+        if on_chunk is None:
+            with transaction.atomic():
+                model.objects.filter(id__in=ids).delete()
+        else:
+            on_chunk(ids)
+        time.sleep(pause)
+
+
+def _delete_posts(deletion, user, progress):
+    def delete(ids):
+        # As cópias nos grupos antes: um post de grupo grande tem milhares
+        _delete_chunks(GroupTimelineEntry.objects.filter(post_id__in=ids))
+        with transaction.atomic(), removing_posts():
+            # O resto (alertas, índice de busca, agregações) sai junto, em
+            # cascata e pelo signal de Post, descontado uma vez por lote
+            Post.objects.filter(id__in=ids).delete()
+            AccountDeletion.objects.filter(id=deletion.id).update(
+                posts_deleted=F('posts_deleted') + len(ids)
+            )
+        if progress:
+            progress(len(ids))
+
+    # Até esvaziar, não até uma contagem: pega também o que chegou depois
+    _delete_chunks(Post.objects.filter(user=user), delete)
+
+
+def _resolve_sessions(deletion, user):
+    policy = deletion.session_policy
+    chunk_size = _config('CHUNK_SIZE')
+    resolved = 0
+
+    for field in ('user', 'psychologist'):
+        sessions = Session.objects.filter(**{field: user})
+        if policy == 'delete':
+            doomed = sessions
+        elif policy == 'cancel_future':
+            doomed = sessions.filter(date__gte=timezone.localdate())
+        else:
+            doomed = sessions.none()
+
+        resolved += doomed.count()
+        # Uma a uma: os signals de Session liberam a agenda e o cache
+        _delete_chunks(doomed)
+
+        while True:
+            chunk = list(sessions[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                for session in chunk:
+                    setattr(session, field, None)
+                    session.save(update_fields=[field])
+            resolved += len(chunk)
+
+    AccountDeletion.objects.filter(id=deletion.id).update(
+        sessions_resolved=resolved
+    )
+
+
+def run(deletion, progress=None):
+    """
+    Executa (ou retoma, depois de uma falha) a exclusão. Cada passo só
+    apaga o que ainda existe, então rodar de novo é seguro.
+    """
+    AccountDeletion.objects.filter(id=deletion.id).update(
+        status='running', error=''
+    )
+    user = deletion.user
+    try:
+        if user is not None:
+            # A timeline de grupos do usuário aqui, em lotes: groups.leave
+            # só agenda a limpeza no worker dos grupos
+            _delete_chunks(GroupTimelineEntry.objects.filter(user=user))
+            for membership in GroupMembership.objects.filter(
+                user=user
+            ).select_related('group'):
+                groups.leave(user, membership.group)
+
+            _delete_posts(deletion, user, progress)
+            _resolve_sessions(deletion, user)
+            # Sobram linhas pequenas: agregações, timeline, horários
+            with transaction.atomic():
+                user.delete()
+    except Exception as e:
+        AccountDeletion.objects.filter(id=deletion.id).update(
+            status='failed', error=repr(e)
+        )
+        raise
+
+    AccountDeletion.objects.filter(id=deletion.id).update(
+        status='done', finish_in=timezone.now()
+    )
+
+
+class DeletionWorker(BackgroundWorker):
+    """Executa as exclusões na ordem dos pedidos."""
+
+    name = 'account-deletion'
+
+    def handle(self, deletion_id):
+        deletion = (
+            AccountDeletion.objects.select_related('user')
+            .filter(id=deletion_id, status__in=OPEN)
+            .first()
+        )
+        if deletion is not None:
+            run(deletion)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'running': self.current[0] if self.current else None,
+        }
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = DeletionWorker()
+    return _worker
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+class PoolBusy(Exception):
+    pass
+
+
+def _init_process_worker():
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+class PasswordHasherPool:
+    """
+    Executa o hash de senha (PBKDF2) fora da thread/event loop da
+    requisição, com número fixo de workers e fila limitada.
+    """
+
+    def __init__(self, workers=4, queue_limit=64, executor='thread'):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        if executor == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_process_worker
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='password-hasher'
+            )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, raw_password):
+        with self._lock:
+            if self.in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise PoolBusy()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        future = self._executor.submit(make_password, raw_password)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def make_password(self, raw_password):
+        return await asyncio.wrap_future(self.submit(raw_password))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - self.workers, 0),
+                'peak_in_flight': self.peak_in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = getattr(settings, 'PASSWORD_HASHING_POOL', {})
+                _pool = PasswordHasherPool(
+                    workers=config.get('WORKERS', 4),
+                    queue_limit=config.get('QUEUE_LIMIT', 64),
+                    executor=config.get('EXECUTOR', 'thread'),
+                )
+    return _pool
+
+
+async def make_password_async(raw_password):
+    return await get_pool().make_password(raw_password)
+
+
+def stats():
+    return get_pool().stats()
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.request
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = (
+    'https://www.googleapis.com/robot/v1/metadata/x509/'
+    'securetoken@system.gserviceaccount.com'
+)
+
+
+class InvalidIdTokenError(Exception):
+    pass
+
+
+def parse_public_keys(certificates):
+    """Converte {kid: PEM} (certificado X.509 ou chave pública) em chaves."""
+    keys = {}
+    for kid, pem in certificates.items():
+        data = pem.encode() if isinstance(pem, str) else pem
+        if b'CERTIFICATE' in data:
+            keys[kid] = x509.load_pem_x509_certificate(data).public_key()
+        else:
+            keys[kid] = serialization.load_pem_public_key(data)
+    return keys
+
+
+def parse_max_age(cache_control, default=3600):
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else default
+
+
+class KeyProvider:
+    """Fonte das chaves públicas usadas para verificar os ID tokens."""
+
+    def get_key(self, kid):
+        raise NotImplementedError
+
+    def start(self):
+        pass
+
+
+class StaticKeyProvider(KeyProvider):
+    """Conjunto fixo de chaves mantido em memória."""
+
+    def __init__(self, certificates=None):
+        self._keys = parse_public_keys(certificates or {})
+
+    def get_key(self, kid):
+        return self._keys.get(kid)
+
+
+class FileKeyProvider(KeyProvider):
+    """Lê {kid: PEM} de um arquivo JSON, recarregando quando ele muda."""
+
+    def __init__(self, path):
+        self.path = path
+        self._keys = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._reload()
+
+    def _reload(self):
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            with open(self.path) as fp:
+                data = json.load(fp)
+            self._keys = parse_public_keys(data.get('keys', data))
+            self._mtime = mtime
+
+    def get_key(self, kid):
+        self._reload()
+        return self._keys.get(kid)
+
+
+class RemoteKeyProvider(KeyProvider):
+    """
+    Busca os certificados do Google e os mantém em memória, renovando em
+    segundo plano de acordo com o `max-age` do Cache-Control. Se
+    `cache_file` for informado, as chaves são persistidas e reutilizadas
+    na inicialização, sem depender da rede enquanto ainda forem válidas.
+    """
+
+    def __init__(
+        self,
+        url=GOOGLE_CERTS_URL,
+        cache_file=None,
+        refresh_margin=300,
+        timeout=5,
+        retry_interval=60,
+    ):
+        self.url = url
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._keys = {}
+        self._expires_at = 0
+        self._fetched_at = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.cache_file and os.path.exists(self.cache_file):
+            self._load_cache_file()
+        if self._expires_at <= time.time():
+            try:
+                self.refresh()
+            except Exception:
+                # Sem nenhuma chave não há o que validar; com as do arquivo,
+                # segue com elas e a thread tenta de novo
+                if not self._keys:
+                    raise
+                logger.exception('Falha ao buscar as chaves; usando o cache')
+                self._fetched_at = time.time()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name='firebase-keys', daemon=True
+            )
+            self._thread.start()
+
+    def _stale(self, kid):
+        # kid desconhecido pode indicar rotação das chaves; limita a uma
+        # busca por retry_interval para não amplificar tokens forjados nem
+        # martelar o Google quando ele está fora
+        now = time.time()
+        return now - self._fetched_at > self.retry_interval and (
+            self._expires_at <= now or kid not in self._keys
+        )
+
+    def get_key(self, kid):
+        if self._stale(kid):
+            with self._lock:
+                # Quem esperou o lock encontra as chaves já renovadas
+                if self._stale(kid):
+                    try:
+                        self._fetch()
+                    except Exception:
+                        # Melhor validar com as chaves antigas do que
+                        # responder 401 para todo mundo
+                        logger.exception('Falha ao renovar as chaves')
+                        self._fetched_at = time.time()
+        return self._keys.get(kid)
+
+    def refresh(self):
+        with self._lock:
+            self._fetch()
+
+    def _fetch(self):
+        request = urllib.request.urlopen(self.url, timeout=self.timeout)
+        with request as res:
+            certificates = json.loads(res.read())
+            max_age = parse_max_age(res.headers.get('Cache-Control'))
+
+        self._keys = parse_public_keys(certificates)
+        self._fetched_at = time.time()
+        self._expires_at = self._fetched_at + max_age
+
+        if self.cache_file:
+            self._write_cache_file(certificates)
+
+    def _refresh_loop(self):
+        while True:
+            delay = self._expires_at - time.time() - self.refresh_margin
+            time.sleep(max(delay, 30))
+            try:
+                self.refresh()
+            except Exception:
+                # mantém as chaves atuais e tenta de novo no próximo ciclo
+                logger.exception('Falha ao renovar as chaves')
+
+    def _load_cache_file(self):
+        try:
+            with open(self.cache_file) as fp:
+                data = json.load(fp)
+            self._keys = parse_public_keys(data['keys'])
+            self._expires_at = data['expires_at']
+        except (OSError, ValueError, KeyError):
+            self._keys, self._expires_at = {}, 0
+
+    def _write_cache_file(self, certificates):
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        with tempfile.NamedTemporaryFile(
+            'w', dir=directory, delete=False
+        ) as fp:
+            json.dump(
+                {'keys': certificates, 'expires_at': self._expires_at}, fp
+            )
+        os.replace(fp.name, self.cache_file)
+
+
+class FixtureKeyProvider(KeyProvider):
+    """
+    Gera um par de chaves RSA local e emite tokens assinados por ele, para
+    testes e ambientes sem acesso ao Firebase.
+    """
+
+    def __init__(self, kid='fixture'):
+        self.kid = kid
+        self._private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+        self._public_key = self._private_key.public_key()
+
+    def get_key(self, kid):
+        return self._public_key if kid == self.kid else None
+
+    def export_keys(self):
+        """{kid: PEM} da chave pública, no formato do FileKeyProvider."""
+        pem = self._public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        return {self.kid: pem.decode()}
+
+    def issue_token(self, uid, project_id=None, expires_in=3600, **claims):
+        project_id = project_id or settings.FIREBASE_PROJECT_ID
+        now = int(time.time())
+        payload = {
+            'iss': f'https://securetoken.google.com/{project_id}',
+            'aud': project_id,
+            'sub': uid,
+            'iat': now,
+            'auth_time': now,
+            'exp': now + expires_in,
+            **claims,
+        }
+        return jwt.encode(
+            payload,
+            self._private_key,
+            algorithm='RS256',
+            headers={'kid': self.kid},
+        )
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_key_provider():
+    global _provider
+
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                config = getattr(settings, 'FIREBASE_KEY_PROVIDER', {})
+                backend = import_string(
+                    config.get('BACKEND', 'user.keys.RemoteKeyProvider')
+                )
+                provider = backend(**config.get('OPTIONS', {}))
+                provider.start()
+                _provider = provider
+    return _provider
+
+
+def set_key_provider(provider):
+    global _provider
+    _provider = provider
+
+
+def verify_id_token(token, provider=None, project_id=None):
+    provider = provider or get_key_provider()
+    project_id = project_id or settings.FIREBASE_PROJECT_ID
+
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise InvalidIdTokenError(str(e))
+
+    if header.get('alg') != 'RS256':
+        raise InvalidIdTokenError('Algoritmo de assinatura inválido.')
+
+    key = provider.get_key(header.get('kid'))
+    if key is None:
+        raise InvalidIdTokenError('Chave de assinatura desconhecida.')
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=['RS256'],
+            audience=project_id,
+            issuer=f'https://securetoken.google.com/{project_id}',
+            options={'require': ['exp', 'iat', 'sub']},
+        )
+    except jwt.PyJWTError as e:
+        raise InvalidIdTokenError(str(e))
+
+    if not claims['sub'] or len(claims['sub']) > 128:
+        raise InvalidIdTokenError('Claim "sub" inválida.')
+
+    claims['uid'] = claims['sub']
+    return claims
@@ -0,0 +1,180 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from user.hashing import _init_process_worker
+from user.models import CustomUser
+from user.validators import (
+    EMAIL_TAKEN,
+    USERNAME_TAKEN,
+    integrity_errors,
+    validate_registration,
+)
+
+
+def read_rows(path):
+    """Lê CSV (com cabeçalho) ou JSON Lines, uma linha por vez."""
+    with open(path, encoding='utf-8', newline='') as fp:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(fp)
+            return
+
+        for line in fp:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuários em lote de um arquivo CSV ou JSON Lines, com as '
+        'mesmas regras do cadastro. Pode ser retomado do último lote salvo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='processos usados para calcular os hashes de senha',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='arquivo de progresso (padrão: <path>.checkpoint)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='ignora o checkpoint e começa do início',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Arquivo "{path}" não encontrado.')
+
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        progress = {'rows': 0, 'created': 0, 'rejected': 0}
+        if not options['restart'] and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as fp:
+                progress = json.load(fp)
+            self.stdout.write(f'Retomando após a linha {progress["rows"]}.')
+
+        rows = itertools.islice(read_rows(path), progress['rows'], None)
+        started = time.monotonic()
+        done_before = progress['rows']
+
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=_init_process_worker
+        ) as pool:
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+
+                created, rejected = self.import_batch(
+                    batch, progress['rows'], pool
+                )
+                progress['rows'] += len(batch)
+                progress['created'] += created
+                progress['rejected'] += rejected
+                self.save_checkpoint(progress)
+
+                rate = (progress['rows'] - done_before) / (
+                    time.monotonic() - started
+                )
+                self.stdout.write(
+                    f'{progress["rows"]} linhas processadas '
+                    f'({progress["created"]} criados, '
+                    f'{progress["rejected"]} rejeitados, {rate:.0f} linhas/s)'
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Importação concluída: {progress["created"]} usuários '
+                f'criados, {progress["rejected"]} rejeitados.'
+            )
+        )
+
+    def import_batch(self, batch, offset, pool):
+        candidates = []
+        rejected = 0
+
+        for number, data in enumerate(batch, start=offset + 1):
+            fields, errors = validate_registration(data)
+            if errors:
+                self.reject(number, errors)
+                rejected += 1
+            else:
+                candidates.append((number, fields))
+
+        # Unicidade: uma consulta por lote, mais as repetições no arquivo
+        emails = {fields['email'] for _, fields in candidates}
+        usernames = {fields['username'] for _, fields in candidates}
+        taken = CustomUser.objects.filter(
+            Q(email__in=emails) | Q(username__in=usernames)
+        ).values_list('email', 'username')
+        taken_emails = {email for email, _ in taken}
+        taken_usernames = {username for _, username in taken}
+
+        accepted = []
+        for number, fields in candidates:
+            errors = []
+            if fields['email'] in taken_emails:
+                errors.append(EMAIL_TAKEN)
+            if fields['username'] in taken_usernames:
+                errors.append(USERNAME_TAKEN)
+            if errors:
+                self.reject(number, errors)
+                rejected += 1
+                continue
+
+            taken_emails.add(fields['email'])
+            taken_usernames.add(fields['username'])
+            accepted.append((number, fields))
+
+        passwords = [fields.pop('password') for _, fields in accepted]
+        hashes = pool.map(make_password, passwords, chunksize=16)
+        users = [
+            (number, CustomUser(password=password_hash, **fields))
+            for (number, fields), password_hash in zip(accepted, hashes)
+        ]
+
+        try:
+            with transaction.atomic():
+                CustomUser.objects.bulk_create([user for _, user in users])
+            return len(users), rejected
+        except IntegrityError:
+            # Alguém cadastrou um dos usuários durante o lote: grava um a um
+            created = self.save_one_by_one(users)
+            return created, rejected + len(users) - created
+
+    def save_one_by_one(self, users):
+        created = 0
+        for number, user in users:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created += 1
+            except IntegrityError as e:
+                self.reject(number, integrity_errors(e))
+        return created
+
+    def reject(self, number, errors):
+        self.stderr.write(f'linha {number}: {" ".join(errors)}')
+
+    def save_checkpoint(self, progress):
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as fp:
+            json.dump(progress, fp)
+        os.replace(temporary, self.checkpoint_path)
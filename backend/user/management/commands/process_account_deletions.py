@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.deletion import OPEN, run
+from user.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa as exclusões de conta pendentes (e as interrompidas), '
+        'em lotes. Com --retry-failed, tenta de novo as que falharam.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+
+    def handle(self, *args, **options):
+        statuses = [*OPEN, 'failed'] if options['retry_failed'] else OPEN
+        deletions = AccountDeletion.objects.filter(
+            status__in=statuses
+        ).select_related('user')
+
+        for deletion in deletions.order_by('id'):
+            started = time.perf_counter()
+            # Retomada: conta o que a execução anterior já apagou
+            deleted = deletion.posts_deleted
+            this_run = 0
+
+            def progress(count):
+                nonlocal deleted, this_run
+                deleted += count
+                this_run += count
+                rate = this_run / (time.perf_counter() - started)
+                self.stdout.write(
+                    f'Usuário {deletion.account_id}: {deleted} de '
+                    f'{deletion.posts_total} posts apagados, '
+                    f'{rate:.0f} posts/s'
+                )
+
+            try:
+                run(deletion, progress)
+            except Exception as e:
+                self.stderr.write(f'Exclusão {deletion.id} falhou: {e!r}')
+                continue
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Usuário {deletion.account_id} excluído em '
+                    f'{time.perf_counter() - started:.1f}s.'
+                )
+            )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            'user',
+            '0004_session_date_session_end_time_session_psychologist_and_more',
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(
+                fields=['psychologist', 'date', 'start_time'],
+                name='session_psychologist_day_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(
+                fields=['user', 'date', 'start_time'],
+                name='session_user_day_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_session_day_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'weekday',
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, 'Segunda-feira'),
+                            (1, 'Terça-feira'),
+                            (2, 'Quarta-feira'),
+                            (3, 'Quinta-feira'),
+                            (4, 'Sexta-feira'),
+                            (5, 'Sábado'),
+                            (6, 'Domingo'),
+                        ]
+                    ),
+                ),
+                (
+                    'start_time',
+                    models.TimeField(verbose_name='Hora de Início'),
+                ),
+                ('end_time', models.TimeField(verbose_name='Hora de Término')),
+                (
+                    'psychologist',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='working_hours',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        fields=['psychologist', 'weekday'],
+                        name='working_hours_weekday_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0006_working_hours'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(
+                fields=['-date_joined'], name='user_joined_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(
+                fields=['type', '-date_joined'], name='user_type_joined_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(
+                fields=['-date', '-start_time'], name='session_day_idx'
+            ),
+        ),
+    ]
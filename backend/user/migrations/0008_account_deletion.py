@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0007_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('account_id', models.PositiveBigIntegerField(db_index=True)),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'Pendente'),
+                            ('running', 'Em andamento'),
+                            ('done', 'Concluída'),
+                            ('failed', 'Falhou'),
+                        ],
+                        default='pending',
+                        max_length=10,
+                    ),
+                ),
+                ('session_policy', models.CharField(max_length=15)),
+                ('posts_total', models.PositiveIntegerField(default=0)),
+                ('posts_deleted', models.PositiveIntegerField(default=0)),
+                ('sessions_resolved', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('create_in', models.DateTimeField(auto_now_add=True)),
+                ('update_in', models.DateTimeField(auto_now=True)),
+                ('finish_in', models.DateTimeField(blank=True, null=True)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        condition=models.Q(
+                            ('status__in', ['pending', 'running'])
+                        ),
+                        fields=('user',),
+                        name='account_deletion_open_uniq',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -15,6 +15,15 @@ class CustomUser(AbstractUser):
     phone = models.CharField(max_length=12)
     crp = models.CharField(max_length=12, blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        # Ordenação e filtros do admin em tabelas grandes
+        indexes = [
+            models.Index(fields=['-date_joined'], name='user_joined_idx'),
+            models.Index(
+                fields=['type', '-date_joined'], name='user_type_joined_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.first_name + " " + self.last_name} id = {self.id} ({self.get_type_display()})'
 
@@ -43,5 +52,107 @@ class Session(models.Model):
         null=True,
     )
 
+    class Meta:
+        # Buscas de conflito filtram por profissional/paciente e pelo dia
+        indexes = [
+            models.Index(
+                fields=['psychologist', 'date', 'start_time'],
+                name='session_psychologist_day_idx',
+            ),
+            models.Index(
+                fields=['user', 'date', 'start_time'],
+                name='session_user_day_idx',
+            ),
+            # Ordenação, filtro e date_hierarchy do admin
+            models.Index(
+                fields=['-date', '-start_time'], name='session_day_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'Sessão {self.id} - Psicólogo: {self.psychologist}, Usuário: {self.user} em {self.date}'
+
+
+class WorkingHours(models.Model):
+    WEEKDAY_CHOICES = (
+        (0, 'Segunda-feira'),
+        (1, 'Terça-feira'),
+        (2, 'Quarta-feira'),
+        (3, 'Quinta-feira'),
+        (4, 'Sexta-feira'),
+        (5, 'Sábado'),
+        (6, 'Domingo'),
+    )
+
+    psychologist = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='working_hours',
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField(verbose_name='Hora de Início')
+    end_time = models.TimeField(verbose_name='Hora de Término')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['psychologist', 'weekday'],
+                name='working_hours_weekday_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f'{self.psychologist_id} - {self.get_weekday_display()} '
+            f'{self.start_time}-{self.end_time}'
+        )
+
+
+class AccountDeletion(models.Model):
+    """
+    Exclusão de conta em andamento (user.deletion). O usuário fica inativo
+    na hora; os posts e as sessões saem depois, em lotes, e a linha fica
+    como registro do progresso.
+    """
+
+    STATUS_CHOICES = (
+        ('pending', 'Pendente'),
+        ('running', 'Em andamento'),
+        ('done', 'Concluída'),
+        ('failed', 'Falhou'),
+    )
+
+    # Nulo depois que o usuário é apagado, no último passo
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+    )
+    # O id continua aqui depois que `user` vira nulo
+    account_id = models.PositiveBigIntegerField(db_index=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending'
+    )
+    # ACCOUNT_DELETION['SESSION_POLICY'] no momento do pedido
+    session_policy = models.CharField(max_length=15)
+    posts_total = models.PositiveIntegerField(default=0)
+    posts_deleted = models.PositiveIntegerField(default=0)
+    sessions_resolved = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    create_in = models.DateTimeField(auto_now_add=True)
+    update_in = models.DateTimeField(auto_now=True)
+    finish_in = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Um pedido em aberto por usuário
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='account_deletion_open_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Exclusão {self.id} - usuário {self.account_id}: {self.status}'
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from app import response_cache
+
+from .auth_cache import invalidate_user
+from .availability import invalidate_day, invalidate_psychologist
+from .models import CustomUser, Session, WorkingHours
+
+
+@receiver(post_init, sender=Session)
+def remember_session_slot(sender, instance, **kwargs):
+    # Guarda o dia original para invalidar também quando a sessão muda
+    instance._availability_slot = (instance.psychologist_id, instance.date)
+
+
+def _invalidate_slots(*slots):
+    for psychologist_id, day in set(slots):
+        if psychologist_id and day:
+            invalidate_day(psychologist_id, day)
+
+
+def _invalidate_sessions(*user_ids):
+    response_cache.invalidate(
+        *(response_cache.sessions_tag(pk) for pk in user_ids if pk)
+    )
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, **kwargs):
+    current = (instance.psychologist_id, instance.date)
+    _invalidate_slots(instance._availability_slot, current)
+    _invalidate_sessions(
+        instance._availability_slot[0],
+        instance.psychologist_id,
+        instance.user_id,
+    )
+    instance._availability_slot = current
+
+
+@receiver(post_delete, sender=Session)
+def session_deleted(sender, instance, **kwargs):
+    _invalidate_slots(
+        instance._availability_slot,
+        (instance.psychologist_id, instance.date),
+    )
+    _invalidate_sessions(instance.psychologist_id, instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    # Depois do commit, como o cache de respostas: antes dele, outra
+    # requisição ainda leria e guardaria o usuário antigo
+    username = instance.username
+    transaction.on_commit(lambda: invalidate_user(username))
+    response_cache.invalidate(response_cache.user_tag(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=WorkingHours)
+def working_hours_changed(sender, instance, **kwargs):
+    invalidate_psychologist(instance.psychologist_id)
@@ -1,3 +1,528 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from post import groups
+from post.models import (
+    Feeling,
+    GroupMembership,
+    Mood,
+    Motive,
+    Post,
+    PostRollup,
+    RiskAlert,
+    SupportGroup,
+)
+
+from . import deletion
+from .auth_cache import token_cache, user_cache
+from .availability import merge_intervals, split_slots, subtract_intervals
+from .keys import (
+    FixtureKeyProvider,
+    InvalidIdTokenError,
+    RemoteKeyProvider,
+    set_key_provider,
+    verify_id_token,
+)
+from .models import AccountDeletion, CustomUser, Session
+from .validators import EMAIL_TAKEN
+
+
+class VerifyIdTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.keys = FixtureKeyProvider()
+
+    def assertRejected(self, token, message=None):
+        with self.assertRaises(InvalidIdTokenError) as raised:
+            verify_id_token(token, provider=self.keys)
+        if message:
+            self.assertIn(message, str(raised.exception))
+
+    def test_accepts_valid_token(self):
+        claims = verify_id_token(
+            self.keys.issue_token('uid-1'), provider=self.keys
+        )
+        self.assertEqual(claims['uid'], 'uid-1')
+
+    def test_rejects_other_algorithm(self):
+        project_id = settings.FIREBASE_PROJECT_ID
+        token = jwt.encode(
+            {
+                'iss': f'https://securetoken.google.com/{project_id}',
+                'aud': project_id,
+                'sub': 'uid-1',
+            },
+            'segredo-compartilhado-com-32-bytes',
+            algorithm='HS256',
+            headers={'kid': self.keys.kid},
+        )
+        self.assertRejected(token, 'Algoritmo')
+
+    def test_rejects_other_audience(self):
+        self.assertRejected(self.keys.issue_token('uid-1', aud='outro'))
+
+    def test_rejects_other_issuer(self):
+        self.assertRejected(
+            self.keys.issue_token('uid-1', iss='https://example.com')
+        )
+
+    def test_rejects_expired_token(self):
+        self.assertRejected(self.keys.issue_token('uid-1', expires_in=-60))
+
+    def test_rejects_unknown_kid(self):
+        other = FixtureKeyProvider(kid='outra')
+        self.assertRejected(other.issue_token('uid-1'), 'desconhecida')
+
+    def test_rejects_empty_subject(self):
+        self.assertRejected(self.keys.issue_token(''))
+
+
+class RemoteKeyProviderTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_file = os.path.join(directory.name, 'keys.json')
+        self.keys = FixtureKeyProvider()
+        patcher = mock.patch(
+            'urllib.request.urlopen', side_effect=OSError('sem rede')
+        )
+        self.urlopen = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_cache(self, expires_at):
+        with open(self.cache_file, 'w') as fp:
+            json.dump(
+                {'keys': self.keys.export_keys(), 'expires_at': expires_at},
+                fp,
+            )
+
+    def test_start_keeps_stale_cached_keys_when_fetch_fails(self):
+        self.write_cache(expires_at=time.time() - 60)
+        provider = RemoteKeyProvider(cache_file=self.cache_file)
+        with self.assertLogs('user.keys', 'ERROR'):
+            provider.start()
+
+        claims = verify_id_token(
+            self.keys.issue_token('uid-1'), provider=provider
+        )
+        self.assertEqual(claims['uid'], 'uid-1')
+        # A falha conta como busca: as requisições não tentam de novo já
+        self.assertEqual(self.urlopen.call_count, 1)
+
+    def test_start_fails_without_any_key(self):
+        provider = RemoteKeyProvider(cache_file=self.cache_file)
+        with self.assertRaises(OSError):
+            provider.start()
+
+
+class IntervalTests(SimpleTestCase):
+    def test_merge_intervals(self):
+        cases = [
+            ([], []),
+            ([(60, 120)], [(60, 120)]),
+            # Fora de ordem, encostados e contidos
+            ([(180, 240), (60, 120), (120, 150)], [(60, 150), (180, 240)]),
+            ([(60, 240), (90, 120), (100, 110)], [(60, 240)]),
+            ([(60, 120), (60, 90), (60, 120)], [(60, 120)]),
+            ([(60, 120), (121, 180)], [(60, 120), (121, 180)]),
+        ]
+        for intervals, expected in cases:
+            with self.subTest(intervals=intervals):
+                self.assertEqual(merge_intervals(intervals), expected)
+
+    def test_merge_does_not_mutate_input(self):
+        intervals = [(60, 120), (90, 180)]
+        merge_intervals(intervals)
+        self.assertEqual(intervals, [(60, 120), (90, 180)])
+
+    def test_subtract_intervals(self):
+        windows = [(480, 720), (780, 1080)]
+        cases = [
+            ([], windows),
+            # Na ponta, no meio e cobrindo a janela inteira
+            ([(480, 540)], [(540, 720), (780, 1080)]),
+            ([(600, 660)], [(480, 600), (660, 720), (780, 1080)]),
+            ([(780, 1080)], [(480, 720)]),
+            ([(0, 1440)], []),
+            # Atravessando o intervalo entre as janelas
+            ([(700, 800)], [(480, 700), (800, 1080)]),
+            # Encostados na janela não ocupam nada
+            ([(420, 480), (720, 780)], windows),
+            (
+                [(500, 510), (520, 530)],
+                [(480, 500), (510, 520), (530, 720), (780, 1080)],
+            ),
+        ]
+        for busy, expected in cases:
+            with self.subTest(busy=busy):
+                self.assertEqual(subtract_intervals(windows, busy), expected)
+
+    def test_subtract_from_no_windows(self):
+        self.assertEqual(subtract_intervals([], [(480, 540)]), [])
+
+    def test_split_slots(self):
+        cases = [
+            ([(480, 600)], 60, 0, [(480, 540), (540, 600)]),
+            # Sobra menor que a duração fica de fora
+            ([(480, 590)], 60, 0, [(480, 540)]),
+            ([(480, 530)], 60, 0, []),
+            ([(480, 540), (600, 660)], 60, 0, [(480, 540), (600, 660)]),
+            # not_before corta o começo e pode descartar o intervalo
+            ([(480, 660)], 60, 500, [(500, 560), (560, 620)]),
+            ([(480, 600)], 60, 600, []),
+            ([], 60, 0, []),
+        ]
+        for intervals, duration, not_before, expected in cases:
+            with self.subTest(intervals=intervals, not_before=not_before):
+                self.assertEqual(
+                    list(split_slots(intervals, duration, not_before)),
+                    expected,
+                )
+
+
+@override_settings(THROTTLING={'RATES': {}})
+class APITestCase(TestCase):
+    """Tokens da FixtureKeyProvider e caches vazios a cada teste."""
+
+    def setUp(self):
+        self.keys = FixtureKeyProvider()
+        set_key_provider(self.keys)
+        self.addCleanup(set_key_provider, None)
+        token_cache.clear()
+        user_cache.clear()
+        for cache in caches.all():
+            cache.clear()
+
+    def create_user(self, username, **fields):
+        return CustomUser.objects.create(
+            username=username, email=f'{username}@example.com', **fields
+        )
+
+    def auth(self, user):
+        token = self.keys.issue_token(user.username, email=user.email)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+class AuthenticationTests(APITestCase):
+    def test_rejects_expired_token(self):
+        user = self.create_user('ana')
+        token = self.keys.issue_token(user.username, expires_in=-60)
+        response = self.client.get(
+            reverse('user-profile'), HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_rejects_inactive_user(self):
+        user = self.create_user('ana', is_active=False)
+        response = self.client.get(reverse('sessions'), **self.auth(user))
+        self.assertEqual(response.status_code, 403)
+
+    def test_user_cache_is_dropped_after_commit(self):
+        user = self.create_user('ana')
+        url = reverse('sessions')
+        self.assertEqual(
+            self.client.get(url, **self.auth(user)).status_code, 200
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            self.assertIsNotNone(user_cache.get(user.username))
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(user_cache.get(user.username))
+        response = self.client.get(url, **self.auth(user))
+        self.assertEqual(response.status_code, 403)
+
+
+class SessionBookingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.psychologist = self.create_user('psi', type='psychologist')
+        self.ana = self.create_user('ana', type='user')
+        self.bia = self.create_user('bia', type='user')
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def book(self, user, start, end, psychologist=None):
+        return self.client.post(
+            reverse('sessions'),
+            {
+                'date': self.day.isoformat(),
+                'start_time': start,
+                'end_time': end,
+                'psychologist': (psychologist or self.psychologist).id,
+            },
+            content_type='application/json',
+            **self.auth(user),
+        )
+
+    def test_books_free_slot(self):
+        response = self.book(self.ana, '10:00', '11:00')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_overlap_with_psychologist_returns_409(self):
+        self.assertEqual(
+            self.book(self.ana, '10:00', '11:00').status_code, 201
+        )
+        response = self.book(self.bia, '10:30', '11:30')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_overlap_with_own_session_returns_409(self):
+        other = self.create_user('psi2', type='psychologist')
+        self.assertEqual(
+            self.book(self.ana, '10:00', '11:00').status_code, 201
+        )
+        response = self.book(self.ana, '10:00', '10:30', psychologist=other)
+        self.assertEqual(response.status_code, 409)
+
+    def test_adjacent_sessions_do_not_overlap(self):
+        self.assertEqual(
+            self.book(self.ana, '10:00', '11:00').status_code, 201
+        )
+        self.assertEqual(
+            self.book(self.bia, '11:00', '12:00').status_code, 201
+        )
+
+    def test_inactive_psychologist_returns_404(self):
+        self.psychologist.is_active = False
+        self.psychologist.save(update_fields=['is_active'])
+        self.assertEqual(
+            self.book(self.ana, '10:00', '11:00').status_code, 404
+        )
+
+
+class AccountOwnershipTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user('ana')
+        self.bia = self.create_user('bia')
+
+    def test_update_requires_authentication(self):
+        response = self.client.put(
+            reverse('user-update', args=[self.ana.id]),
+            {'name': 'Outra'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_update_requires_owner(self):
+        response = self.client.put(
+            reverse('user-update', args=[self.ana.id]),
+            {'name': 'Outra'},
+            content_type='application/json',
+            **self.auth(self.bia),
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def update_email(self, email):
+        return self.client.put(
+            reverse('user-update', args=[self.ana.id]),
+            {'email': email},
+            content_type='application/json',
+            **self.auth(self.ana),
+        )
+
+    def test_update_normalizes_email(self):
+        self.assertEqual(
+            self.update_email('Ana.Nova@EXAMPLE.com').status_code, 200
+        )
+        self.ana.refresh_from_db()
+        self.assertEqual(self.ana.email, 'Ana.Nova@example.com')
+
+    def test_update_rejects_taken_email_in_other_case(self):
+        response = self.update_email('bia@Example.COM')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [EMAIL_TAKEN])
+
+    def test_delete_requires_owner(self):
+        response = self.client.delete(
+            reverse('user-delete', args=[self.ana.id]), **self.auth(self.bia)
+        )
+        self.assertEqual(response.status_code, 403)
+        self.ana.refresh_from_db()
+        self.assertTrue(self.ana.is_active)
+
+    def test_deletion_status_requires_owner_or_staff(self):
+        status_url = reverse('user-delete-status', args=[self.ana.id])
+        self.assertEqual(
+            self.client.get(status_url, **self.auth(self.ana)).status_code,
+            404,
+        )
+        config = {**settings.ACCOUNT_DELETION, 'WORKER': False}
+        with override_settings(ACCOUNT_DELETION=config):
+            response = self.client.delete(
+                reverse('user-delete', args=[self.ana.id]),
+                **self.auth(self.ana),
+            )
+        self.assertEqual(response.status_code, 202)
+
+        self.assertEqual(
+            self.client.get(status_url, **self.auth(self.bia)).status_code,
+            403,
+        )
+        staff = self.create_user('equipe', is_staff=True)
+        response = self.client.get(status_url, **self.auth(staff))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'pending')
+
+
+@override_settings(
+    QUERY_PROFILING={
+        **settings.QUERY_PROFILING,
+        'ASSERT_BUDGETS': True,
+        'LOG': False,
+    },
+    ACCOUNT_DELETION={**settings.ACCOUNT_DELETION, 'WORKER': False},
+)
+class QueryBudgetTests(APITestCase):
+    """Com ASSERT_BUDGETS, passar do orçamento da rota falha o teste."""
+
+    def setUp(self):
+        super().setUp()
+        self.psychologist = self.create_user('psi', type='psychologist')
+        self.ana = self.create_user('ana', type='user')
+
+    def test_profile(self):
+        response = self.client.get(
+            reverse('user-profile'), **self.auth(self.ana)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_update(self):
+        response = self.client.put(
+            reverse('user-update', args=[self.ana.id]),
+            {'name': 'Ana', 'email': 'ana.nova@example.com'},
+            content_type='application/json',
+            **self.auth(self.ana),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sessions(self):
+        day = timezone.localdate() + timedelta(days=1)
+        response = self.client.post(
+            reverse('sessions'),
+            {
+                'date': day.isoformat(),
+                'start_time': '10:00',
+                'end_time': '11:00',
+                'psychologist': self.psychologist.id,
+            },
+            content_type='application/json',
+            **self.auth(self.ana),
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(reverse('sessions'), **self.auth(self.ana))
+        self.assertEqual(response.status_code, 200)
+
+    def test_availability(self):
+        response = self.client.get(
+            reverse('availability'), **self.auth(self.ana)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete(self):
+        response = self.client.delete(
+            reverse('user-delete', args=[self.ana.id]), **self.auth(self.ana)
+        )
+        self.assertEqual(response.status_code, 202)
+
+
+class AccountDeletionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.psychologist = self.create_user('psi', type='psychologist')
+        self.ana = self.create_user('ana', type='user')
+        today = timezone.localdate()
+        self.past, self.future = (
+            Session.objects.create(
+                date=today + timedelta(days=offset),
+                start_time='10:00',
+                end_time='11:00',
+                psychologist=self.psychologist,
+                user=self.ana,
+            )
+            for offset in (-7, 7)
+        )
+        group = SupportGroup.objects.create(name='Luto', slug='luto')
+        groups.join(self.ana, group)
+        for _ in range(5):
+            Post.objects.create(
+                user=self.ana,
+                mood=Mood.TRISTE,
+                feeling=Feeling.MEDO,
+                motive=Motive.CANSACO,
+                text='Quero morrer.',
+            )
+
+    def delete_account(self, policy):
+        config = {
+            **settings.ACCOUNT_DELETION,
+            'CHUNK_SIZE': 2,
+            'PAUSE': 0,
+            'SESSION_POLICY': policy,
+            'WORKER': False,
+        }
+        with override_settings(ACCOUNT_DELETION=config):
+            request = deletion.request_deletion(self.ana)
+            progress = []
+            deletion.run(request, progress=progress.append)
+        self.assertEqual(progress, [2, 2, 1])
+        request.refresh_from_db()
+        return request
+
+    def assertAccountGone(self, request):
+        self.assertEqual(request.status, 'done')
+        self.assertEqual(request.posts_deleted, 5)
+        self.assertIsNone(request.user_id)
+        self.assertFalse(CustomUser.objects.filter(id=self.ana.id).exists())
+        self.assertFalse(Post.objects.filter(user_id=self.ana.id).exists())
+        self.assertFalse(RiskAlert.objects.exists())
+        self.assertFalse(GroupMembership.objects.exists())
+        # A parte da plataforma nas agregações sai com os posts
+        self.assertFalse(PostRollup.objects.exists())
+
+    def remaining_sessions(self):
+        return dict(Session.objects.values_list('id', 'user_id'))
+
+    def test_detach_keeps_every_session(self):
+        request = self.delete_account('detach')
+        self.assertAccountGone(request)
+        self.assertEqual(
+            self.remaining_sessions(),
+            {self.past.id: None, self.future.id: None},
+        )
+        self.assertEqual(request.sessions_resolved, 2)
+
+    def test_cancel_future_keeps_only_past_sessions(self):
+        request = self.delete_account('cancel_future')
+        self.assertAccountGone(request)
+        self.assertEqual(self.remaining_sessions(), {self.past.id: None})
+        self.assertEqual(request.sessions_resolved, 2)
+
+    def test_delete_removes_every_session(self):
+        request = self.delete_account('delete')
+        self.assertAccountGone(request)
+        self.assertEqual(self.remaining_sessions(), {})
+        self.assertEqual(request.sessions_resolved, 2)
+
+    def test_request_is_idempotent(self):
+        config = {**settings.ACCOUNT_DELETION, 'WORKER': False}
+        with override_settings(ACCOUNT_DELETION=config):
+            first = deletion.request_deletion(self.ana)
+            second = deletion.request_deletion(self.ana)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(AccountDeletion.objects.count(), 1)
+        self.ana.refresh_from_db()
+        self.assertFalse(self.ana.is_active)
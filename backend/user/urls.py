@@ -1,8 +1,26 @@
 from django.urls import path
-from .views import create_user_view, update_user_view, delete_user_view
+from .views import (
+    create_user_view,
+    update_user_view,
+    delete_user_view,
+    delete_user_status_view,
+    sessions_view,
+    user_profile,
+    availability_view,
+    working_hours_view,
+)
 
 urlpatterns = [
     path('register/', create_user_view, name='user-register'),
     path('update/<int:user_id>/', update_user_view, name='user-update'),
     path('delete/<int:user_id>/', delete_user_view, name='user-delete'),
+    path(
+        'delete/<int:user_id>/status/',
+        delete_user_status_view,
+        name='user-delete-status',
+    ),
+    path('profile/', user_profile, name='user-profile'),
+    path('sessions/', sessions_view, name='sessions'),
+    path('availability/', availability_view, name='availability'),
+    path('availability/hours/', working_hours_view, name='working-hours'),
 ]
@@ -0,0 +1,114 @@
+from datetime import date
+
+from django.db.models import Q
+
+from .models import CustomUser
+
+EMAIL_TAKEN = 'Este e-mail já está em uso.'
+USERNAME_TAKEN = 'Este username já está em uso.'
+REQUIRED_FIELDS = ('name', 'email', 'username', 'password', 'type', 'phone')
+
+
+def validate_birth(birth):
+    """Valida a data de nascimento (ISO, ex: '1990-05-12')."""
+    errors = []
+
+    try:
+        birth_date = date.fromisoformat(birth)
+    except (ValueError, TypeError):
+        return None, ['Formato de data de nascimento inválido.']
+
+    today = date.today()
+
+    if birth_date > today:
+        errors.append('A data de nascimento não pode estar no futuro.')
+
+    age = (
+        today.year
+        - birth_date.year
+        - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    )
+
+    if birth_date.year < today.year - 120:
+        errors.append('A data de nascimento é muito antiga.')
+
+    if age < 18:
+        errors.append('Você precisa ter pelo menos 18 anos.')
+
+    return birth_date, errors
+
+
+def validate_registration(data):
+    """
+    Regras de cadastro, exceto unicidade. Retorna os campos prontos para o
+    CustomUser (com a senha ainda em texto) e a lista de erros.
+    """
+    type_ = data.get('type')
+    fields = {
+        'name': data.get('name'),
+        'email': data.get('email'),
+        'username': data.get('username'),
+        'password': data.get('password'),
+        'type': type_,
+        'phone': data.get('phone'),
+        'crp': data.get('crp') if type_ == 'psychologist' else None,
+    }
+    birth = data.get('birth')
+
+    errors = []
+
+    if not all([*(fields[key] for key in REQUIRED_FIELDS), birth]):
+        errors.append('Todos os campos obrigatórios devem ser preenchidos.')
+
+    if fields['email']:
+        fields['email'] = CustomUser.objects.normalize_email(fields['email'])
+    if fields['username']:
+        fields['username'] = CustomUser.normalize_username(fields['username'])
+
+    fields['birth'], birth_errors = validate_birth(birth)
+    errors.extend(birth_errors)
+
+    if type_ == 'psychologist' and not fields['crp']:
+        errors.append('O campo CRP é obrigatório para psicólogos.')
+
+    return fields, errors
+
+
+def validate_unique(email=None, username=None, exclude_id=None):
+    """Confere e-mail e username com uma única consulta."""
+    lookup = Q()
+    if email:
+        lookup |= Q(email=email)
+    if username:
+        lookup |= Q(username=username)
+    if not lookup:
+        return []
+
+    taken = (
+        CustomUser.objects.filter(lookup)
+        .exclude(id=exclude_id)
+        .values_list('email', 'username')
+    )
+
+    errors = []
+    for taken_email, taken_username in taken:
+        if email and taken_email == email and EMAIL_TAKEN not in errors:
+            errors.append(EMAIL_TAKEN)
+        if (
+            username
+            and taken_username == username
+            and USERNAME_TAKEN not in errors
+        ):
+            errors.append(USERNAME_TAKEN)
+    return errors
+
+
+def integrity_errors(error):
+    """Traduz a violação de unicidade vinda do banco (corrida entre cadastros)."""
+    message = str(error)
+    errors = []
+    if 'email' in message:
+        errors.append(EMAIL_TAKEN)
+    if 'username' in message:
+        errors.append(USERNAME_TAKEN)
+    return errors or ['Não foi possível salvar o usuário.']
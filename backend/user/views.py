@@ -2,190 +2,460 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from datetime import date
-from .models import CustomUser
+from datetime import date, time
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from app.http import request_data
+from app.response_cache import cache_response, sessions_tag, user_tag
+from app.throttling import throttle
+from . import availability
+from .auth_cache import invalidate_user
+from .authentication import async_login_required
+from .deletion import request_deletion
+from .hashing import PoolBusy, make_password_async
+from .models import AccountDeletion, CustomUser, Session, WorkingHours
+from .validators import (
+    integrity_errors,
+    validate_birth,
+    validate_registration,
+    validate_unique,
+)
+
+AVAILABILITY_DEFAULT_DAYS = 14
+AVAILABILITY_MAX_DAYS = 31
+
+
+def _invalid_body():
+    return JsonResponse(
+        {'errors': ['Corpo da requisição inválido.']},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
 
 
-@api_view(['POST'])
-def create_user_view(request):
-    data = request.data
-    name = data.get('name')
-    email = data.get('email')
-    username = data.get('username')
-    password = data.get('password')
-    type_ = data.get('type')
-    birth = data.get('birth')
-    phone = data.get('phone')
-    crp = data.get('crp') if type_ == 'psychologist' else None
+def _not_owner():
+    return {'error': 'Você não tem acesso a esta conta.'}
 
-    errors = []
 
-    if not all([name, email, username, password, type_, birth, phone]):
-        errors.append('Todos os campos obrigatórios devem ser preenchidos.')
+def _hashing_busy():
+    response = JsonResponse(
+        {'errors': ['Servidor ocupado, tente novamente em instantes.']},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+# Views assíncronas: sob app.asgi o hash da senha roda no pool de
+# hashing.py e não prende o event loop nem a thread das views síncronas.
+@csrf_exempt
+@require_http_methods(['POST'])
+@throttle
+async def create_user_view(request):
+    data = request_data(request)
+    if data is None:
+        return _invalid_body()
+
+    fields, errors = validate_registration(data)
+    password = fields.pop('password')
+
+    errors.extend(
+        await sync_to_async(validate_unique)(
+            fields['email'], fields['username']
+        )
+    )
+
+    if errors:
+        return JsonResponse(
+            {'errors': errors}, status=status.HTTP_400_BAD_REQUEST
+        )
 
     try:
-        birth_date = date.fromisoformat(birth)  # ISO format (ex: '1990-05-12')
-        today = date.today()
+        password_hash = await make_password_async(password)
+    except PoolBusy:
+        return _hashing_busy()
 
-        if birth_date > today:
-            errors.append('A data de nascimento não pode estar no futuro.')
+    user = CustomUser(password=password_hash, **fields)
 
-        age = (
-            today.year
-            - birth_date.year
-            - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    try:
+        await user.asave(force_insert=True)
+    except IntegrityError as e:
+        return JsonResponse(
+            {'errors': integrity_errors(e)},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        if birth_date.year < today.year - 120:
-            errors.append('A data de nascimento é muito antiga.')
+    return JsonResponse(
+        {'message': 'Usuário criado com sucesso!'},
+        status=status.HTTP_201_CREATED,
+    )
 
-        if age < 18:
-            errors.append('Você precisa ter pelo menos 18 anos.')
 
-    except (ValueError, TypeError):
-        errors.append('Formato de data de nascimento inválido.')
+@csrf_exempt
+@require_http_methods(['PUT'])
+@async_login_required
+@throttle
+async def update_user_view(request, user_id):
+    if request.user.id != user_id:
+        return JsonResponse(_not_owner(), status=status.HTTP_403_FORBIDDEN)
 
-    if type_ == 'psychologist' and not crp:
-        errors.append('O campo CRP é obrigatório para psicólogos.')
+    try:
+        user = await CustomUser.objects.aget(id=user_id)
+    except CustomUser.DoesNotExist:
+        return JsonResponse(
+            {'error': 'Usuário não encontrado.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
 
-    if CustomUser.objects.filter(email=email).exists():
-        errors.append('Este e-mail já está em uso.')
+    data = request_data(request)
+    if data is None:
+        return _invalid_body()
 
-    if CustomUser.objects.filter(username=username).exists():
-        errors.append('Este username já está em uso.')
+    errors = []
+
+    name = data.get('name', user.name)
+    email = data.get('email', user.email)
+    if email:
+        # Como no cadastro: o domínio em minúsculas, antes de comparar
+        email = CustomUser.objects.normalize_email(email)
+    username = data.get('username', user.username)
+    phone = data.get('phone', user.phone)
+    type_ = data.get('type', user.type)
+
+    # Só consulta o que mudou, numa única query
+    errors.extend(
+        await sync_to_async(validate_unique)(
+            email if email != user.email else None,
+            username if username != user.username else None,
+            exclude_id=user.id,
+        )
+    )
+
+    # Validação de data de nascimento se for fornecida
+    birth = data.get('birth')
+    if birth:
+        birth_date, birth_errors = validate_birth(birth)
+        errors.extend(birth_errors)
+    else:
+        birth_date = user.birth
 
     if errors:
-        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
-
-    user = CustomUser.objects.create_user(
-        name=name,
-        email=email,
-        username=username,
-        password=password,
-        type=type_,
-        birth=birth_date,
-        phone=phone,
-        crp=crp,
+        return JsonResponse(
+            {'errors': errors}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    password = data.get('password')
+    if password:
+        try:
+            user.password = await make_password_async(password)
+        except PoolBusy:
+            return _hashing_busy()
+
+    invalidate_user(user.username)
+
+    # Atualizar os campos do usuário
+    user.name = name
+    user.email = email
+    user.username = username
+    user.phone = phone
+    user.type = type_
+
+    if birth:
+        user.birth = birth_date
+
+    try:
+        await user.asave()
+    except IntegrityError as e:
+        return JsonResponse(
+            {'errors': integrity_errors(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    invalidate_user(user.username)
+
+    return JsonResponse(
+        {'message': 'Usuário atualizado com sucesso!'},
+        status=status.HTTP_200_OK,
     )
 
+
+def _deletion_data(deletion):
+    return {
+        'id': deletion.id,
+        'status': deletion.status,
+        'session_policy': deletion.session_policy,
+        'posts_total': deletion.posts_total,
+        'posts_deleted': deletion.posts_deleted,
+        'sessions_resolved': deletion.sessions_resolved,
+        'create_in': deletion.create_in,
+        'finish_in': deletion.finish_in,
+    }
+
+
+@api_view(['DELETE'])
+def delete_user_view(request, user_id):
+    # O único dono possível é quem está autenticado
+    if request.user.id != user_id:
+        return Response(_not_owner(), status=status.HTTP_403_FORBIDDEN)
+    user = request.user
+
+    # Os posts e as sessões saem depois, em lotes (user.deletion)
+    deletion = request_deletion(user)
+    invalidate_user(user.username)
     return Response(
-        {'message': 'Usuário criado com sucesso!'},
-        status=status.HTTP_201_CREATED,
+        {
+            'message': 'Exclusão do usuário iniciada.',
+            'deletion': _deletion_data(deletion),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(['GET'])
+def delete_user_status_view(request, user_id):
+    # O dono deixa de autenticar quando a exclusão começa; depois disso só
+    # a equipe acompanha
+    if request.user.id != user_id and not request.user.is_staff:
+        return Response(_not_owner(), status=status.HTTP_403_FORBIDDEN)
+
+    deletion = (
+        AccountDeletion.objects.filter(account_id=user_id)
+        .order_by('-id')
+        .first()
     )
+    if deletion is None:
+        return Response(
+            {'error': 'Nenhuma exclusão para este usuário.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response(_deletion_data(deletion))
+
+
+@require_http_methods(['GET'])
+@async_login_required
+@cache_response(lambda request: [user_tag(request.user.id)])
+async def user_profile(request):
+    return JsonResponse(
+        {
+            'user_id': request.user.id,
+            'email': request.user.email,
+            'name': request.user.first_name,
+        }
+    )
+
+
+def _session_data(session):
+    return {
+        'id': session.id,
+        'date': session.date,
+        'start_time': session.start_time,
+        'end_time': session.end_time,
+        'psychologist': session.psychologist_id,
+        'user': session.user_id,
+    }
 
 
-@api_view(['PUT'])
-def update_user_view(request, user_id):
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@cache_response(lambda request: [sessions_tag(request.user.id)])
+def sessions_view(request):
+    if request.method == 'GET':
+        sessions = Session.objects.filter(
+            Q(user=request.user) | Q(psychologist=request.user),
+            date__gte=date.today(),
+        ).order_by('date', 'start_time')[:100]
+        return Response([_session_data(session) for session in sessions])
+
+    data = request.data
     try:
-        user = CustomUser.objects.get(id=user_id)
-        data = request.data
-        errors = []
+        session_date = date.fromisoformat(data.get('date'))
+        start_time = time.fromisoformat(data.get('start_time'))
+        end_time = time.fromisoformat(data.get('end_time'))
+        psychologist_id = int(data.get('psychologist'))
+    except (TypeError, ValueError):
+        return Response(
+            {'error': 'Dados da sessão inválidos.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        name = data.get('name', user.name)
-        email = data.get('email', user.email)
-        username = data.get('username', user.username)
-        phone = data.get('phone', user.phone)
-        type_ = data.get('type', user.type)
+    if start_time >= end_time:
+        return Response(
+            {'error': 'O horário de término deve ser depois do início.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        if (
-            email != user.email
-            and CustomUser.objects.filter(email=email).exists()
-        ):
-            errors.append('Este e-mail já está em uso.')
+    if session_date < date.today():
+        return Response(
+            {'error': 'Não é possível agendar sessões no passado.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        # Verificar se username já existe (excluindo o usuário atual)
+    with transaction.atomic():
+        # Trava as duas agendas (em ordem de id, para evitar deadlock) até
+        # o fim da transação; no SQLite o BEGIN IMMEDIATE já serializa.
+        locked = {
+            user.id: user
+            for user in CustomUser.objects.select_for_update()
+            .filter(id__in=[psychologist_id, request.user.id])
+            .order_by('id')
+        }
+        psychologist = locked.get(psychologist_id)
+
+        # Inativo: conta em exclusão, não recebe sessões novas
         if (
-            username != user.username
-            and CustomUser.objects.filter(username=username).exists()
+            psychologist is None
+            or not psychologist.is_psychologist()
+            or not psychologist.is_active
         ):
-            errors.append('Este username já está em uso.')
-
-        # Validação de data de nascimento se for fornecida
-        birth = data.get('birth')
-        if birth:
-            try:
-                birth_date = date.fromisoformat(birth)
-                today = date.today()
-
-                if birth_date > today:
-                    errors.append(
-                        'A data de nascimento não pode estar no futuro.'
-                    )
-
-                age = (
-                    today.year
-                    - birth_date.year
-                    - (
-                        (today.month, today.day)
-                        < (birth_date.month, birth_date.day)
-                    )
-                )
+            return Response(
+                {'error': 'Psicólogo não encontrado.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-                if birth_date.year < today.year - 120:
-                    errors.append('A data de nascimento é muito antiga.')
+        if psychologist.id == request.user.id:
+            return Response(
+                {'error': 'Não é possível agendar uma sessão consigo mesmo.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-                if age < 18:
-                    errors.append('Você precisa ter pelo menos 18 anos.')
+        overlapping = Session.objects.filter(
+            date=session_date,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
 
-            except (ValueError, TypeError):
-                errors.append('Formato de data de nascimento inválido.')
-        else:
-            birth_date = user.birth
+        if overlapping.filter(psychologist=psychologist).exists():
+            return Response(
+                {'error': 'O psicólogo já tem uma sessão neste horário.'},
+                status=status.HTTP_409_CONFLICT,
+            )
 
-        if errors:
+        if overlapping.filter(user=request.user).exists():
             return Response(
-                {'errors': errors}, status=status.HTTP_400_BAD_REQUEST
+                {'error': 'Você já tem uma sessão neste horário.'},
+                status=status.HTTP_409_CONFLICT,
             )
 
-        # Atualizar os campos do usuário
-        user.name = name
-        user.email = email
-        user.username = username
-        user.phone = phone
-        user.type = type_
+        session = Session.objects.create(
+            date=session_date,
+            start_time=start_time,
+            end_time=end_time,
+            psychologist=psychologist,
+            user=request.user,
+        )
 
-        if birth:
-            user.birth = birth_date
+    return Response(_session_data(session), status=status.HTTP_201_CREATED)
 
-        password = data.get('password')
-        if password:
-            user.set_password(password)
 
-        user.save()
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def availability_view(request):
+    params = request.query_params
+    today = timezone.localdate()
 
+    try:
+        start = date.fromisoformat(params.get('start', today.isoformat()))
+        days = int(params.get('days', AVAILABILITY_DEFAULT_DAYS))
+        duration = int(params.get('duration', 50))
+        psychologist_id = int(params.get('psychologist', 0))
+    except ValueError:
         return Response(
-            {'message': 'Usuário atualizado com sucesso!'},
-            status=status.HTTP_200_OK,
+            {'error': 'Parâmetros inválidos.'},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-    except CustomUser.DoesNotExist:
+    if not 1 <= days <= AVAILABILITY_MAX_DAYS or not 10 <= duration <= 240:
         return Response(
-            {'error': 'Usuário não encontrado.'},
-            status=status.HTTP_404_NOT_FOUND,
+            {'error': 'Parâmetros fora dos limites permitidos.'},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
+    start = max(start, today)
+    psychologists = CustomUser.objects.filter(
+        type='psychologist', is_active=True, working_hours__isnull=False
+    ).distinct()
+    if psychologist_id:
+        psychologists = psychologists.filter(id=psychologist_id)
+    names = dict(psychologists.values_list('id', 'name'))
+
+    free = availability.free_intervals(list(names), start, days)
+    now = availability.to_minutes(timezone.localtime().time())
+
+    results = []
+    for psychologist_id, name in names.items():
+        slots = [
+            {
+                'date': day,
+                'start_time': availability.from_minutes(slot_start),
+                'end_time': availability.from_minutes(slot_end),
+            }
+            for day, intervals in sorted(free[psychologist_id].items())
+            for slot_start, slot_end in availability.split_slots(
+                intervals, duration, now if day == today else 0
+            )
+        ]
+        if slots:
+            results.append(
+                {'psychologist': psychologist_id, 'name': name, 'slots': slots}
+            )
 
-@api_view(['DELETE'])
-def delete_user_view(request, user_id):
-    try:
-        user = CustomUser.objects.get(id=user_id)
-        user.delete()
-        return Response(
-            {'message': 'Usuário deletado com sucesso!'},
-            status=status.HTTP_200_OK,
-        )
-    except CustomUser.DoesNotExist:
+    return Response(results)
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def working_hours_view(request):
+    if not request.user.is_psychologist():
         return Response(
-            {'error': 'Usuário não encontrado.'},
-            status=status.HTTP_404_NOT_FOUND,
+            {'error': 'Apenas psicólogos têm horário de atendimento.'},
+            status=status.HTTP_403_FORBIDDEN,
         )
-    
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def user_profile(request):
-    return Response({
-        'user_id': request.user.id,
-        'email': request.user.email,
-        'name': request.user.first_name
-    })
+    if request.method == 'PUT':
+        try:
+            hours = [
+                WorkingHours(
+                    psychologist=request.user,
+                    weekday=int(item['weekday']),
+                    start_time=time.fromisoformat(item['start_time']),
+                    end_time=time.fromisoformat(item['end_time']),
+                )
+                for item in request.data
+            ]
+        except (TypeError, KeyError, ValueError):
+            return Response(
+                {'error': 'Horários inválidos.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if any(
+            not 0 <= item.weekday <= 6 or item.start_time >= item.end_time
+            for item in hours
+        ):
+            return Response(
+                {'error': 'Horários inválidos.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            WorkingHours.objects.filter(psychologist=request.user).delete()
+            WorkingHours.objects.bulk_create(hours)
+        # bulk_create não dispara post_save
+        availability.invalidate_psychologist(request.user.id)
+
+    hours = WorkingHours.objects.filter(psychologist=request.user).order_by(
+        'weekday', 'start_time'
+    )
+    return Response(
+        [
+            {
+                'weekday': item.weekday,
+                'start_time': item.start_time,
+                'end_time': item.end_time,
+            }
+            for item in hours
+        ]
+    )